@@ -0,0 +1,16 @@
+-- Parameters: code point id, maximum ancestor level (NULL for no limit)
+-- Id based, so each step is an index search. UNION rather than UNION ALL deduplicates per level: a code point reached via multiple paths
+-- at the same level is only walked once. The level guard also stops cycles in the data (which do exist) from recursing indefinitely
+WITH RECURSIVE ancestor(id, ancestor_level) AS (
+    SELECT ?1, 0
+    UNION
+    SELECT deriv.parent_id, a.ancestor_level + 1
+    FROM 
+        ancestor a
+        INNER JOIN code_point_derivation deriv ON deriv.child_id = a.id
+    WHERE a.ancestor_level < COALESCE(?2, 100)
+)
+SELECT cp.id, cp.text AS character, cp.name, MIN(a.ancestor_level) AS ancestor_level 
+FROM ancestor a INNER JOIN code_point cp ON cp.id = a.id
+GROUP BY a.id
+ORDER BY ancestor_level, cp.name
@@ -0,0 +1,17 @@
+-- Parameters: code point id, maximum descendant level (NULL for no limit)
+-- Id based, so each step is an index search. UNION rather than UNION ALL deduplicates per level: a code point reached via multiple paths
+-- at the same level is only walked once. The level guard also stops cycles in the data (which do exist) from recursing indefinitely
+WITH RECURSIVE descendant(id, descendant_level) AS (
+    SELECT ?1, 0
+    UNION
+    SELECT deriv.child_id, d.descendant_level + 1
+    FROM 
+        descendant d
+        INNER JOIN code_point_derivation deriv ON deriv.parent_id = d.id
+        INNER JOIN code_point cp ON cp.id = deriv.child_id
+    WHERE d.descendant_level < COALESCE(?2, 100) AND cp.equivalent_sequence_id IS NULL
+)
+SELECT cp.id, cp.text AS character, cp.name, MIN(d.descendant_level) AS descendant_level 
+FROM descendant d INNER JOIN code_point cp ON cp.id = d.id
+GROUP BY d.id
+ORDER BY descendant_level, cp.name
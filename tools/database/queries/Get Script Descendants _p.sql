@@ -0,0 +1,6 @@
+-- Parameters: script code
+-- Scripts descended from the given script by main_parent_code (including itself). A range on the script tree labels rather than a recursive walk
+SELECT d.code, d.name, d.main_parent_code
+FROM script s INNER JOIN script d ON d.preorder_num BETWEEN s.preorder_num AND s.subtree_end_num
+WHERE s.code = ?
+ORDER BY d.preorder_num
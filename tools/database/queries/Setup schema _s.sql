@@ -69,7 +69,9 @@ CREATE TABLE IF NOT EXISTS script (
     canonical_script_code TEXT REFERENCES script(code),
     main_parent_code TEXT REFERENCES script(code),
     main_lang_code TEXT REFERENCES language(code),
-    exemplar_sequence_id INTEGER UNIQUE REFERENCES sequence(id)    
+    exemplar_sequence_id INTEGER UNIQUE REFERENCES sequence(id),
+    preorder_num INTEGER UNIQUE,  -- script tree (by main_parent_code) labels: descendants are those with preorder_num between these two
+    subtree_end_num INTEGER
 ) STRICT;
 CREATE INDEX IF NOT EXISTS idx_fk_scr_type ON script(type_id);
 CREATE INDEX IF NOT EXISTS idx_fk_main_parent_script ON script(main_parent_code) WHERE main_parent_code IS NOT NULL; 
@@ -115,7 +117,7 @@ CREATE TABLE IF NOT EXISTS code_point (
         WHEN general_category_code = 'Cs' THEN NULL  -- The non-parent character is not conforming right now...
         WHEN id BETWEEN 0xAC00 AND 0xD7A3 THEN CONCAT('HANGUL SYLLABLE ', raw_name)
         WHEN id BETWEEN 0x13460 AND 0x143FA THEN CONCAT('EGYPTIAN HIEROGLYPH-', printf('%X', id))
-        WHEN id BETWEEN 0x17000 AND 0x187F7 OR 
+        WHEN id BETWEEN 0x17000 AND 0x187FF OR  -- the UnicodeData Tangut Ideograph range
              id BETWEEN 0x18D00 AND 0x18D1E THEN CONCAT('TANGUT IDEOGRAPH-', printf('%X', id))
         WHEN id BETWEEN 0x18B00 AND 0x18CD5 THEN CONCAT('KHITAN SMALL SCRIPT CHARACTER-', printf('%X', id))
         WHEN id BETWEEN 0x1B170 AND 0x1B2FB THEN CONCAT('NUSHU CHARACTER-', printf('%X', id))
@@ -133,6 +135,7 @@ CREATE TABLE IF NOT EXISTS code_point (
     simple_uppercase_mapping_id INTEGER REFERENCES code_point(id),
     simple_lowercase_mapping_id INTEGER REFERENCES code_point(id),
     equivalent_sequence_id INTEGER REFERENCES sequence(id),
+    canonical_id INTEGER REFERENCES sequence(id),  -- NULL when its own canonical representative, see _load_canonical_ids (a sequence, as compressed ranges have no code point row)
     is_alphabetic INTEGER NOT NULL DEFAULT 0,
     is_independently_graphical INTEGER NOT NULL DEFAULT 1,
     is_lowercase INTEGER NOT NULL DEFAULT 0,
@@ -144,9 +147,39 @@ CREATE TABLE IF NOT EXISTS code_point (
 CREATE INDEX IF NOT EXISTS idx_fk_cp_script ON code_point(script_code) WHERE script_code <> 'Hani'; -- no point indexing ~2/3 of the table;
 CREATE INDEX IF NOT EXISTS idx_cp_general_category ON code_point(general_category_code) WHERE general_category_code <> 'Lo';  -- even more of the table 
 CREATE INDEX IF NOT EXISTS idx_fk_cp_equivalent_sequence ON code_point(equivalent_sequence_id) WHERE equivalent_sequence_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_fk_cp_canonical ON code_point(canonical_id) WHERE canonical_id IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_fk_cp_simple_lowercase_mapping ON code_point(simple_lowercase_mapping_id) WHERE simple_lowercase_mapping_id IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_fk_cp_simple_uppercase_mapping ON code_point(simple_uppercase_mapping_id) WHERE simple_uppercase_mapping_id IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_cp_raw_name ON code_point(raw_name) WHERE raw_name IS NOT NULL;
+-- names which aren't derived from the id (those can be parsed for the id instead), kept in all builds for name lookups. Queries must repeat the WHERE to use it
+CREATE INDEX IF NOT EXISTS idx_cp_name ON code_point(name) WHERE raw_name IS NOT NULL OR alt_name IS NOT NULL;
+
+-- Only kept with the compress_code_point_ranges load option, see _set_code_point_layout
+-- The UnicodeData ranges of code points named by their id (eg. CJK UNIFIED IDEOGRAPH-4E00), code_point then being a view over this table
+-- and the individually stored code points. Defaults as for code_point
+CREATE TABLE IF NOT EXISTS code_point_range (
+    start_id INTEGER PRIMARY KEY,
+    end_id INTEGER NOT NULL,
+    name_prefix TEXT NOT NULL,
+    script_code TEXT NOT NULL REFERENCES script (code),
+    general_category_code TEXT NOT NULL DEFAULT 'Cn',
+    bidi_class_code TEXT NOT NULL DEFAULT 'L',
+    is_alphabetic INTEGER NOT NULL DEFAULT 0,
+    is_independently_graphical INTEGER NOT NULL DEFAULT 1,
+    is_lowercase INTEGER NOT NULL DEFAULT 0,
+    is_uppercase INTEGER NOT NULL DEFAULT 0
+) STRICT;
+
+-- Only kept with the compact_storage load option, see _compact_storage. Codes of the code point columns stored as these ids
+CREATE TABLE IF NOT EXISTS general_category (
+    id INTEGER PRIMARY KEY,
+    code TEXT UNIQUE NOT NULL
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS bidi_class (
+    id INTEGER PRIMARY KEY,
+    code TEXT UNIQUE NOT NULL
+) STRICT;
 
 CREATE TABLE IF NOT EXISTS name_indexer (
     code_point_id INTEGER REFERENCES code_point(id),
@@ -180,10 +213,57 @@ CREATE TABLE IF NOT EXISTS code_point_derivation (
     notes TEXT,
     PRIMARY KEY (child_id, parent_id)
 ) STRICT;
-CREATE INDEX IF NOT EXISTS idx_fk_cpd_parent ON code_point_derivation(parent_id); -- This is a table likely to be looked up in either direction child<->parent
+CREATE INDEX IF NOT EXISTS idx_fk_cpd_parent ON code_point_derivation(parent_id, child_id); -- This is a table likely to be looked up in either direction child<->parent (covering, with the PK)
 CREATE INDEX IF NOT EXISTS idx_fk_cpd_certainty ON code_point_derivation(certainty_type_id);
 CREATE INDEX IF NOT EXISTS idx_fk_cpd_process ON code_point_derivation(process_type_id);
 
+-- Aggregate of code_point_derivation at script level, generated at the end of the load (see _load_script_derivations)
+CREATE TABLE IF NOT EXISTS script_derivation (
+    child_script_code TEXT REFERENCES script (code),
+    parent_script_code TEXT REFERENCES script (code),
+    letter_weight REAL NOT NULL,
+    edge_count INTEGER NOT NULL,
+    min_certainty_type_id INTEGER NOT NULL REFERENCES certainty_type (id),
+    PRIMARY KEY (child_script_code, parent_script_code)
+) STRICT;
+CREATE INDEX IF NOT EXISTS idx_fk_sd_parent ON script_derivation(parent_script_code, child_script_code);
+
+-- Per script derivation counts for the statistics queries, generated at the end of the load and kept up to date by triggers on
+-- code_point_derivation (see _load_script_coverage)
+CREATE TABLE IF NOT EXISTS script_coverage (
+    script_code TEXT PRIMARY KEY REFERENCES script (code),
+    num_graphical INTEGER NOT NULL,  -- code points outside general categories C_ and Z_
+    num_graphical_derived INTEGER NOT NULL,  -- of those, the ones with a derivation
+    num_letters INTEGER NOT NULL,  -- alphabetic code points without an equivalent sequence
+    num_letters_derived INTEGER NOT NULL,
+    num_letters_manual INTEGER NOT NULL  -- with a manual derivation
+) STRICT;
+
+-- Transitive closure of code_point_derivation, generated at the end of the load (see _load_code_point_ancestry)
+-- Code points which are an ancestor of another get a dense ancestor_num (those added by watch_resources after the others), each code point
+-- in the derivation graph has its ancestors' numbers (sorted, 2 byte little-endian), read into bitsets by the Python API. These are sparse,
+-- so as bitsets they'd be ~30 times larger
+CREATE TABLE IF NOT EXISTS code_point_ancestry (
+    code_point_id INTEGER PRIMARY KEY REFERENCES code_point (id),
+    ancestor_num INTEGER UNIQUE,
+    ancestor_nums BLOB NOT NULL
+) STRICT;
+
+-- Lineage metrics of the code points in the derivation graph, generated with code_point_ancestry (see _load_code_point_lineage_stats)
+-- Code points without derivations have no row, their metrics being 0 and themselves as root ancestor
+CREATE TABLE IF NOT EXISTS code_point_lineage_stats (
+    code_point_id INTEGER PRIMARY KEY REFERENCES code_point (id),
+    ancestry_depth INTEGER NOT NULL,  -- longest derivation chain up to an ancestor without a (known) parent
+    root_ancestor_id INTEGER NOT NULL REFERENCES code_point (id),  -- the ancestor at the top of that chain
+    descendant_count INTEGER NOT NULL,  -- not counting code points with an equivalent sequence, as in the Get Code Point Descendants query
+    descendant_script_count INTEGER NOT NULL  -- scripts of the descendants, other than its own
+) STRICT;
+CREATE INDEX IF NOT EXISTS idx_cpls_depth ON code_point_lineage_stats(ancestry_depth);
+CREATE INDEX IF NOT EXISTS idx_fk_cpls_root ON code_point_lineage_stats(root_ancestor_id);  -- not partial, FK checks on deleting code points need it
+-- most code points in the graph have no descendants, so for ranking add "WHERE descendant_count > 0" (or script count) to use these
+CREATE INDEX IF NOT EXISTS idx_cpls_descendants ON code_point_lineage_stats(descendant_count) WHERE descendant_count > 0;
+CREATE INDEX IF NOT EXISTS idx_cpls_descendant_scripts ON code_point_lineage_stats(descendant_script_count) WHERE descendant_script_count > 0;
+
 CREATE TABLE IF NOT EXISTS manual_derivation_source (
     child_id INTEGER,
     parent_id INTEGER,
@@ -193,3 +273,20 @@ CREATE TABLE IF NOT EXISTS manual_derivation_source (
     FOREIGN KEY (child_id, parent_id) REFERENCES code_point_derivation (child_id, parent_id) ON DELETE CASCADE,
     PRIMARY KEY (child_id, parent_id, source_id)
 ) STRICT;
+
+-- Generated derivations replaced by manually specified ones, kept with LoadOptions.keep_overridden_derivations (see watch_resources)
+CREATE TABLE IF NOT EXISTS overridden_derivation (
+    child_id INTEGER REFERENCES code_point (id),
+    parent_id INTEGER REFERENCES code_point (id),
+    derivation_type_id INTEGER NOT NULL DEFAULT 1 REFERENCES derivation_type (id),
+    certainty_type_id INTEGER NOT NULL DEFAULT -1 REFERENCES certainty_type (id),
+    process_type_id INTEGER NOT NULL REFERENCES process_type (id),
+    multiplicity INTEGER DEFAULT 1 NOT NULL,
+    PRIMARY KEY (child_id, parent_id)
+) STRICT;
+
+-- Load stages completed by a build in progress (see LoadOptions.resume), dropped once the build gets to its final storage changes
+CREATE TABLE IF NOT EXISTS build_checkpoint (
+    stage_name TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL  -- of the resource files read by the stage
+) STRICT, WITHOUT ROWID;
@@ -7,11 +7,10 @@ SELECT
 	ROUND(100.0 * manual_derivations / letters, 1) AS manual_coverage
 FROM (
 	SELECT
-		COUNT(DISTINCT cp.id) AS letters,
-		COUNT(DISTINCT deriv.child_id) AS derivations,
-		COUNT(DISTINCT CASE WHEN deriv.process_type_id <> 1 THEN NULL ELSE deriv.child_id END) AS manual_derivations
-	FROM code_point cp LEFT JOIN code_point_derivation deriv ON cp.id = deriv.child_id
-	WHERE cp.equivalent_sequence_id IS NULL AND cp.is_alphabetic = 1
+		SUM(num_letters) AS letters,
+		SUM(num_letters_derived) AS derivations,
+		SUM(num_letters_manual) AS manual_derivations
+	FROM script_coverage
 )
 UNION ALL
 SELECT 
@@ -23,11 +22,11 @@ SELECT
 	ROUND(100.0 * manual_derivations / letters, 1) AS manual_coverage
 FROM (
 	SELECT
-		COUNT(DISTINCT cp.id) AS letters,
-		COUNT(DISTINCT deriv.child_id) AS derivations,
-		COUNT(DISTINCT CASE WHEN deriv.process_type_id <> 1 THEN NULL ELSE deriv.child_id END) AS manual_derivations
-	FROM code_point cp LEFT JOIN code_point_derivation deriv ON cp.id = deriv.child_id
-	WHERE cp.equivalent_sequence_id IS NULL AND cp.is_alphabetic = 1 AND (SELECT type_id FROM script WHERE code = cp.script_code) <> 8
+		SUM(sc.num_letters) AS letters,
+		SUM(sc.num_letters_derived) AS derivations,
+		SUM(sc.num_letters_manual) AS manual_derivations
+	FROM script_coverage sc INNER JOIN script s ON s.code = sc.script_code
+	WHERE s.type_id <> 8
 )
 UNION ALL
 SELECT 
@@ -39,11 +38,10 @@ SELECT
 	ROUND(100.0 * manual_derivations / letters, 1) AS manual_coverage
 FROM (
 	SELECT
-		COUNT(DISTINCT cp.id) AS letters,
-		COUNT(DISTINCT deriv.child_id) AS derivations,
-		COUNT(DISTINCT CASE WHEN deriv.process_type_id <> 1 THEN NULL ELSE deriv.child_id END) AS manual_derivations
-	FROM code_point cp LEFT JOIN code_point_derivation deriv ON cp.id = deriv.child_id
-	WHERE cp.equivalent_sequence_id IS NULL AND cp.is_alphabetic = 1 AND (SELECT type_id FROM script WHERE code = cp.script_code) = 8
+		SUM(sc.num_letters) AS letters,
+		SUM(sc.num_letters_derived) AS derivations,
+		SUM(sc.num_letters_manual) AS manual_derivations
+	FROM script_coverage sc INNER JOIN script s ON s.code = sc.script_code
+	WHERE s.type_id = 8
 )
 ORDER BY letters DESC
-
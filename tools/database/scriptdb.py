@@ -3,9 +3,28 @@ import sqlite3
 import re
 import csv
 import time
+import sys
+import struct
+import heapq
+import codecs
+import multiprocessing
+import threading
+import signal
+import cProfile
+import pstats
+import hashlib
+import json
+import pathlib
+import tempfile
+import bisect
+import functools
+import contextlib
+import copy
+import concurrent.futures
 from enum import Enum
 from zipfile import ZipFile
 from urllib.parse import quote
+from collections import Counter
 from collections.abc import Iterable
 
 class LoadOptions:
@@ -26,6 +45,32 @@ class LoadOptions:
         self.drop_derivation_type = False
         # For FK reasons we load the language data first, but a minority are ultimately used (at least until more data is specified)
         self.drop_unused_languages = True
+        # by default only languages referenced by resource files (and their macrolanguages) are loaded from the IANA registry
+        self.load_all_languages = False
+        # store the CJK and Tangut ideographs without data of their own as ranges, with code_point becoming a view (see ScriptDatabase._set_code_point_layout).
+        # Smaller, but filtering code_point by anything other than id or text is slower
+        self.compress_code_point_ranges = False
+        # script codes - None = all scripts. Code points and derivations of other scripts are only loaded where needed for the lineage
+        # of the included scripts' characters (ie. their ancestors, see ScriptDatabase._get_script_subset), so an excluded script
+        # may still be partially present. Alphabets are only loaded for the included scripts
+        self.include_scripts = None
+        self.exclude_scripts = None
+        # directory to write per load stage profiles to: cProfile stats (.pstats) and sampled stacks in the collapsed format of flamegraph tools (.collapsed)
+        self.profile_path = None
+        # continue a build that failed from the stage after its last completed one, if the files read by the completed stages are unchanged
+        # (and the options, other than output ones). Otherwise the build starts over. Fixed code is assumed to be in the remaining stages
+        self.resume = False
+        # directory to write SQL statement statistics to while loading, see ScriptDatabase.set_sql_tracing
+        self.sql_trace_path = None
+        self.slow_statement_time = 0.1  # seconds
+        # WITHOUT ROWID link tables and integer-coded script/category/bidi columns, with code_point a view joining the codes (see ScriptDatabase._compact_storage)
+        self.compact_storage = False
+        # keep the generated derivations replaced by manually specified ones, which ScriptDatabase.watch_resources restores when a manual one is removed
+        self.keep_overridden_derivations = False
+        # build a new version file of the database (eg. scripts.v3.db) instead of overwriting it, published when done by a manifest file
+        # which readers follow (ScriptDatabase reader mode). Versions older than the kept number before the new one are then removed
+        self.versioned = False
+        self.kept_versions = 2
 
 # effectively a tuple, but tuple too error-prone to specifying wrong values (order, expected values)
 class SourceInfo:
@@ -35,6 +80,32 @@ class SourceInfo:
         self.access_date = access_date
 
 
+# result of a batch lineage lookup, code points being represented as characters
+class Lineage:
+    def __init__(self, ancestors, derivations):
+        self.ancestors = ancestors  # for each requested character, the set of all its ancestors
+        self.derivations = derivations  # merged lineage DAG: character -> set of parent characters, for every character in the lineages
+
+
+# one derivation path between two code points, represented as characters
+class DerivationPath:
+    def __init__(self, characters, cost, steps):
+        self.characters = characters  # from the descendant to the ancestor
+        self.cost = cost  # summed certainty costs of the steps, lower being more credible
+        self.steps = steps  # for each derivation step, a dict with child, parent, certainty, process, multiplicity, notes and sources (SourceInfo list)
+
+
+# a derivation process, generating candidate derivations which are merged into the database on load
+class DerivationGenerator:
+    def __init__(self, generate, priority, inputs=(), fallback=False):
+        # function (database, cursor, *inputs) returning (child_id, parent_id, derivation_type_id, certainty_type_id, multiplicity) tuples.
+        # The cursor is read-only. A parent_id of None (other values None too) marks a child as having a parent which couldn't be resolved
+        self.generate = generate
+        self.priority = priority  # the higher priority of two derivations with the same child and parent is kept
+        self.inputs = inputs  # names of the letter data generated by the load: indic_supp_data, indic_letter_data, semitic_letter_data, and verify
+        self.fallback = fallback  # only derive children which no other generator derives
+
+
 class ScriptDatabase:
 
     INHERITED_SCRIPT = 'Zinh'
@@ -67,6 +138,49 @@ class ScriptDatabase:
     OPTIMIZED_DEBUG_LOAD.vacuum_db = True
 
     _GENERATED_DIR_NAME = 'generated'
+    # the load stages after which a build can be resumed (in order), with the resource files or directories they read (see LoadOptions.resume)
+    _STAGE_INPUTS = {
+        'basics': ['sources.csv', 'processes.csv', 'scripts.csv', 'script_variants.csv', 'standard_alphabets.csv', 'iana_lang_subtag.txt'],
+        'code_points': ['unicode-data/Scripts.txt', 'unicode-data/UnicodeData.txt', 'unicode-data/NameAliases.txt', 'unicode-data/PropList.txt',
+                        'graphical_exceptions.txt'],
+        'letters_private_use': ['wikipedia-sourced', os.path.join(_GENERATED_DIR_NAME, 'standard_alphabets.csv')],  # the latter written, for alphabets
+        'derivations': ['unicode-data/Unihan_Variants.txt', 'unicode-data/Unikemet.txt', 'position_distinction.csv', 'derivation_defaults.csv',
+                        'derivations'],
+        'alphabets': ['standard_alphabets.csv', 'unicase_languages.txt', 'unicode-data/cldr'],
+        'derived_tables': []
+    }
+    _STAGE_LISTED_INPUTS = {'basics': ['unicode-data/cldr']}  # only the file names matter (languages referenced)
+    # derivation generators by process name, see register_derivation_generator (the built-in ones are registered after the class)
+    _DERIVATION_GENERATORS = {}
+    _OUTPUT_OPTIONS = {'output_debug_info', 'resume', 'profile_path', 'sql_trace_path', 'slow_statement_time', 'versioned', 'kept_versions'}
+    # saved queries which should only ever search indexes, whatever the code point layout load options, checked after each load
+    _INDEXED_SAVED_QUERIES = {'Get Code Point Ancestors': (ord('A'), None), 'Get Code Point Descendants': (ord('A'), None), 'Get Script Descendants': ('Brah',),
+                              'Missing code points in sequence': (ord('A'),)}
+    # as well as these lookups of the API and typical queries ({named_table} being as for get_code_points_by_name)
+    _INDEXED_QUERIES = {'Code point by id': ("SELECT * FROM code_point WHERE id = ?", (ord('a'),)),
+                        'Code point by text': ("SELECT * FROM code_point WHERE text = ?", ('a',)),
+                        'Code point by name': ("SELECT id FROM {named_table} WHERE name = ? AND (raw_name IS NOT NULL OR alt_name IS NOT NULL)",
+                                               ('LATIN SMALL LETTER A',)),
+                        'Derivation parents': ("SELECT cp.* FROM code_point_derivation d INNER JOIN code_point cp ON cp.id = d.parent_id WHERE d.child_id = ?",
+                                               (ord('a'),))}
+    # path cost of a derivation step by certainty type id, unspecified and varied certainty counting as uncertain
+    _CERTAINTY_PATH_COSTS = {-1: 3, 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 3}
+    # certainty type ids from most to least certain, in the order of their path costs. Of those costing as uncertain, an uncertain derivation
+    # is the least certain, unspecified and varied certainty not saying that it's doubted
+    _CERTAINTY_ORDER = [1, 2, -1, 6, 3, 4, 5]
+    # UnicodeData ranges stored as code_point_range rows with the compress_code_point_ranges load option (by the start of their range name),
+    # and the prefix of their code point names
+    _RANGE_NAME_PREFIXES = {'CJK Ideograph': 'CJK UNIFIED IDEOGRAPH-', 'Tangut Ideograph': 'TANGUT IDEOGRAPH-'}
+    # columns of the loaded tables referencing code points, a range's code point getting a row of its own when referenced (generated tables such as
+    # code_point_ancestry only reference code points of these)
+    _RANGE_REFERENCES = {'code_point_derivation': ['child_id', 'parent_id'], 'overridden_derivation': ['child_id', 'parent_id']}
+    # link tables with composite primary keys, stored WITHOUT ROWID with the compact_storage load option
+    _COMPACT_LINK_TABLES = ['sequence_item', 'code_point_derivation', 'manual_derivation_source', 'alphabet_source', 'name_indexer', 'script_derivation',
+                            'overridden_derivation']
+    # code point columns stored as ids with the compact_storage load option: column -> (id column, lookup table, lookup id column)
+    _COMPACT_CODE_COLUMNS = {'script_code': ('script_id', 'script', 'iso_id'),
+                             'general_category_code': ('general_category_id', 'general_category', 'id'),
+                             'bidi_class_code': ('bidi_class_id', 'bidi_class', 'id')}
     _INDIC_ORDER = ['A', 'Ā', 'I', 'Ī', 'U', 'Ū', 'Ṛ', 'Ṝ', 'Ḷ', 'Ḹ', 'E', 'Ai', 'O', 'Au',
                     'Ka', 'Kha', 'Ga', 'Gha', 'Ṅa', 'Ca', 'Cha', 'Ja', 'Jha', 'Ña', 'Ṭa', 'Ṭha', 'Ḍa', 'Ḍha', 'Ṇa', 'Ta',
                     'Tha', 'Da', 'Dha', 'Na', 'Pa', 'Pha', 'Ba', 'Bha', 'Ma', 'Ya', 'Ra', 'La', 'Va', 'Śa', 'Ṣa', 'Sa','Ha']
@@ -107,24 +221,62 @@ class ScriptDatabase:
     _EXCLUDED_GEN_CODES = ['Brah', 'Khar', 'Hang', 'Kali', 'Cans', 'Gonm', 'Sora', 'Pauc', 'Gupt', 'Plav', 'Tang',
                            'Ranj', 'Asho', 'Kush', 'Toch', 'Grek', 'Latn', 'Cyrl', 'Arab', 'Phnx', 'Psin', 'Xsux', 'Thaa']
 
-    def __init__(self, path='.', name='scripts.db'):
+    # reader: read-only, on the published version of a versioned database (see LoadOptions.versioned) if there is one, swapping to a newly
+    # published version at the next query method call
+    def __init__(self, path='.', name='scripts.db', reader=False):
         self._db_name = name
         self._db_path = path
+        self._db_file_name = name  # of the version in use, if versioned
+        self._reader = reader
+        self._sql_tracer = None
+        self._connection = None  # see _cxn
         is_existing_db = os.path.isfile(os.path.join(self._db_path, self._db_name))
-        self._set_connection()
+        if reader:
+            self._manifest_modified_time = None
+            self._reader_call_depth = 0
+            self._check_published_version()
+            self._follow_published_versions()
         self._set_resource_paths()
         self._query_path = os.path.join(self._db_path, 'queries')
         self._next_sequence_id = ScriptDatabase.UNICODE_MAX
+        self._ancestor_index = None  # lazily read from code_point_ancestry
+        self._canonical_ids = None  # lazily read from code_point.canonical_id
+        self._script_subset = None  # of the database being loaded, see LoadOptions.include_scripts
+        self._code_point_table = 'code_point'  # the table code points are written to, see _set_code_point_layout
         if is_existing_db:
-            cursor = self._cxn.cursor()
-            self._next_sequence_id = cursor.execute("SELECT MAX(id) FROM sequence").fetchone()[0]
-            cursor.close()
-            if not self._next_sequence_id or self._next_sequence_id < ScriptDatabase.UNICODE_MAX:
-                self._next_sequence_id = ScriptDatabase.UNICODE_MAX
+            self._set_next_sequence_id()
+
+
+    def _set_next_sequence_id(self):
+        cursor = self._cxn.cursor()
+        self._next_sequence_id = cursor.execute("SELECT MAX(id) FROM sequence").fetchone()[0]
+        cursor.close()
+        if not self._next_sequence_id or self._next_sequence_id < ScriptDatabase.UNICODE_MAX:
+            self._next_sequence_id = ScriptDatabase.UNICODE_MAX
+
+
+    # opened on first use, as the database file isn't known before loading it as a version (see LoadOptions.versioned), and connecting
+    # would otherwise leave an empty file of the unversioned name
+    @property
+    def _cxn(self):
+        if self._connection is None:
+            self._set_connection()
+        return self._connection
 
 
     def _set_connection(self):
-        self._cxn = sqlite3.connect(os.path.join(self._db_path, self._db_name))
+        db_file_path = os.path.join(self._db_path, self._db_file_name)
+        if self._reader:
+            if not os.path.isfile(db_file_path):
+                raise ValueError("No database to read at " + db_file_path)
+            # a published version is never changed, so it's read without locking
+            uri_parameters = '?mode=ro&immutable=1' if self._db_file_name != self._db_name else '?mode=ro'
+            self._connection = sqlite3.connect(pathlib.Path(db_file_path).absolute().as_uri() + uri_parameters, uri=True, factory=ScriptDatabase._Connection)
+        else:
+            self._connection = sqlite3.connect(db_file_path, factory=ScriptDatabase._Connection)
+        if self._sql_tracer:
+            self._connection.tracer = self._sql_tracer
+            self._connection.set_trace_callback(self._sql_tracer.trace)
 
 
     def _set_resource_paths(self, resource_path=None):
@@ -133,6 +285,19 @@ class ScriptDatabase:
         self._wikipedia_path = os.path.join(self._resource_path, 'wikipedia-sourced')
         self._unicode_path = os.path.join(self._resource_path, 'unicode-data')
 
+
+    # rows of a UCD style data file, without comment lines
+    @staticmethod
+    def _parse_data_file(file, delimiter):
+        return list(csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter=delimiter))
+
+
+    # regex matches of a Wikipedia letter page
+    @staticmethod
+    def _parse_wiki_letter_page(file, pattern):
+        return re.findall(pattern, file.read())
+
+
     @staticmethod
     def _get_sql_in_str_list(enumerable):
         return "('" + "','".join([x.replace("'", "''") for x in enumerable]) + "')"
@@ -197,9 +362,12 @@ class ScriptDatabase:
             return self.execute_query(file.read(), parameters, return_headers)
 
 
-    def _setup_schema(self, cursor):
+    def _setup_schema(self, cursor, compress_code_point_ranges=False):
+        self._set_code_point_layout(cursor, False)  # the script sets up code_point as a table
         with open(self._get_unique_saved_query('Setup schema')) as file:
             cursor.executescript(file.read())
+        self._set_code_point_layout(cursor, compress_code_point_ranges)
+        cursor.connection.commit()  # as the script's changes are, so a failed load isn't left with a partly switched layout
 
 
     def _try_unzip_sources(self, zip_dir_path, output_debug=False):
@@ -285,12 +453,55 @@ class ScriptDatabase:
 
     def _load_deferred_script_fields(self, cursor, deferred_fields):
         cursor.executemany("UPDATE script SET main_parent_code = ?, main_lang_code = ? WHERE code = ?", deferred_fields)
+        self._load_script_tree_labels(cursor)
+
+
+    # Pre-order numbering of the script tree, so a script's descendants are a range (see script.preorder_num)
+    def _load_script_tree_labels(self, cursor):
+        children = {}
+        for code, parent_code in cursor.execute("SELECT code, main_parent_code FROM script ORDER BY code").fetchall():
+            children.setdefault(parent_code, []).append(code)
+
+        labels = []  # [code, preorder number of its last descendant] in pre-order
+        preorder_nums = {}
+        stack = [(code, False) for code in reversed(children.get(None, []))]
+        while stack:  # iterative depth first, a script being revisited once its subtree is numbered
+            code, is_subtree_done = stack.pop()
+            if is_subtree_done:
+                labels[preorder_nums[code]][1] = len(labels) - 1
+                continue
+            preorder_nums[code] = len(labels)
+            labels.append([code, None])
+            stack.append((code, True))
+            stack.extend((child, False) for child in reversed(children.get(code, [])))
 
+        if len(labels) != sum(len(x) for x in children.values()):
+            raise ValueError("Cycle in script main parents")
+        cursor.execute("UPDATE script SET preorder_num = NULL, subtree_end_num = NULL")
+        cursor.executemany("UPDATE script SET preorder_num = ?, subtree_end_num = ? WHERE code = ?", [(i, end, code) for i, (code, end) in enumerate(labels)])
 
-    def _load_languages(self, cursor):
-        with open(os.path.join(self._resource_path, 'iana_lang_subtag.txt'), 'r') as file:
+
+    def _get_referenced_language_codes(self):
+        # pre-scan of the files which reference languages, so that only those need loading from the (large) IANA registry
+        lang_codes = {'egy'}  # hard coded Egyptian core alphabet in _load_from_unikemet
+        with open(os.path.join(self._resource_path, 'scripts.csv'), 'r') as file:
+            for row in csv.DictReader(file):
+                if row['Common Lang']:
+                    lang_codes.add(row['Common Lang'])
+        with open(os.path.join(self._resource_path, 'standard_alphabets.csv'), 'r') as file:
+            for row in csv.DictReader(file):
+                if row['Language']:
+                    lang_codes.update(row['Language'].split('/'))
+        for file_name in os.listdir(os.path.join(self._unicode_path, 'cldr')):
+            if file_name != 'license.txt':
+                lang_codes.add(file_name.split('.')[0].split('_')[0])
+        return lang_codes
+
+
+    def _load_languages(self, cursor, load_all=False):
+        def parse_registry(file):
+            languages = {}  # code: (name, default script, macrolanguage)
             record = dict()
-            macrolanguages = []
             for line in file:
                 if line.startswith(" "):
                     continue  # hacky, just assuming that the fields we're interested in aren't the multi-line ones
@@ -302,11 +513,7 @@ class ScriptDatabase:
                         # Just correcting one language name "Modern Greek" I don't like in file, because that will probably cause unexpected ordering
                         # otherwise, we just remove parentheticals. In theory better language names might be sourced from the en CLDR which we alreayd
                         # have in the resources, but the IANA descriptions seem decent enough and we're already parsing it
-
-                        cursor.execute("INSERT INTO language (code, name, default_script_code) VALUES (?, ?, ?)",
-                            (record['Subtag'], lang_name, record['Suppress-Script'] if 'Suppress-Script' in record else None))
-                        if 'Macrolanguage' in record:
-                             macrolanguages.append((record['Macrolanguage'], record['Subtag']))
+                        languages[record['Subtag']] = (lang_name, record.get('Suppress-Script'), record.get('Macrolanguage'))
                     record = dict()
                 else:
                     parts = line.split(":")
@@ -320,8 +527,20 @@ class ScriptDatabase:
                         record[key].append(value)
                     else:
                         record[key] = value
+            return languages
+
+        with open(os.path.join(self._resource_path, 'iana_lang_subtag.txt'), 'r') as file:
+            languages = parse_registry(file)
 
-            cursor.executemany("UPDATE language SET macrolanguage_code = ? WHERE code = ?", macrolanguages)
+        if load_all:
+            lang_codes = set(languages)
+        else:
+            lang_codes = {code for code in self._get_referenced_language_codes() if code in languages}
+            lang_codes |= {languages[code][2] for code in lang_codes if languages[code][2] in languages}
+
+        # macrolanguages first so that the self-referencing FK is satisfied within the one batch
+        cursor.executemany("INSERT INTO language (code, name, default_script_code, macrolanguage_code) VALUES (?, ?, ?, ?)",
+                           sorted([(code,) + languages[code] for code in lang_codes], key=lambda lang: (lang[3] is not None, lang[0])))
 
 
     def _load_source(self, cursor, citation_key, author_str, title, url):
@@ -375,21 +594,25 @@ class ScriptDatabase:
         if script_code is None: script_code = 'Zzzz'
         if general_category_code is None: general_category_code = 'Cn'
         if bidi_class_code is None: bidi_class_code = 'L'
+        if self._script_subset is not None:
+            if script_code not in self._script_subset.scripts and id not in self._script_subset.lineage_code_points:
+                return
+            self._script_subset.code_points.add(id)
 
         is_graphical = is_graphical_exception != (general_category_code[0] not in ('C', 'Z'))
         is_alphabetic = general_category_code[0] == 'L' or general_category_code == 'Nl' or is_other_alphabetic
         cursor.execute("INSERT INTO sequence (id, type_id) VALUES (?, ?) ON CONFLICT DO NOTHING", (id, SequenceType.BASE.value))
         if self.is_private_use(id):
-            cursor.execute("""
-                INSERT INTO code_point (id, raw_name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_independently_graphical)
+            cursor.execute(f"""
+                INSERT INTO {self._code_point_table} (id, raw_name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_independently_graphical)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT DO 
                 UPDATE SET raw_name = ?, script_code = ?, general_category_code = ?, bidi_class_code = ?, is_alphabetic = ?, is_independently_graphical = ?""",
                 (id, name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_graphical,
                      name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_graphical))
         else:
-            cursor.execute("""
-                INSERT INTO code_point (id, raw_name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_independently_graphical)
+            cursor.execute(f"""
+                INSERT INTO {self._code_point_table} (id, raw_name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_independently_graphical)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT DO NOTHING""",
                 (id, name, script_code, general_category_code, bidi_class_code, is_alphabetic, is_graphical))
@@ -398,6 +621,15 @@ class ScriptDatabase:
         if name:
             self._insert_name_indexer(cursor, id, name)
 
+
+    # the code points of a range only get their base sequence, see _set_code_point_layout
+    def _insert_code_point_range(self, cursor, ids, name_prefix, script_code):
+        cursor.execute("INSERT INTO code_point_range (start_id, end_id, name_prefix, script_code) VALUES (?, ?, ?, ?)",
+                       (ids.start, ids.stop - 1, name_prefix, script_code))
+        cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?) ON CONFLICT DO NOTHING", [(id, SequenceType.BASE.value) for id in ids])
+        if self._script_subset is not None:
+            self._script_subset.code_points.update(ids)
+
     @staticmethod
     def _unicode_range(range_str):
         parts = range_str.split('..')
@@ -415,20 +647,42 @@ class ScriptDatabase:
         cursor.execute("DELETE FROM alphabet_source")
         cursor.execute("DELETE FROM alphabet")
         cursor.execute("DELETE FROM sequence WHERE id > ?", (ScriptDatabase.UNICODE_MAX,))
+        cursor.execute("DELETE FROM code_point_range")
 
         self._insert_code_point(cursor, ord(self.NO_PARENT_CHARACTER), name='NO PARENT CHARACTER', bidi_class_code='Bn', script_code=None, general_category_code=None)
 
+        name_ranges = []  # (start, end, name prefix)
+        if self._code_point_table != 'code_point':
+            with open(os.path.join(self._unicode_path, 'UnicodeData.txt'), 'r') as file:
+                for row in self._parse_data_file(file, ';'):
+                    if row[1].endswith(', First>'):
+                        range_start = int(row[0], 16)
+                        name_prefix = next((v for k, v in self._RANGE_NAME_PREFIXES.items() if row[1][1:].startswith(k)), None)
+                    elif row[1].endswith(', Last>') and name_prefix:
+                        name_ranges.append((range_start, int(row[0], 16), name_prefix))
+
         with open(os.path.join(self._unicode_path, 'Scripts.txt'), 'r') as file:
-            for row in csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter=';'):
+            for row in self._parse_data_file(file, ';'):
                 script_name = row[1].split('#')[0].strip()
                 script_code = cursor.execute("SELECT code FROM script WHERE u_alias = ?", (script_name,)).fetchone()[0]
-                for i in self._unicode_range(row[0]):
-                    self._insert_code_point(cursor, i, name=None, script_code=script_code, bidi_class_code=None, general_category_code=None)
+                ids = self._unicode_range(row[0])
+                range_ids = set()
+                if self._script_subset is None or script_code in self._script_subset.scripts:  # otherwise only some are loaded
+                    for start, end, name_prefix in name_ranges:
+                        overlap = range(max(ids.start, start), min(ids.stop, end + 1))
+                        if overlap:
+                            self._insert_code_point_range(cursor, overlap, name_prefix, script_code)
+                            range_ids.update(overlap)
+                for i in ids:
+                    if i not in range_ids:
+                        self._insert_code_point(cursor, i, name=None, script_code=script_code, bidi_class_code=None, general_category_code=None)
 
 
     def _load_code_point_data_main(self, cursor):
         # can't reliably call this outside the outer function (derived props), so insulating it here
         def update_code_point(cursor, id, name, general_category, bidi_class, upper_mapping, lower_mapping, decom_str):
+            if not self._is_loaded_code_point(id):
+                return  # outside the script subset
             decom_pattern = re.compile(r'^(?:<([a-zA-Z]+)> )?([\s0-9A-F]+)$')
             decom_type = None
             decom_ids = []
@@ -450,8 +704,8 @@ class ScriptDatabase:
                 for i, decom_id in enumerate(decom_ids):
                     cursor.execute("INSERT INTO sequence_item (sequence_id, item_id, order_num) VALUES (?, ?, ?)", (seq_id, decom_id, i + 1))
 
-            cursor.execute("""
-                UPDATE code_point
+            cursor.execute(f"""
+                UPDATE {self._code_point_table}
                 SET 
                     raw_name = ?,
                     general_category_code = ?,
@@ -492,10 +746,39 @@ class ScriptDatabase:
             special_name_pattern = re.compile('^<(.+)>$')
             in_range = False
 
-            for line in csv.reader(csvfile, delimiter=';'):
+            for line in self._parse_data_file(csvfile, ';'):
 
                 if in_range:
-                    for i in range(code_point, int(line[0], 16) + 1):
+                    range_end = int(line[0], 16)
+                    if not (S_BASE <= code_point < S_END):
+                        # outside of Hangul, ranges have no per-code-point data (names derived from the id), so set the whole range at once
+                        is_alphabetic = general_category[0] == 'L' or general_category == 'Nl'
+                        is_graphical = general_category[0] not in ('C', 'Z')
+                        cursor.execute("""
+                            UPDATE code_point_range
+                            SET general_category_code = ?, bidi_class_code = ?, is_alphabetic = ?, is_independently_graphical = ?
+                            WHERE start_id BETWEEN ? AND ?""",
+                            (general_category, bidi_class, is_alphabetic, is_graphical, code_point, range_end))
+                        cursor.execute(f"""
+                            UPDATE {self._code_point_table}
+                            SET 
+                                raw_name = NULL,
+                                general_category_code = ?,
+                                bidi_class_code = ?,
+                                simple_uppercase_mapping_id = NULL,
+                                simple_lowercase_mapping_id = NULL,
+                                equivalent_sequence_id = NULL,
+                                is_alphabetic = ?,
+                                is_independently_graphical = ?
+                            WHERE id BETWEEN ? AND ?""",
+                            (general_category, bidi_class, is_alphabetic, is_graphical, code_point, range_end))
+                        cursor.execute("DELETE FROM name_indexer WHERE code_point_id BETWEEN ? AND ?", (code_point, range_end))
+                        in_range = False
+                        continue
+
+                    for i in range(code_point, range_end + 1):
+                        if not self._is_loaded_code_point(i):
+                            continue
                         if S_BASE <= i < S_END:  # follow along Hangul decomposition algorithm Unicode Standard 3.12.2
                             s_index = i - S_BASE
                             if (i % 28) == (S_BASE % 28): # LV syllable
@@ -545,13 +828,13 @@ class ScriptDatabase:
 
     def _load_code_point_data_exceptions(self, cursor):
         with open(os.path.join(self._unicode_path, 'NameAliases.txt'), 'r') as file:
-            for row in csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter = ';'):
+            for row in self._parse_data_file(file, ';'):
                 if row[2].strip() in ['correction', 'figment', 'control']:
                     cursor.execute("UPDATE code_point SET alt_name = CONCAT(alt_name, ' / ', ?) WHERE id = ? AND alt_name IS NOT NULL", (row[1], int(row[0], 16)))
                     cursor.execute("UPDATE code_point SET alt_name = ? WHERE id = ? AND alt_name IS NULL", (row[1], int(row[0], 16)))
 
         with open(os.path.join(self._unicode_path, 'PropList.txt'), 'r') as file:
-            for row in csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter = ';'):
+            for row in self._parse_data_file(file, ';'):
                 property = row[1].split('#')[0].strip()
                 if property == 'Other_Alphabetic':
                     for i in self._unicode_range(row[0]):
@@ -727,25 +1010,20 @@ class ScriptDatabase:
         self._load_table_sources(cursor, sources, 'manual_derivation', ['child_id', 'parent_id'], [child_id, parent_id])
 
 
-    # TODO - undecided if processes will ever specify separate notes to separate derivations
-    def _load_single_derivation(self, cursor, child_id, parent_id, derivation_type, certainty_type, process_type_id, multiplicity=1):
-        cursor.execute("""
-            INSERT INTO code_point_derivation (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id, multiplicity) 
-            VALUES (?,?,?,?,?,?)""",        (child_id, parent_id, derivation_type.value, certainty_type.value, process_type_id, multiplicity))
-
-
-    def _load_arabic_derivations(self, cursor, verify):
-        process_id = self._get_process_id(cursor, 'Arabic Unicode name')
+    def _get_arabic_derivations(self, cursor, verify):
         arabic_map = {'ALEF': 1575, 'BEH': 1576, 'TEH': 1578, 'JEEM': 1580, 'HAH': 1581, 'DAL': 1583, 'REH': 1585, 'ZAIN': 1586,
                       'SEEN': 1587, 'SHEEN': 1588, 'SAD': 1589, 'DAD': 1590, 'TAH': 1591, 'AIN': 1593, 'GHAIN': 1594, 'FEH': 1601,
                       'QAF': 1602, 'KAF': 1603, 'LAM': 1604, 'MEEM': 1605, 'NOON': 1606, 'HEH': 1607, 'WAW': 1608, 'YEH': 1610, 'FATHA': 1614, 'KASRA': 1616,
                       'TTEH': 1657, 'PEH': 1662, 'TCHEH': 1670, 'KEHEH': 1705, 'GAF': 1711, 'FARSI YEH': 1740, 'YEH BARREE': 1746, 'AFRICAN QAF': 2236,
                       'EXTENDED ARABIC-INDIC DIGIT TWO': 1778, 'EXTENDED ARABIC-INDIC DIGIT THREE': 1779, 'EXTENDED ARABIC-INDIC DIGIT FOUR': 1780}
-        arabic_note_text = "Based on Unicode name"
+        derivations = []
 
-        def try_arabic_text_load_deriv(cursor, child_id, search_name, text):
+        def add_derivation(child_id, parent_id, multiplicity=1):
+            derivations.append((child_id, parent_id, DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, multiplicity))
+
+        def try_arabic_text_add_deriv(child_id, search_name, text):
             if " " + search_name in text:
-                self._load_single_derivation(cursor, child_id, arabic_map[search_name], DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
+                add_derivation(child_id, arabic_map[search_name])
                 return True
             return False
 
@@ -759,32 +1037,30 @@ class ScriptDatabase:
             match = arabic_pattern.match(arabic_letter[1])
             if match:
                 child_id = int(arabic_letter[0])
-                self._load_single_derivation(cursor, child_id, arabic_map[match.group(1)], DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
-
                 with_text = match.group(2)
+                # in theory this kind of clause should also apply to the others, but the data doesn't have it so don't want to overcomplicate
+                doubled_teh = match.group(1) == "TEH" and "TEH" in with_text
+                add_derivation(child_id, arabic_map[match.group(1)], 2 if doubled_teh else 1)
+
                 found_other = False
                 if "HAMZA" in with_text:
                     found_other = True
                     if "WAVY" in with_text:
                         # This ID is for wavy hamza below - there doesn't appear to be an above or standalone
-                        self._load_single_derivation(cursor, child_id, 1631, DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
+                        add_derivation(child_id, 1631)
                     else:
-                        hamza_id = 1621 if "HAMZA BELOW" in with_text else 1620
-                        self._load_single_derivation(cursor, child_id, hamza_id, DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
-
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "KASRA", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "FATHA", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "MEEM", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "NOON", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "TAH", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "EXTENDED ARABIC-INDIC DIGIT TWO", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "EXTENDED ARABIC-INDIC DIGIT THREE", with_text) or found_other
-                found_other = try_arabic_text_load_deriv(cursor, child_id, "EXTENDED ARABIC-INDIC DIGIT FOUR", with_text) or found_other
-                # in theory this kind of clause should also apply to the others, but the data doesn't have it so don't want to overcomplicate
-                if match.group(1) == "TEH" and "TEH" in with_text:
-                    cursor.execute("UPDATE code_point_derivation SET multiplicity = ? WHERE child_id = ? AND parent_id = ?", (2, child_id, arabic_map["TEH"]))
-                else:
-                    found_other = try_arabic_text_load_deriv(cursor, child_id, "TEH", with_text) or found_other
+                        add_derivation(child_id, 1621 if "HAMZA BELOW" in with_text else 1620)
+
+                found_other = try_arabic_text_add_deriv(child_id, "KASRA", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "FATHA", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "MEEM", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "NOON", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "TAH", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "EXTENDED ARABIC-INDIC DIGIT TWO", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "EXTENDED ARABIC-INDIC DIGIT THREE", with_text) or found_other
+                found_other = try_arabic_text_add_deriv(child_id, "EXTENDED ARABIC-INDIC DIGIT FOUR", with_text) or found_other
+                if not doubled_teh:
+                    found_other = try_arabic_text_add_deriv(child_id, "TEH", with_text) or found_other
 
                 if "DOT" in with_text or "STROKE" in with_text or "BAR" in with_text or "RING" in with_text:
                     # TODO skip these for now, but maybe some could be derived from diacritics?
@@ -795,10 +1071,10 @@ class ScriptDatabase:
 
                 if not found_other and verify:
                     print("Did not fully derive Arabic letter: " + arabic_letter[1])
+        return derivations
 
 
-    def _load_geez_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, "Ge'ez Unicode name")
+    def _get_geez_derivations(self, cursor):
         base_pattern = re.compile('^(ETHIOPIC SYLLABLE (?:[A-Z]+ )?[^ AEIOU]*)([AEIOU]+)$')
         ethiopic = cursor.execute("SELECT id, raw_name FROM code_point WHERE script_code = 'Ethi' AND raw_name LIKE 'ETHIOPIC SYLLABLE%'").fetchall()
         base_ethiopic_names = {}
@@ -806,27 +1082,27 @@ class ScriptDatabase:
             match = base_pattern.match(x[1])
             if match.group(2) == 'A':
                 base_ethiopic_names[match.group(1)] = x[0]
+        derivations = []
         for x in ethiopic:
             match = base_pattern.match(x[1])
             if match.group(2) != 'A' and match.group(1) in base_ethiopic_names:
-                self._load_single_derivation(cursor, x[0], base_ethiopic_names[match.group(1)], DerivationType.DEFAULT, Certainty.NEAR_CERTAIN, process_id)
+                derivations.append((x[0], base_ethiopic_names[match.group(1)], DerivationType.DEFAULT.value, Certainty.NEAR_CERTAIN.value, 1))
+        return derivations
 
 
-    def _load_sogdian_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, 'Sogdian Unicode name')
+    def _get_sogdian_derivations(self, cursor):
         # This ones ~20 characters, should just manually specify at some point
-        cursor.execute("""
-            INSERT INTO code_point_derivation (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id)
-            SELECT newsog.id, oldsog.id, ?, ?, ?
+        named_table = self._code_point_table  # as the names are indexed on it (see idx_cp_name), rather than on the view of compressed ranges
+        return cursor.execute(f"""
+            SELECT newsog.id, oldsog.id, ?, ?, 1
             FROM 
-                code_point newsog 
-                INNER JOIN code_point oldsog ON newsog.raw_name = substr(oldsog.raw_name, 5)
+                {named_table} newsog 
+                INNER JOIN {named_table} oldsog ON newsog.raw_name = substr(oldsog.raw_name, 5)
                 WHERE newsog.script_code = 'Sogd' AND oldsog.script_code = 'Sogo'""",
-            (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, process_id))
+            (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value)).fetchall()
 
 
-    def _load_latin_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, 'Latin Unicode name')
+    def _get_latin_derivations(self, cursor):
         latin_pattern = re.compile(r'([A-Z]{2,} )?([A-Z])( [A-Z]{2,}[ A-Z]*)?')
         capitals = cursor.execute("""
                     SELECT id, substr(raw_name, 22) FROM code_point 
@@ -835,10 +1111,11 @@ class ScriptDatabase:
                         AND general_category_code = 'Lu' 
                         AND raw_name LIKE 'LATIN CAPITAL LETTER%'
                         AND equivalent_sequence_id IS NULL""").fetchall()
+        derivations = []
         for capital in capitals:
             match = latin_pattern.match(capital[1])
             if match and (match.group(1) or match.group(3)):  # needs to match one of these groups or it's the base letter itself
-                self._load_single_derivation(cursor, capital[0], ord(match.group(2)), DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
+                derivations.append((capital[0], ord(match.group(2)), DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, 1))
 
         lowercases = cursor.execute("""
                     SELECT id, substr(name, 20) FROM code_point 
@@ -851,39 +1128,44 @@ class ScriptDatabase:
         for lowercase in lowercases:
             match = latin_pattern.match(lowercase[1])
             if match and (match.group(1) or match.group(3)):  # needs to match one of these groups or it's the base letter itself
-                self._load_single_derivation(cursor, lowercase[0], ord(match.group(2).lower()), DerivationType.DEFAULT, Certainty.STRONG_ASSUMPTION, process_id)
+                derivations.append((lowercase[0], ord(match.group(2).lower()), DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, 1))
+        return derivations
 
 
     def _load_equivalents_from_names(self, cursor):
+        named_table = self._code_point_table  # as the names are indexed on it (see idx_cp_name), rather than on the view of compressed ranges
         # a few graphical equivalents
-        equivalent_ids = cursor.execute("""
+        equivalent_ids = cursor.execute(f"""
                     SELECT sym.id, mark.id AS equivalent_id 
-                    FROM code_point sym INNER JOIN code_point mark ON substr(mark.name, 11) = sym.name
+                    FROM {named_table} sym INNER JOIN {named_table} mark ON substr(mark.name, 11) = sym.name
                     WHERE
                         mark.general_category_code = 'Mn' 
                         AND sym.general_category_code LIKE 'S_' 
+                        AND (sym.raw_name IS NOT NULL OR sym.alt_name IS NOT NULL)  -- idx_cp_name
                         AND mark.raw_name LIKE 'COMBINING%'
                         AND sym.equivalent_sequence_id IS NULL
                     """).fetchall()
         # most of the rest seem to be combining letters / digits where that would be the canonical character
-        equivalent_ids.extend(cursor.execute("""
+        equivalent_ids.extend(cursor.execute(f"""
                     SELECT mark.id, other.id AS equivalent_id 
-                    FROM code_point other INNER JOIN code_point mark ON substr(mark.name, 11) = other.name
+                    FROM {named_table} other INNER JOIN {named_table} mark ON substr(mark.name, 11) = other.name
                     WHERE
                         mark.general_category_code = 'Mn' 
                         AND other.general_category_code NOT LIKE 'S_' 
+                        AND (other.raw_name IS NOT NULL OR other.alt_name IS NOT NULL)  -- idx_cp_name
                         AND mark.raw_name LIKE 'COMBINING%'
                         AND mark.equivalent_sequence_id IS NULL
                     """).fetchall())
         # Hangul final->initial positional distinction
-        equivalent_ids.extend(cursor.execute("""
+        equivalent_ids.extend(cursor.execute(f"""
                     SELECT finals.id, initials.id AS equivalent_id
-                    FROM code_point finals INNER JOIN code_point initials ON substr(finals.name, 18) = substr(initials.name, 17)
+                    FROM {named_table} finals INNER JOIN {named_table} initials ON initials.name = 'HANGUL CHOSEONG ' || substr(finals.name, 18)
                     WHERE 
                         finals.script_code = 'Hang'
                         AND initials.script_code = 'Hang'
                         AND finals.raw_name LIKE 'HANGUL JONGSEONG%'
                         AND initials.raw_name LIKE 'HANGUL CHOSEONG%'
+                        AND (initials.raw_name IS NOT NULL OR initials.alt_name IS NOT NULL)  -- idx_cp_name
                         AND finals.equivalent_sequence_id IS NULL
                     """).fetchall())
         # modifier letters which are different from combining characters... (Unicode Standard 7.8)
@@ -893,59 +1175,32 @@ class ScriptDatabase:
             self._load_equivalent_unit_sequence(cursor, SequenceType.POSITION_DISTINCTION, equivalency[1], equivalency[0])
 
 
-    def _load_data_from_names(self, cursor, verify=False):
-        self._load_equivalents_from_names(cursor)
-
-        # add derivations based on name
-        # may later name as *_from_name if necessary to distinguish from other automatic processes
-        # a lot of these will use the strong assumption certainty due to the names implying straightforward glyph relationships
-        self._load_geez_derivations(cursor)
-        self._load_sogdian_derivations(cursor)
-        self._load_latin_derivations(cursor)
-        self._load_arabic_derivations(cursor, verify)
-        self._load_cuneiform_derivations(cursor)
-
-        # set of ids to exclude from the independent derivations
-        exception_ids = set()
-        # Anatolian hieroglyphs tag format is mostly A[0-9]{3}[A-Z]?, so checking for longer than 4 for what turns out to likely be script-internal variants
-        cursor.execute("""
-            SELECT id FROM code_point cp INNER JOIN name_indexer ni ON cp.id = ni.code_point_id 
-            WHERE cp.script_code = ? AND order_num = ? AND LENGTH(word) > ?""", ('Hluw', 3, 4))
-        for id in cursor:
-            exception_ids.add(id[0])
-        return exception_ids
-
-
-    def _load_independent_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, 'Independent scripts - general')
-
+    def _get_independent_derivations(self, cursor):
         # Mende Kikakui is a bit of an exception here: Unicode Encoding Proposal suggests Vai-derived characters are a small minority
         # Not including Chinese here: ideally will eventually do so for Oracle bone. Similar for modern Yi vs classical Yi
         results = cursor.execute("SELECT code FROM script WHERE main_parent_code = ?", (self.UNKNOWN_SCRIPT,)).fetchall()
         independent_scripts = [x[0] for x in results if x[0] not in self._EXCLUDED_GEN_CODES]
 
-        cursor.execute(f"""
-            INSERT INTO code_point_derivation (child_id, parent_id, certainty_type_id, process_type_id)
-            SELECT id, ?, ?, ?
+        # Anatolian hieroglyphs tag format is mostly A[0-9]{3}[A-Z]?, so checking for longer than 4 for what turns out to likely be script-internal variants
+        return cursor.execute(f"""
+            SELECT id, ?, ?, ?, 1
             FROM code_point 
             WHERE 
                 script_code IN {self._get_sql_in_str_list(independent_scripts)}
-                AND id NOT IN (SELECT child_id FROM code_point_derivation)""",
-               (ord(self.NO_PARENT_CHARACTER), Certainty.WEAK_ASSUMPTION.value, process_id))
+                AND id NOT IN (
+                    SELECT id FROM code_point cp INNER JOIN name_indexer ni ON cp.id = ni.code_point_id 
+                    WHERE cp.script_code = ? AND order_num = ? AND LENGTH(word) > ?)""",
+            (ord(self.NO_PARENT_CHARACTER), DerivationType.DEFAULT.value, Certainty.WEAK_ASSUMPTION.value, 'Hluw', 3, 4)).fetchall()
 
 
-    def _load_from_unikemet(self, cursor, verify):
-        process_id = self._get_process_id(cursor, 'Compound Egyptian Hieroglyphs')
-        code_dict = dict()
-        code_parents = dict()
-        code_pattern = '(?:HJ )?[A-Z][A-Za-z]?[0-9]{1,3}[A-Z]?|US[0-9][0-9A-Z]{4}[A-Z]+'  # not entirely sure where the US format codes come from; empirical format matching
-        code_regex = re.compile(code_pattern)
-        alph_id = self._create_sequence(cursor, SequenceType.SIMPLE_ALPHABET)
+    def _load_from_unikemet(self, cursor):
+        alph_id = self._create_sequence(cursor, SequenceType.SIMPLE_ALPHABET) if self._is_kept_script('Egyp') else None
         alph_order = 1
-        conflict_codes = set()
         with open(os.path.join(self._unicode_path, 'Unikemet.txt'), 'r') as file:
-            for row in csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter = '\t'):
+            for row in self._parse_data_file(file, '\t'):
                 id = int(row[0][2:], 16)  # the [2:] slices off the U+
+                if not self._is_loaded_code_point(id):
+                    continue  # outside the script subset
                 if row[1] == 'kEH_AltSeq':
                     seq_id = self._create_sequence(cursor, SequenceType.HIEROGLYPHIC_ALTERNATIVE)
                     child_id = id
@@ -956,11 +1211,25 @@ class ScriptDatabase:
                             offset -= 1  # out of caution, but this seems to be an end-of-line issue
                         else:
                             cursor.execute("INSERT INTO sequence_item (sequence_id, item_id, order_num) VALUES (?, ?, ?)", (seq_id, int(code_point, 16), i + offset))
-                elif row[1] == 'kEH_Core':
+                elif row[1] == 'kEH_Core' and alph_id:
                     if row[2].strip() == 'C':  # core
                         cursor.execute("INSERT INTO sequence_item (sequence_id, item_id, order_num) VALUES (?,?,?)", (alph_id, id, alph_order))
                         alph_order += 1
-                elif row[1] in ('kEH_JSesh', 'kEH_UniK', 'kEH_HG'): # various identifier codes
+
+        if alph_id:
+            self._insert_alphabet(cursor, alph_id, 'egy', 'Egyp', 'Lo', AlphabetType.EXTENDED, SourceInfo('UCD', 'Unikemet.txt kEH_Core property'))
+
+
+    def _get_hieroglyph_derivations(self, cursor, verify):
+        code_dict = dict()
+        code_parents = dict()
+        code_pattern = '(?:HJ )?[A-Z][A-Za-z]?[0-9]{1,3}[A-Z]?|US[0-9][0-9A-Z]{4}[A-Z]+'  # not entirely sure where the US format codes come from; empirical format matching
+        code_regex = re.compile(code_pattern)
+        conflict_codes = set()
+        with open(os.path.join(self._unicode_path, 'Unikemet.txt'), 'r') as file:
+            for row in self._parse_data_file(file, '\t'):
+                id = int(row[0][2:], 16)  # the [2:] slices off the U+
+                if row[1] in ('kEH_JSesh', 'kEH_UniK', 'kEH_HG'): # various identifier codes
                     code = row[2]
                     if verify and not code_regex.match(code):
                         print('Unexpected format for Egyptian hieroglyph code: ' + code)
@@ -968,7 +1237,7 @@ class ScriptDatabase:
                         conflict_codes.add(code)
                         if verify:
                             print(f'Egyptian hieroglyph code conflict: {code} maps to int ids {id} and {code_dict[code]}')
-                    code_dict[code] = int(row[0][2:], 16)
+                    code_dict[code] = id
                 elif row[1] == 'kEH_Desc':
                     parent_codes = re.findall(code_pattern, row[2])
                     if parent_codes:
@@ -978,55 +1247,61 @@ class ScriptDatabase:
                             print(f'Parent of potential multiple multiplicity for hieroglyph int id: {id}')
                         code_parents[id] = unique_parent_codes
 
-        self._insert_alphabet(cursor, alph_id, 'egy', 'Egyp', 'Lo', AlphabetType.EXTENDED, SourceInfo('UCD', 'Unikemet.txt kEH_Core property'))
-
         for code in conflict_codes:
             del code_dict[code]
 
-        # mark ids where there was a parent, but we just weren't able to find them (very sad)
-        orphaned_ids = set()
+        derivations = []
         for id in code_parents:
             for parent in code_parents[id]:
                 if parent in code_dict:
-                    self._load_single_derivation(cursor, id, code_dict[parent], DerivationType.DEFAULT, Certainty.LIKELY, process_id)
+                    derivations.append((id, code_dict[parent], DerivationType.DEFAULT.value, Certainty.LIKELY.value, 1))
                     # likely certainty due to that chain thing: We're at least correctly getting the base hieroglyph
                 else:
-                    orphaned_ids.add(id)
+                    # mark ids where there was a parent, but we just weren't able to find them (very sad)
+                    derivations.append((id, None, None, None, None))
                     if verify and parent not in conflict_codes: # no need to double error a code
                         print(f"Unknown referenced code {parent} on int id {id}")
-
-        return orphaned_ids
+        return derivations
 
 
-    def _load_from_unihan(self, cursor):
-        process_id = self._get_process_id(cursor, 'Simplified Chinese')
+    def _get_simplified_chinese_derivations(self, cursor):
+        derivations = []
         with open(os.path.join(self._unicode_path, 'Unihan_Variants.txt'), 'r') as file:
-            for row in csv.reader(filter(lambda r: not r.isspace() and not r.startswith('#'), file), delimiter = '\t'):
-
+            for row in self._parse_data_file(file, '\t'):
                 if row[1] == 'kTraditionalVariant':  # mirror property is kSimplifiedVariant - should only need to check one
                     for parent_code in row[2].strip().split(' '):
                         if row[0] != parent_code:  # it's possible for a simplified character to map to itself
-                            self._load_single_derivation(cursor, int(row[0][2:], 16), int(parent_code[2:], 16),
-                                                         DerivationType.SIMPLIFICATION, Certainty.VARIED, # tentative certainty, I'm not expert enough to evaluate this
-                                                         process_id)
+                            derivations.append((int(row[0][2:], 16), int(parent_code[2:], 16), DerivationType.SIMPLIFICATION.value,
+                                                Certainty.VARIED.value, 1))  # tentative certainty, I'm not expert enough to evaluate this
+        return derivations
+
 
+    def _load_z_variants(self, cursor):
+        with open(os.path.join(self._unicode_path, 'Unihan_Variants.txt'), 'r') as file:
+            for row in self._parse_data_file(file, '\t'):
                 # This is a self-mirror property. if X zVariant Y then Y zVariant X.
                 # There's no real indication which should be canonical that I can find, so I'm arbitrarily making it the lowest code point
-                elif row[1] == 'kZVariant':
+                if row[1] == 'kZVariant':
                     principal_id = int(row[0][2:], 16)
                     for parts in row[2].strip().split(' '):
                         other_id = int(parts[2:].split('<')[0], 16)
-                        if principal_id > other_id:  #TODO i definitely mixed up the naming here, but this one makes my brain hurt trying to fix it
+                        if principal_id > other_id and self._is_loaded_code_point(principal_id):  #TODO i definitely mixed up the naming here, but this one makes my brain hurt trying to fix it
                             self._load_equivalent_unit_sequence(cursor, SequenceType.Z_VARIANT, other_id, principal_id)
 
 
-    def _load_derivations_from_equivalencies(self, cursor):
-        position_process_id = self._get_process_id(cursor, "Equivalencies from name")
+    def _get_decomposition_derivations(self, cursor):
+        return self._get_equivalency_derivations(cursor, False)
+
+
+    def _get_position_equivalency_derivations(self, cursor):
+        return self._get_equivalency_derivations(cursor, True)
 
-        # add derivations from equivalent sequences, assuming the equivalent characters are the base building blocks (the parent)
+
+    def _get_equivalency_derivations(self, cursor, position_distinction):
+        # derivations from equivalent sequences, assuming the equivalent characters are the base building blocks (the parent)
         # Formatting/control/space characters are not eligible (they aren't graphical, right? ... right???)
-        cursor.execute(f"""
-            INSERT INTO code_point_derivation (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id)
+        # Duplicates are expected when a character decomposes into multiple copies of a code point (identical, so merged as one)
+        return cursor.execute(f"""
             SELECT
                 cp1.id,
                 cp2.id,
@@ -1044,9 +1319,7 @@ class ScriptDatabase:
                 CASE WHEN seq.type_id = {SequenceType.POSITION_DISTINCTION.value} THEN {Certainty.STRONG_ASSUMPTION.value}
                      ELSE {Certainty.NEAR_CERTAIN.value}
                 END,
-                CASE WHEN seq.type_id = {SequenceType.POSITION_DISTINCTION.value} THEN {position_process_id}
-                     ELSE {self.DECOMPOSITION_PROCESS_ID}
-                END
+                1
             FROM
                 sequence_item equiv
                 INNER JOIN sequence seq ON seq.id = equiv.sequence_id
@@ -1054,49 +1327,40 @@ class ScriptDatabase:
                 INNER JOIN code_point cp2 ON cp2.id = equiv.item_id
             WHERE
                 seq.type_id >= 100
+                AND (seq.type_id = {SequenceType.POSITION_DISTINCTION.value}) = ?
                 AND cp1.is_independently_graphical
-                AND cp2.is_independently_graphical
-            ON CONFLICT DO NOTHING""")
+                AND cp2.is_independently_graphical""", (position_distinction,)).fetchall()
         # seq.type_id >= 100 is a bit hacky for now, I've basically put the equivalency sequence types at IDs 100+
         # A more "proper" solution would be to have a category associated to a sequence_type, but that feels like over-engineering for the moment
-        # conflicts are expected when a character decomposes into multiple copies of a code point,
-        # minimal enough that ON CONFLICT DO NOTHING is probably the better query option than advance filtering
-        # About 10 conflicts are characters simultaneously being Z-variants and trad/simp derivations
 
+
+    def _load_position_distinctions(self, cursor):
         # manual equivalency
         # TODO - add verification for not overriding decomposition and maybe other manuals overriding this
         with open(os.path.join(self._resource_path, 'position_distinction.csv')) as csvfile:
             for row in csv.DictReader(csvfile):
+                if not self._is_loaded_code_point(ord(row["Char"])):
+                    continue  # outside the script subset
                 self._load_equivalent_unit_sequence(cursor, SequenceType.POSITION_DISTINCTION, ord(row["Equiv"]), ord(row["Char"]))
                 self._load_single_manual_derivation(cursor, ord(row["Char"]), ord(row["Equiv"]),
                                                     DerivationType.TRANSLATION, Certainty.STRONG_ASSUMPTION, None, "Based in part on Unicode name")
 
 
-    def _load_derivations_from_case_data(self, cursor, drop_case_columns=False):
-        process_id = self._get_process_id(cursor, 'Case derivation')
-        # add derivations from case mapping, assuming lowercase to be derived from uppercase
-        cursor.execute("""
-            INSERT INTO code_point_derivation (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id)
-            SELECT id, simple_uppercase_mapping_id, ?, ?, ?
+    def _get_case_derivations(self, cursor):
+        # derivations from case mapping, assuming lowercase to be derived from uppercase
+        derivations = cursor.execute("""
+            SELECT id, simple_uppercase_mapping_id, ?, ?, 1
             FROM code_point
             WHERE simple_uppercase_mapping_id IS NOT NULL""",
-               (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, process_id))
+               (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value)).fetchall()
 
         # casing isn't 100% 1:1 so need to do mappings in both directions
-        cursor.execute("""
-            INSERT INTO code_point_derivation (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id)
-            SELECT simple_lowercase_mapping_id, id, ?, ?, ?
+        derivations.extend(cursor.execute("""
+            SELECT simple_lowercase_mapping_id, id, ?, ?, 1
             FROM code_point cp1
             WHERE id <> (SELECT simple_uppercase_mapping_id FROM code_point cp2 WHERE cp2.id = cp1.simple_lowercase_mapping_id)""",
-               (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value, process_id))
-
-        if drop_case_columns:
-            cursor.execute("DROP INDEX idx_fk_cp_simple_uppercase_mapping")
-            cursor.execute("ALTER TABLE code_point DROP COLUMN simple_uppercase_mapping_id")
-            cursor.execute("DROP INDEX idx_fk_cp_simple_lowercase_mapping")
-            cursor.execute("ALTER TABLE code_point DROP COLUMN simple_lowercase_mapping_id")
-            cursor.execute("ALTER TABLE code_point DROP COLUMN is_lowercase")
-            cursor.execute("ALTER TABLE code_point DROP COLUMN is_uppercase")
+               (DerivationType.DEFAULT.value, Certainty.STRONG_ASSUMPTION.value)).fetchall())
+        return derivations
 
 
     def _parse_raw_source(self, cursor, raw_source_str):
@@ -1111,16 +1375,7 @@ class ScriptDatabase:
         return SourceInfo(parts[0].strip(), section, access_date)
 
 
-    def _load_manually_specified_derivations(self, cursor, verify_script):
-        def resolve_default(defaults_dict, script, data_row, field, overriding_default=None, override_condition=False, last_resort=None):
-            if field in data_row and data_row[field] and not data_row[field].isspace():
-                return data_row[field].strip()
-            if override_condition:
-                return overriding_default
-            if script in defaults_dict and field in defaults_dict[script] and defaults_dict[script][field]:
-                return defaults_dict[script][field]
-            return last_resort
-
+    def _get_derivation_defaults(self):
         defaults = {}
         with open(os.path.join(self._resource_path, 'derivation_defaults.csv'), 'r') as file:
             for row in csv.DictReader(file):
@@ -1131,62 +1386,24 @@ class ScriptDatabase:
                     'Certainty Type': row['Certainty Type'].strip()
                 }
 
-        for s in os.listdir(self._derivations_path):
-            script_file = os.path.join(self._derivations_path, s)
-            script = script_file.split(os.path.sep)[-1].split('.')[0]
-            with open(script_file, 'r') as file:
-                for row in csv.DictReader(file):
-                    child = row['Child'].strip()
-                    parents = row['Parent'].strip()
-
-                    # Logic for defaulting to Uncertain on no parent: For historical scripts, this is usually more a function of a lack of records
-                    # For modern scripts, the inventor is generally aware of existing writing systems, and may have been inspired
-                    certainty = int(resolve_default(defaults, script, row, 'Certainty Type',
-                                                    overriding_default=str(Certainty.UNCERTAIN.value),
-                                                    override_condition=(parents.isspace()),
-                                                    last_resort=str(Certainty.UNSPECIFIED.value)))
-
-                    multiplicity = int(resolve_default(defaults, script, row, 'Multiplicity', last_resort=1))
-
-                    # Overriding default here is for convenience:
-                    # An Assumed certainty means there is usually no source, so allows us to specify a source in defaults for all else.
-                    raw_sources = resolve_default(defaults, script, row, 'Source', overriding_default=None,
-                                             override_condition=(certainty in (Certainty.STRONG_ASSUMPTION.value, Certainty.WEAK_ASSUMPTION.value)))
-                    sources = []
-                    if raw_sources:
-                        for raw_source in raw_sources.split('/'):
-                            sources.append(self._parse_raw_source(cursor, raw_source))
-
-                    notes = resolve_default(defaults, script, row, 'Notes')
-                    derivation_type = int(resolve_default(defaults, script, row, 'Derivation Type', last_resort=str(DerivationType.DEFAULT.value)))
-
-                    # File-specified data overrides the automatically generated data
-                    # TODO - with the manual split, it should be easier to first delete from manual_derivation_source without relying on CASCADE
-                    cursor.execute("DELETE FROM code_point_derivation WHERE child_id = ? AND process_type_id <> ?", (ord(child), self.MANUAL_PROCESS_ID))
-                    # TODO: also reverse deletion for decomposition
-
-                    # ensure that child character is always the expected script
-                    if verify_script:
-                        script_in_db = cursor.execute(
-                            "SELECT code FROM code_point cp INNER JOIN script s ON s.code = cp.script_code WHERE text = ?", child).fetchone()[0]
-                        if script != script_in_db:
-                            print(f"resource file error in {script}.csv with child character {child} detected to be {script_in_db} instead")
-
-                    for parent in parents.split('/'):
-                        if not parent: parent = self.NO_PARENT_CHARACTER
-
-                        if verify_script:
-                            if child == parent:
-                                raise ValueError("Attempted to add self-derivation of " + child)
-                            if cursor.execute("SELECT * FROM code_point_derivation WHERE parent_id = ? AND child_id = ?",
-                                              (ord(child), ord(parent))).fetchall():
-                                raise ValueError("Attempted to add a 2-cycle with " + child + " and " + parent)
-
-                        self._load_single_manual_derivation(cursor, ord(child), ord(parent), DerivationType(derivation_type),
-                                                            Certainty(certainty), sources, notes, multiplicity)
-
-        # stuff that's confusing or might break csv format (commas, quotes, slashes)
-        awkward_data = [
+        return defaults
+
+
+    def _load_manually_specified_derivations(self, cursor, manual_rows, verify_script):
+        defaults = self._get_derivation_defaults()
+        for script, rows in manual_rows.items():
+            self._load_manual_derivation_rows(cursor, script, rows, defaults, verify_script)
+
+        for row in self._get_awkward_manual_derivations():
+            if self._is_loaded_code_point(row[0]):
+                sources = [self._parse_raw_source(cursor, s) for s in row[4].split('/')]
+                self._load_single_manual_derivation(cursor, row[0], row[1], row[2], row[3], sources, row[5], row[6])
+
+
+    # stuff that's confusing or might break csv format (commas, quotes, slashes):
+    # (child id, parent id, derivation type, certainty, raw sources, notes, multiplicity)
+    def _get_awkward_manual_derivations(self):
+        return [
             (ord('/'), ord(self.NO_PARENT_CHARACTER), DerivationType.DEFAULT, Certainty.LIKELY, 'OED 1933 # Volume 12 p. 235',
              'Derived from medieval virgule, essentially the same graphical symbol but used as a comma', 1),
             (ord('⸗'), ord('/'), DerivationType.DEFAULT, Certainty.NEAR_CERTAIN, 'Wikipedia: Slash', None, 2),
@@ -1202,18 +1419,77 @@ class ScriptDatabase:
             (ord('⅍'), ord('S'), DerivationType.DEFAULT, Certainty.NEAR_CERTAIN, 'Wikipedia: Aktieselskab', None, 1),
         ]
 
-        for row in awkward_data:
-            sources = [self._parse_raw_source(cursor, s) for s in row[4].split('/')]
-            self._load_single_manual_derivation(cursor, row[0], row[1], row[2], row[3], sources, row[5], row[6])
 
+    # rows of the derivation resource file of the script
+    def _load_manual_derivation_rows(self, cursor, script, rows, defaults, verify_script):
+        for row in rows:
+            if not self._is_loaded_code_point(ord(row['Child'].strip())):
+                continue  # outside the script subset
+            child, parents, derivation_type, certainty, sources, notes, multiplicity = self._resolve_manual_derivation(cursor, script, row, defaults)
+
+            # ensure that child character is always the expected script
+            if verify_script:
+                script_in_db = cursor.execute(
+                    "SELECT code FROM code_point cp INNER JOIN script s ON s.code = cp.script_code WHERE cp.id = ?", (ord(child),)).fetchone()[0]
+                if script != script_in_db:
+                    print(f"resource file error in {script}.csv with child character {child} detected to be {script_in_db} instead")
+
+            for parent in parents:
+                if verify_script:
+                    if child == parent:
+                        raise ValueError("Attempted to add self-derivation of " + child)
+                    if cursor.execute("SELECT * FROM code_point_derivation WHERE parent_id = ? AND child_id = ?",
+                                      (ord(child), ord(parent))).fetchall():
+                        raise ValueError("Attempted to add a 2-cycle with " + child + " and " + parent)
+
+                self._load_single_manual_derivation(cursor, ord(child), ord(parent), derivation_type, certainty, sources, notes, multiplicity)
+
+
+    # a row of the derivation resource file of the script with the script's defaults applied:
+    # (child, parents, derivation type, certainty, sources, notes, multiplicity)
+    def _resolve_manual_derivation(self, cursor, script, row, defaults):
+        def resolve_default(defaults_dict, script, data_row, field, overriding_default=None, override_condition=False, last_resort=None):
+            if field in data_row and data_row[field] and not data_row[field].isspace():
+                return data_row[field].strip()
+            if override_condition:
+                return overriding_default
+            if script in defaults_dict and field in defaults_dict[script] and defaults_dict[script][field]:
+                return defaults_dict[script][field]
+            return last_resort
+
+        child = row['Child'].strip()
+        parents = row['Parent'].strip()
+
+        # Logic for defaulting to Uncertain on no parent: For historical scripts, this is usually more a function of a lack of records
+        # For modern scripts, the inventor is generally aware of existing writing systems, and may have been inspired
+        certainty = int(resolve_default(defaults, script, row, 'Certainty Type',
+                                        overriding_default=str(Certainty.UNCERTAIN.value),
+                                        override_condition=(parents.isspace()),
+                                        last_resort=str(Certainty.UNSPECIFIED.value)))
+
+        multiplicity = int(resolve_default(defaults, script, row, 'Multiplicity', last_resort=1))
 
-    def _load_tangut_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, 'Tangut radicals')
-        def set_tangut_block(block_start, block_end):
-            cursor.execute("""
-                INSERT INTO code_point_derivation (child_id, parent_id, certainty_type_id, process_type_id)
-                SELECT id, ?, ?, ? FROM code_point WHERE id BETWEEN ? AND ? AND equivalent_sequence_id IS NULL""",
-                (ord(self.NO_PARENT_CHARACTER), Certainty.UNCERTAIN.value, process_id, block_start, block_end))
+        # Overriding default here is for convenience:
+        # An Assumed certainty means there is usually no source, so allows us to specify a source in defaults for all else.
+        raw_sources = resolve_default(defaults, script, row, 'Source', overriding_default=None,
+                                 override_condition=(certainty in (Certainty.STRONG_ASSUMPTION.value, Certainty.WEAK_ASSUMPTION.value)))
+        sources = []
+        if raw_sources:
+            for raw_source in raw_sources.split('/'):
+                sources.append(self._parse_raw_source(cursor, raw_source))
+
+        notes = resolve_default(defaults, script, row, 'Notes')
+        derivation_type = int(resolve_default(defaults, script, row, 'Derivation Type', last_resort=str(DerivationType.DEFAULT.value)))
+
+        return (child, [parent if parent else self.NO_PARENT_CHARACTER for parent in parents.split('/')], DerivationType(derivation_type),
+                Certainty(certainty), sources, notes, multiplicity)
+
+
+    def _get_tangut_derivations(self, cursor):
+        def get_tangut_block(block_start, block_end):
+            return cursor.execute("""
+                SELECT id, ?, ?, ?, 1 FROM code_point WHERE id BETWEEN ? AND ? AND equivalent_sequence_id IS NULL""",
+                (ord(self.NO_PARENT_CHARACTER), DerivationType.DEFAULT.value, Certainty.UNCERTAIN.value, block_start, block_end)).fetchall()
 
         TANGUT_COMP_START = 0x18800
         TANGUT_COMP_END = 0x18AFF
@@ -1222,53 +1498,149 @@ class ScriptDatabase:
         # TODO - may consider putting blocks in DB at some point
         # TODO - To find a parsable Wei He [sic?] / Sea of Characters source for the compound characters
 
-        set_tangut_block(TANGUT_COMP_START, TANGUT_COMP_END)
-        set_tangut_block(TANGUT_COMP_SUPP_START, TANGUT_COMP_SUPP_END)
+        return get_tangut_block(TANGUT_COMP_START, TANGUT_COMP_END) + get_tangut_block(TANGUT_COMP_SUPP_START, TANGUT_COMP_SUPP_END)
 
 
-    def _load_cuneiform_derivations(self, cursor):
-        process_id = self._get_process_id(cursor, 'Cuneiform Unicode name')
+    def _get_cuneiform_derivations(self, cursor):
         # TODO - still need to process the compound ones
-
-        cursor.execute("""
-            INSERT INTO code_point_derivation (child_id, parent_id, certainty_type_id, process_type_id)
-            SELECT id, ?, ?, ? FROM code_point
+        return cursor.execute("""
+            SELECT id, ?, ?, ?, 1 FROM code_point
             WHERE script_code = ? AND name LIKE ? AND word_count = ? AND equivalent_sequence_id IS NULL""",
-            (ord(self.NO_PARENT_CHARACTER), Certainty.UNCERTAIN.value, process_id, 'Xsux', 'CUNEIFORM SIGN%', 3))
+            (ord(self.NO_PARENT_CHARACTER), DerivationType.DEFAULT.value, Certainty.UNCERTAIN.value, 'Xsux', 'CUNEIFORM SIGN%', 3)).fetchall()
+
+
+    # Registers a derivation process (by its name in processes.csv) to generate derivations for future loads, replacing any generator
+    # previously registered for the process. See DerivationGenerator for the arguments
+    @classmethod
+    def register_derivation_generator(cls, process_name, generate, priority, inputs=(), fallback=False):
+        cls._DERIVATION_GENERATORS[process_name] = DerivationGenerator(generate, priority, inputs, fallback)
 
 
     def _load_derivations(self, cursor, indic_supp_data, indic_letter_data, semitic_letter_data, load_options):
-        supp_process_id = self._get_process_id(cursor, 'Supplementary Indic')
-        indic_process_id = self._get_process_id(cursor, 'Indic letters')
-        semitic_process_id = self._get_process_id(cursor, 'Semitic letters')
-        exception_ids = self._load_data_from_names(cursor, load_options.verify_data_sources)
+        manual_rows = self._read_manual_derivation_rows()  # first, so that a malformed row stops the load before the generators run
+        # equivalencies first, as generators only derive code points without an equivalent
+        self._load_equivalents_from_names(cursor)
+        self._load_z_variants(cursor)
+        self._load_from_unikemet(cursor)  # equivalency data and an alphabet
+
+        self._load_generated_derivations(cursor, {'verify': load_options.verify_data_sources, 'indic_supp_data': indic_supp_data,
+                                                  'indic_letter_data': indic_letter_data, 'semitic_letter_data': semitic_letter_data},
+                                         load_options.keep_overridden_derivations,
+                                         set(ord(row['Child'].strip()) for rows in manual_rows.values() for row in rows))
+        if not load_options.keep_overridden_derivations:
+            cursor.execute("DROP TABLE overridden_derivation")
 
-        # we want to drop this as soon as possible so that the freed space can be used
+        # we want to drop these as soon as the generators are done so that the freed space can be used
         if load_options.drop_code_point_name_index:
             cursor.execute("DROP TABLE name_indexer")
             cursor.execute("DROP INDEX idx_cp_raw_name")
-            cursor.execute("ALTER TABLE code_point DROP COLUMN word_count")
+            self._drop_code_point_columns(cursor, ['word_count'])
+        if load_options.drop_case_columns:
+            cursor.execute("DROP INDEX idx_fk_cp_simple_uppercase_mapping")
+            cursor.execute("DROP INDEX idx_fk_cp_simple_lowercase_mapping")
+            self._drop_code_point_columns(cursor, ['simple_uppercase_mapping_id', 'simple_lowercase_mapping_id', 'is_lowercase', 'is_uppercase'])
 
-        self._load_derivations_from_case_data(cursor, load_options.drop_case_columns)
-        self._load_from_unihan(cursor)  # derivation and equivalency data
-        exception_ids |= self._load_from_unikemet(cursor, load_options.verify_data_sources) # derivation, equivalency data and an alphabet
-        self._load_derivations_from_equivalencies(cursor)
-        self._load_independent_derivations(cursor) # after equivalency loading to allow that to take priority
+        self._load_position_distinctions(cursor)
+        self._load_manually_specified_derivations(cursor, manual_rows, load_options.verify_data_sources)
 
-        for id in exception_ids:
-            cursor.execute("DELETE FROM code_point_derivation WHERE child_id = ? AND parent_id = ?", (id, ord(self.NO_PARENT_CHARACTER)))
+        if load_options.drop_derivation_type:
+            cursor.execute("ALTER TABLE code_point_derivation DROP COLUMN derivation_type_id")
+            if load_options.keep_overridden_derivations:
+                cursor.execute("ALTER TABLE overridden_derivation DROP COLUMN derivation_type_id")
+            cursor.execute("DROP TABLE derivation_type")
 
-        self._load_letter_derivation_data(cursor, indic_supp_data, self._INDIC_SUPPLEMENT, supp_process_id, load_options.verify_data_sources)
-        self._load_letter_derivation_data(cursor, indic_letter_data, self._INDIC_ORDER, indic_process_id, load_options.verify_data_sources)
-        self._load_letter_derivation_data(cursor, semitic_letter_data, self._SEMITIC_ORDER, semitic_process_id, load_options.verify_data_sources)
 
-        self._load_tangut_derivations(cursor)
+    # Results of fn(cursor, item) for each item, run on a bounded pool of threads. Each thread has a read-only connection to snapshot
+    # (a serialized database, eg. with a connection's uncommitted changes), which is written to a temporary file the connections share,
+    # rather than each having an in-memory copy. SQLite doesn't hold the GIL while running a statement, so only query-heavy calls overlap
+    @staticmethod
+    def _run_on_snapshot_threads(snapshot, fn, items):
+        with tempfile.TemporaryDirectory() as dir_path:
+            snapshot_path = os.path.join(dir_path, 'snapshot.db')
+            with open(snapshot_path, 'wb') as file:
+                file.write(snapshot)
+            snapshot_uri = pathlib.Path(snapshot_path).as_uri() + '?mode=ro&immutable=1'
+            snapshot_cxns = []
+            thread_data = threading.local()
+
+            def run(item):
+                if not hasattr(thread_data, 'cursor'):
+                    cxn = sqlite3.connect(snapshot_uri, uri=True, check_same_thread=False)  # closed by the calling thread
+                    snapshot_cxns.append(cxn)
+                    thread_data.cursor = cxn.cursor()
+                return fn(thread_data.cursor, item)
 
-        self._load_manually_specified_derivations(cursor, load_options.verify_data_sources)
+            try:
+                with concurrent.futures.ThreadPoolExecutor(min(len(items), os.cpu_count() or 1)) as executor:
+                    return list(executor.map(run, items))
+            finally:
+                for cxn in snapshot_cxns:  # before the file is removed
+                    cxn.close()
 
-        if load_options.drop_derivation_type:
-            cursor.execute("ALTER TABLE code_point_derivation DROP COLUMN derivation_type_id")
-            cursor.execute("DROP TABLE derivation_type")
+
+    # Runs the registered derivation generators (see register_derivation_generator) concurrently on the database as loaded so far,
+    # then merges their candidate derivations. The manual children are those of the derivation resource files
+    def _load_generated_derivations(self, cursor, inputs, keep_overridden, manual_children):
+        generators = list(self._DERIVATION_GENERATORS.items())
+        results = self._run_on_snapshot_threads(cursor.connection.serialize(), lambda snapshot_cursor, generator:
+                                                generator.generate(self, snapshot_cursor, *[inputs[name] for name in generator.inputs]),
+                                                [generator for _, generator in generators])
+
+        cursor.execute("""
+            CREATE TEMP TABLE derivation_candidate (
+                child_id INTEGER, parent_id INTEGER, derivation_type_id INTEGER, certainty_type_id INTEGER, multiplicity INTEGER,
+                process_type_id INTEGER, priority INTEGER, is_fallback INTEGER)""")
+        for (process_name, generator), derivations in zip(generators, results):
+            candidate_data = (self._get_process_id(cursor, process_name), generator.priority, generator.fallback)
+            cursor.executemany("INSERT INTO derivation_candidate VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [d + candidate_data for d in derivations])
+        cursor.execute("CREATE INDEX temp.idx_dc_child ON derivation_candidate(child_id, is_fallback)")
+        cursor.execute("CREATE TEMP TABLE manual_child (id INTEGER PRIMARY KEY)")
+        cursor.executemany("INSERT OR IGNORE INTO manual_child (id) VALUES (?)", [(id,) for id in manual_children])
+
+        # The override rules: the derivation resource files (loaded afterwards) replace all generated derivations of their children,
+        # fallback generators only derive children which no other generator derives (or has an unresolved parent for),
+        # and of the derivations with the same child and parent, the one of the highest priority generator is kept
+        merge_sql = """
+            INSERT INTO {0} (child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id, multiplicity)
+            SELECT child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id, multiplicity
+            FROM derivation_candidate c
+            WHERE
+                parent_id IS NOT NULL
+                AND child_id {1} (SELECT id FROM manual_child)
+                AND NOT (is_fallback AND EXISTS (SELECT * FROM derivation_candidate o WHERE o.child_id = c.child_id AND NOT o.is_fallback)){2}
+            ORDER BY priority DESC, rowid
+            ON CONFLICT DO NOTHING"""
+        # some generators derive from the source files, so in a script subset a candidate can be of a code point that wasn't loaded.
+        # It still counts for the fallback rule, so its child isn't taken to be independent
+        subset_condition = ""
+        if self._script_subset is not None:
+            subset_condition = " AND child_id IN (SELECT id FROM code_point) AND parent_id IN (SELECT id FROM code_point)"
+        cursor.execute(merge_sql.format('code_point_derivation', 'NOT IN', subset_condition))
+        if keep_overridden:
+            cursor.execute(merge_sql.format('overridden_derivation', 'IN', subset_condition))
+        cursor.execute("DROP TABLE derivation_candidate")
+        cursor.execute("DROP TABLE manual_child")
+
+
+    # The rows of the derivation resource files by script. Rows which can't be loaded (a missing column, or a child or parent which isn't a
+    # single character) are reported by file and line as by validate_resource_files, which also checks the rest
+    def _read_manual_derivation_rows(self):
+        manual_rows, errors = {}, []
+        for s in sorted(os.listdir(self._derivations_path)):
+            with open(os.path.join(self._derivations_path, s), 'r') as file:
+                reader = csv.DictReader(file)
+                rows = manual_rows[s.split('.')[0]] = []
+                for row in reader:
+                    location = f"{os.path.join('derivations', s)}:{reader.line_num}"
+                    if row.get('Child') is None or row.get('Parent') is None:
+                        errors.append(f"{location}: Missing {', '.join(c for c in ('Child', 'Parent') if row.get(c) is None)}")
+                    elif len(row['Child'].strip()) != 1 or any(len(parent) > 1 for parent in row['Parent'].strip().split('/')):
+                        errors.append(f"{location}: Child {row['Child'].strip()!r} or parent {row['Parent'].strip()!r} is not a single character")
+                    else:
+                        rows.append(row)
+        if errors:
+            raise ValueError("Malformed derivation resource file rows:\n" + "\n".join(errors))
+        return manual_rows
 
 
     def get_code_to_script_dict(self):
@@ -1456,12 +1828,15 @@ class ScriptDatabase:
             id = self._CODE_POINT_STARTS[script_code] + self._INDIC_ORDER.index(indic_letter)
             data[script_code][indic_letter] = [chr(id)]
 
+        # from the source file rather than the database, as the letters are compared across scripts which a script subset may leave out
+        with open(os.path.join(self._unicode_path, 'UnicodeData.txt'), 'r') as file:
+            general_categories = {int(row[0], 16): row[2] for row in self._parse_data_file(file, ';')}
         wdata = {}
         hex_pattern = re.compile('^[0-9A-F]+$')
         replacements = {'Gupt': 'Qabg', 'Kdmb': 'Qabk', 'Plav': 'Qabp'}
         for letter in ScriptDatabase._INDIC_ORDER:
             with open(os.path.join(self._wikipedia_path, 'indic-letters', letter + '.txt'), 'r') as file:
-                for match in re.findall(r'\|\s*([a-z0-9]+)(cp|img)\s*=([^\|]+)', file.read()):
+                for match in self._parse_wiki_letter_page(file, r'\|\s*([a-z0-9]+)(cp|img)\s*=([^\|]+)'):
                     script_code = match[0][0:4].title()  # a few have multiple codepoints indicated by appended numbers
                     if script_code in replacements:
                         script_code = replacements[script_code]
@@ -1479,13 +1854,11 @@ class ScriptDatabase:
                             if letter_to_add == 'ᜢ' and letter == 'O':
                                 if verify:
                                     print("Data generation error: Hanunoo letter ᜢ in two Indic letter files")  # a likely error in the source files
-                            else:
-                                category_code = cursor.execute("SELECT general_category_code FROM code_point WHERE text = ?", (letter_to_add,)).fetchone()[0]
-                                if category_code == 'Lo':  # only looking for independent vowels in this method (was otherwise inconsistent data it seemed)
-                                    if letter not in wdata[script_code]:
-                                        wdata[script_code][letter] = []
-                                    if letter_to_add not in wdata[script_code][letter]:
-                                        wdata[script_code][letter].append(letter_to_add)
+                            elif general_categories.get(ord(letter_to_add)) == 'Lo':  # only looking for independent vowels in this method (was otherwise inconsistent data it seemed)
+                                if letter not in wdata[script_code]:
+                                    wdata[script_code][letter] = []
+                                if letter_to_add not in wdata[script_code][letter]:
+                                    wdata[script_code][letter].append(letter_to_add)
 
         # kawi a bit of a special case in that it exists in Unicode, but probably because its one of the newer ones, Wikipedia source files didn't have code points yet
         # in unicode, currently all indic letters exist in Kawi except for vowel Au, so just manually made sure that one wasn't added by the code
@@ -1561,7 +1934,7 @@ class ScriptDatabase:
         wdata = {}
         for letter in ScriptDatabase._SEMITIC_ORDER:
             with open(os.path.join(self._wikipedia_path, 'semitic-letters', letter + '.txt'), 'r') as file:
-                for match in re.findall(r'\|\s*([a-z]{2})char\s*=([^\|]+)', file.read()):
+                for match in self._parse_wiki_letter_page(file, r'\|\s*([a-z]{2})char\s*=([^\|]+)'):
                     script_code = code_map[match[0]]
                     if script_code not in wdata:
                         wdata[script_code] = {}
@@ -1605,17 +1978,616 @@ class ScriptDatabase:
         generate_std_alphabet(semitic_letter_dict, 'Wikipedia: Semitic letter pages', self._SEMITIC_ORDER)
 
 
+    # child_scripts: only the rows of these child scripts, None for all
+    def _load_script_derivations(self, cursor, child_scripts=None):
+        # Letters only, as in get_script_parents: a letter's weight is split equally among its parents, and parents of the letter's own script
+        # or inherited (combining marks) are passed through to their parents. Certainty is that of the least certain derivation (see _CERTAINTY_ORDER)
+        if child_scripts is None:
+            cursor.execute("DELETE FROM script_derivation")
+            child_script_filter = ''
+        else:
+            cursor.execute(f"DELETE FROM script_derivation WHERE child_script_code IN {self._get_sql_in_str_list(child_scripts)}")
+            child_script_filter = f"AND cp.script_code IN {self._get_sql_in_str_list(child_scripts)}"
+        cursor.execute(f"""
+            WITH RECURSIVE 
+                certainty_rank (certainty_type_id, rank) AS (VALUES {', '.join(f"({id}, {rank})" for rank, id in enumerate(self._CERTAINTY_ORDER))}),
+                deriv AS (
+                    SELECT d.child_id, d.parent_id, r.rank AS certainty_rank, 1.0 / COUNT(*) OVER (PARTITION BY d.child_id) AS share
+                    FROM code_point_derivation d INNER JOIN certainty_rank r ON r.certainty_type_id = d.certainty_type_id),
+                walk (child_id, child_script_code, parent_id, weight, certainty_rank, path) AS (
+                    SELECT d.child_id, cp.script_code, d.parent_id, d.share, d.certainty_rank, ',' || d.child_id || ','
+                    FROM deriv d INNER JOIN code_point cp ON cp.id = d.child_id
+                    WHERE cp.is_alphabetic AND cp.equivalent_sequence_id IS NULL AND cp.script_code NOT IN (?, ?, ?) {child_script_filter}
+                    UNION ALL
+                    SELECT w.child_id, w.child_script_code, d.parent_id, w.weight * d.share, 
+                           MAX(w.certainty_rank, d.certainty_rank), w.path || w.parent_id || ','
+                    FROM 
+                        walk w 
+                        INNER JOIN code_point p ON p.id = w.parent_id 
+                        INNER JOIN deriv d ON d.child_id = w.parent_id
+                    WHERE p.script_code IN (w.child_script_code, ?) AND instr(w.path, ',' || d.parent_id || ',') = 0)  -- path avoids cycles
+            INSERT INTO script_derivation (child_script_code, parent_script_code, letter_weight, edge_count, min_certainty_type_id)
+            SELECT sd.child_script_code, sd.parent_script_code, sd.letter_weight, sd.edge_count, r.certainty_type_id
+            FROM (
+                SELECT w.child_script_code, p.script_code AS parent_script_code, SUM(w.weight) AS letter_weight, COUNT(*) AS edge_count,
+                       MAX(w.certainty_rank) AS certainty_rank
+                FROM walk w INNER JOIN code_point p ON p.id = w.parent_id
+                WHERE p.script_code NOT IN (w.child_script_code, ?)
+                GROUP BY w.child_script_code, p.script_code) sd
+                INNER JOIN certainty_rank r ON r.rank = sd.certainty_rank""",
+            (self.INHERITED_SCRIPT, self.COMMON_SCRIPT, self.UNKNOWN_SCRIPT, self.INHERITED_SCRIPT, self.INHERITED_SCRIPT))
+
+
+    def _load_script_coverage(self, cursor):
+        cursor.execute("DELETE FROM script_coverage")
+        cursor.execute(f"""
+            INSERT INTO script_coverage (script_code, num_graphical, num_graphical_derived, num_letters, num_letters_derived, num_letters_manual)
+            SELECT
+                script_code, SUM(is_graphical), SUM(is_graphical AND is_derived), SUM(is_letter), SUM(is_letter AND is_derived), SUM(is_letter AND is_manual)
+            FROM (
+                SELECT
+                    cp.script_code,
+                    cp.general_category_code NOT LIKE 'C_' AND cp.general_category_code NOT LIKE 'Z_' AS is_graphical,
+                    cp.is_alphabetic AND cp.equivalent_sequence_id IS NULL AS is_letter,
+                    EXISTS (SELECT * FROM code_point_derivation WHERE child_id = cp.id) AS is_derived,
+                    EXISTS (SELECT * FROM code_point_derivation WHERE child_id = cp.id AND +process_type_id = {self.MANUAL_PROCESS_ID}) AS is_manual
+                FROM code_point cp)
+            GROUP BY script_code""")
+
+
+    # Done last, as rebuilding code_point_derivation (compact_storage) would drop them. Only changes to whether a code point has a (manual)
+    # derivation are tracked, changes to code points themselves (script, category, etc.) need a reload
+    def _create_script_coverage_triggers(self, cursor):
+        def get_update_sql(child_id, sign, is_derived_changed, is_manual_changed):
+            return f"""
+                UPDATE script_coverage SET
+                    num_graphical_derived = num_graphical_derived {sign} (c.is_graphical AND {is_derived_changed}),
+                    num_letters_derived = num_letters_derived {sign} (c.is_letter AND {is_derived_changed}),
+                    num_letters_manual = num_letters_manual {sign} (c.is_letter AND {is_manual_changed})
+                FROM (
+                    SELECT
+                        script_code,
+                        general_category_code NOT LIKE 'C_' AND general_category_code NOT LIKE 'Z_' AS is_graphical,
+                        is_alphabetic AND equivalent_sequence_id IS NULL AS is_letter
+                    FROM code_point WHERE id = {child_id}) c
+                WHERE script_coverage.script_code = c.script_code;"""
+
+        # the counts of the child's derivations after the change tell whether it just gained or lost its first (manual) derivation
+        # (the unary + keeps SQLite on the primary key, rather than the process index which would search all manual derivations)
+        derived_count = "(SELECT COUNT(*) FROM code_point_derivation WHERE child_id = {0}.child_id)"
+        manual_count = f"(SELECT COUNT(*) FROM code_point_derivation WHERE child_id = {{0}}.child_id AND +process_type_id = {self.MANUAL_PROCESS_ID})"
+        is_manual = f"{{0}}.process_type_id = {self.MANUAL_PROCESS_ID}"
+        triggers = {
+            'trg_cpd_insert_coverage': ('AFTER INSERT',
+                get_update_sql('NEW.child_id', '+', f"{derived_count} = 1", f"{is_manual} AND {manual_count} = 1").format('NEW')),
+            'trg_cpd_delete_coverage': ('AFTER DELETE',
+                get_update_sql('OLD.child_id', '-', f"{derived_count} = 0", f"{is_manual} AND {manual_count} = 0").format('OLD')),
+            'trg_cpd_update_coverage': ('AFTER UPDATE OF process_type_id',
+                get_update_sql('NEW.child_id', '+', '0', f"{is_manual.format('NEW')} AND NOT {is_manual.format('OLD')} AND {manual_count.format('NEW')} = 1") +
+                get_update_sql('NEW.child_id', '-', '0', f"{is_manual.format('OLD')} AND NOT {is_manual.format('NEW')} AND {manual_count.format('NEW')} = 0"))}
+        for name, (event, body) in triggers.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} {event} ON code_point_derivation BEGIN {body} END")
+
+
+    # Union-find over the code points whose equivalent sequence is a single code point (singleton decompositions, z-variants, positional
+    # distinctions, etc.), so a chain of equivalents resolves to one representative. That is the one which has no single code point
+    # equivalent itself (eg. ANGSTROM SIGN -> LATIN CAPITAL LETTER A WITH RING ABOVE, which decomposes to two code points)
+    def _load_canonical_ids(self, cursor):
+        def find(id):
+            root = id
+            while parents.get(root, root) != root:
+                root = parents[root]
+            while id != root:  # path compression
+                parents[id], id = root, parents[id]
+            return root
+
+        cursor.execute(f"UPDATE {self._code_point_table} SET canonical_id = NULL WHERE canonical_id IS NOT NULL")
+        equivalents = cursor.execute(f"""
+            SELECT cp.id, MIN(si.item_id)
+            FROM code_point cp INNER JOIN sequence_item si ON si.sequence_id = cp.equivalent_sequence_id
+            GROUP BY cp.id
+            HAVING COUNT(*) = 1 AND MIN(si.item_id) <= {self.UNICODE_MAX} AND MIN(si.item_id) <> cp.id""").fetchall()
+        has_equivalent = set(x[0] for x in equivalents)
+
+        parents = {}
+        for id, equivalent_id in equivalents:
+            root_a, root_b = find(id), find(equivalent_id)
+            if root_a != root_b:  # union, the representative being the distinct one (or lowest code point, should the data have a cycle)
+                root_a, root_b = sorted((root_a, root_b), key=lambda x: (x in has_equivalent, x))
+                parents[root_b] = root_a
+
+        cursor.executemany("UPDATE code_point SET canonical_id = ? WHERE id = ?", [(find(id), id) for id in parents if find(id) != id])
+
+
+    def _load_code_point_ancestry(self, cursor):
+        cursor.execute("DELETE FROM code_point_ancestry")
+        nodes = [x[0] for x in cursor.execute("SELECT child_id FROM code_point_derivation UNION SELECT parent_id FROM code_point_derivation").fetchall()]
+        ancestors, parents = self._get_ancestor_closure(cursor, nodes)
+        # numbered in code point order, only those which are ancestors of something
+        ancestor_nums = {cp: i for i, cp in enumerate(sorted(set(p for cp_parents in parents.values() for p in cp_parents)))}
+        if len(ancestor_nums) > 0xFFFF:
+            raise ValueError("Ancestor numbers no longer fit in 2 bytes, code_point_ancestry format needs updating")
+        cursor.executemany("INSERT INTO code_point_ancestry (code_point_id, ancestor_num, ancestor_nums) VALUES (?, ?, ?)",
+                           [(cp, ancestor_nums.get(cp), struct.pack(f"<{len(ancestors[cp])}H", *sorted(ancestor_nums[a] for a in ancestors[cp])))
+                            for cp in nodes])
+        self._load_code_point_lineage_stats(cursor, ancestors, parents)
+
+
+    def _load_code_point_lineage_stats(self, cursor, ancestors, parents):
+        # A proper ancestor (not in the same cycle) always has fewer ancestors, so that order is topological, cycles aside.
+        # The no parent signal character isn't counted as an ancestor here
+        cursor.execute("DELETE FROM code_point_lineage_stats")
+        no_parent_id = ord(self.NO_PARENT_CHARACTER)
+        scripts, equivalents = {}, set()
+        for id, script_code, equivalent_sequence_id in cursor.execute("""
+                SELECT cp.id, cp.script_code, cp.equivalent_sequence_id FROM code_point cp
+                WHERE EXISTS (SELECT * FROM code_point_derivation WHERE child_id = cp.id OR parent_id = cp.id)"""):
+            scripts[id] = script_code
+            if equivalent_sequence_id is not None:
+                equivalents.add(id)
+
+        depths, roots = {}, {}
+        for cp in sorted(ancestors, key=lambda x: len(ancestors[x])):
+            depths[cp], roots[cp] = 0, cp
+            for parent in parents.get(cp, ()):
+                if parent != no_parent_id and len(ancestors[parent]) < len(ancestors[cp]):
+                    if (depths[parent] + 1, -roots[parent]) > (depths[cp], -roots[cp]):
+                        depths[cp], roots[cp] = depths[parent] + 1, roots[parent]
+
+        descendant_counts = dict.fromkeys(ancestors, 0)
+        descendant_scripts = {cp: set() for cp in ancestors}
+        for cp, cp_ancestors in ancestors.items():
+            if cp in equivalents:
+                continue
+            for ancestor in cp_ancestors:
+                descendant_counts[ancestor] += 1
+                descendant_scripts[ancestor].add(scripts[cp])
+
+        cursor.executemany("""
+            INSERT INTO code_point_lineage_stats (code_point_id, ancestry_depth, root_ancestor_id, descendant_count, descendant_script_count)
+            VALUES (?, ?, ?, ?, ?)""",
+            [(cp, depths[cp], roots[cp], descendant_counts[cp], len(descendant_scripts[cp] - {scripts[cp]})) for cp in ancestors if cp != no_parent_id])
+
+
+    # code_point_ancestry and code_point_lineage_stats after changes to the derivations of changed_children, as _load_code_point_ancestry
+    # would load them. Only the descendants of the changed children get other ancestors, and only their ancestors before and after the change
+    # other descendants. Ancestors new to the table are numbered after the others, rather than in code point order. Returns the changed children
+    # and their descendants
+    def _update_code_point_ancestry(self, cursor, changed_children):
+        no_parent_id = ord(self.NO_PARENT_CHARACTER)
+        changed_str = ', '.join(str(x) for x in changed_children)
+        descendants = set(x[0] for x in cursor.execute(f"""
+            WITH RECURSIVE descendant(id) AS (
+                SELECT id FROM sequence WHERE id IN ({changed_str})
+                UNION
+                SELECT deriv.child_id FROM descendant d INNER JOIN code_point_derivation deriv ON deriv.parent_id = d.id)
+            SELECT id FROM descendant""").fetchall())
+        # with the current parents of the changed children, which may be new to the graph
+        nodes = descendants | set(x[0] for x in cursor.execute(f"SELECT parent_id FROM code_point_derivation WHERE child_id IN ({changed_str})"))
+
+        ancestor_ids = dict(cursor.execute("SELECT ancestor_num, code_point_id FROM code_point_ancestry WHERE ancestor_num IS NOT NULL").fetchall())
+        old_ancestors = {cp: set(ancestor_ids[num[0]] for num in struct.iter_unpack('<H', packed)) for cp, packed in cursor.execute(f"""
+            SELECT code_point_id, ancestor_nums FROM code_point_ancestry WHERE code_point_id IN ({', '.join(str(x) for x in descendants)})""")}
+        ancestors, parents = self._get_ancestor_closure(cursor, nodes)
+        # those gained or lost as an ancestor by a descendant, which includes the changed children's parents which joined or left the graph
+        changed_ancestors = set().union(*(old_ancestors.get(cp, set()) ^ ancestors[cp] for cp in descendants)) - {no_parent_id}
+        candidate_str = ', '.join(str(x) for x in nodes | changed_ancestors)
+        graph_nodes = set(x[0] for x in cursor.execute(f"""
+            SELECT child_id FROM code_point_derivation WHERE child_id IN ({candidate_str})
+            UNION SELECT parent_id FROM code_point_derivation WHERE parent_id IN ({candidate_str})""").fetchall())
+        is_ancestor = set(x[0] for x in cursor.execute(f"SELECT DISTINCT parent_id FROM code_point_derivation WHERE parent_id IN ({candidate_str})"))
+
+        # those which left the graph (derived from or to nothing else) lose their rows, those which are no longer an ancestor their number
+        removed = [(cp,) for cp in (nodes | changed_ancestors) - graph_nodes]
+        cursor.executemany("DELETE FROM code_point_lineage_stats WHERE code_point_id = ?", removed)
+        cursor.executemany("DELETE FROM code_point_ancestry WHERE code_point_id = ?", removed)
+        ancestor_nums = {cp: num for num, cp in ancestor_ids.items()}
+        cursor.executemany("UPDATE code_point_ancestry SET ancestor_num = NULL WHERE code_point_id = ?",
+                           [(cp,) for cp in ancestor_nums if cp in changed_ancestors and cp not in is_ancestor])
+        next_num = max(ancestor_ids, default=-1) + 1
+        for cp in sorted(is_ancestor - set(ancestor_nums)):
+            ancestor_nums[cp], next_num = next_num, next_num + 1
+        if next_num > 0xFFFF:
+            raise ValueError("Ancestor numbers no longer fit in 2 bytes, code_point_ancestry format needs updating")
+        cursor.executemany("INSERT OR REPLACE INTO code_point_ancestry (code_point_id, ancestor_num, ancestor_nums) VALUES (?, ?, ?)",
+                           [(cp, ancestor_nums.get(cp) if cp in is_ancestor else None,
+                             struct.pack(f"<{len(ancestors[cp])}H", *sorted(ancestor_nums[a] for a in ancestors[cp]))) for cp in nodes & graph_nodes])
+        cursor.executemany("UPDATE code_point_ancestry SET ancestor_num = ? WHERE code_point_id = ?",
+                           [(ancestor_nums[cp], cp) for cp in is_ancestor - nodes if cp in changed_ancestors])
+
+        # depth and root as in _load_code_point_lineage_stats, those of the parents outside the nodes being unchanged
+        stats = {x[0]: list(x[1:]) for x in cursor.execute(f"""
+            SELECT s.code_point_id, s.ancestry_depth, s.root_ancestor_id, s.descendant_count, s.descendant_script_count, length(a.ancestor_nums) / 2
+            FROM code_point_lineage_stats s INNER JOIN code_point_ancestry a ON a.code_point_id = s.code_point_id
+            WHERE s.code_point_id IN ({', '.join(str(x) for x in set().union(*parents.values()) | changed_ancestors)})""")}
+        for cp in sorted(nodes & graph_nodes, key=lambda x: len(ancestors[x])):
+            depth, root = 0, cp
+            for parent in parents.get(cp, ()):
+                if parent == no_parent_id or (len(ancestors[parent]) if parent in nodes else stats[parent][4]) >= len(ancestors[cp]):
+                    continue
+                if (stats[parent][0] + 1, -stats[parent][1]) > (depth, -root):
+                    depth, root = stats[parent][0] + 1, stats[parent][1]
+            stats[cp] = [depth, root] + stats.get(cp, [0, 0, 0, 0])[2:4] + [len(ancestors[cp])]
+
+        # descendant counts of the changed ancestors, recounted. Code points with an equivalent sequence aren't counted
+        for cp in changed_ancestors & graph_nodes:
+            stats[cp][2:4] = [0, 0]
+        for cp, descendant_count, descendant_script_count in cursor.execute(f"""
+                WITH RECURSIVE descendant(ancestor_id, id) AS (
+                    SELECT parent_id, child_id FROM code_point_derivation WHERE parent_id IN ({', '.join(str(x) for x in changed_ancestors)})
+                    UNION
+                    SELECT d.ancestor_id, deriv.child_id FROM descendant d INNER JOIN code_point_derivation deriv ON deriv.parent_id = d.id)
+                SELECT d.ancestor_id, COUNT(*), COUNT(DISTINCT NULLIF(cp.script_code, a.script_code))
+                FROM descendant d INNER JOIN code_point cp ON cp.id = d.id INNER JOIN code_point a ON a.id = d.ancestor_id
+                WHERE cp.equivalent_sequence_id IS NULL AND d.id <> d.ancestor_id  -- not its own ancestor in a cycle
+                GROUP BY d.ancestor_id""").fetchall():
+            stats[cp][2:4] = [descendant_count, descendant_script_count]
+        cursor.executemany("""
+            INSERT OR REPLACE INTO code_point_lineage_stats (code_point_id, ancestry_depth, root_ancestor_id, descendant_count, descendant_script_count)
+            VALUES (?, ?, ?, ?, ?)""",
+            [(cp, *stats[cp][:4]) for cp in (nodes | changed_ancestors) & graph_nodes if cp != no_parent_id])
+        return descendants
+
+
     def _drop_unused_languages(self, cursor):
+        # NOT EXISTS rather than NOT IN: script.main_lang_code is frequently NULL, which makes a NOT IN never true
         cursor.execute("""
             DELETE FROM language
             WHERE 
-                code NOT IN (SELECT lang_code FROM alphabet) 
-                AND code NOT IN (SELECT main_lang_code FROM script)
-                AND code NOT IN (  -- language is not a macro to a sublanguage that is used
-                    SELECT macrolanguage_code FROM alphabet a INNER JOIN language lsub ON lsub.code = a.lang_code WHERE macrolanguage_code IS NOT NULL)""")
+                NOT EXISTS (SELECT * FROM alphabet a WHERE a.lang_code = language.code) 
+                AND NOT EXISTS (SELECT * FROM script s WHERE s.main_lang_code = language.code)
+                AND NOT EXISTS (  -- language is not a macro to a sublanguage that is used
+                    SELECT * FROM language lsub
+                    WHERE 
+                        lsub.macrolanguage_code = language.code 
+                        AND (EXISTS (SELECT * FROM alphabet a WHERE a.lang_code = lsub.code) 
+                             OR EXISTS (SELECT * FROM script s WHERE s.main_lang_code = lsub.code)))""")
+
+
+    def _get_kept_scripts(self, cursor, include_scripts, exclude_scripts):
+        if include_scripts is None and exclude_scripts is None:
+            return None
+
+        all_scripts = set(x[0] for x in cursor.execute("SELECT code FROM script").fetchall())
+        for script_list in (include_scripts, exclude_scripts):
+            if script_list:
+                unknown = set(script_list) - all_scripts
+                if unknown:
+                    raise ValueError(f"Unknown script codes: {', '.join(sorted(unknown))}")
+
+        kept_scripts = set(include_scripts) if include_scripts is not None else all_scripts
+        if exclude_scripts:
+            kept_scripts -= set(exclude_scripts)
+        return kept_scripts
+
+
+    # Resolved from the source files before anything is loaded, so the loaders can skip the rest: the kept scripts, the scripts shared by
+    # all and the ancestor scripts the letter generators derive the kept ones from are loaded in full. Of other scripts, only the code points
+    # in the declared lineage of those are (derivation files, decompositions, case mappings, the Unihan and Unikemet relations).
+    # Lineage only generated from the code point names of a partially loaded script is left out
+    def _get_script_subset(self, cursor, kept_scripts):
+        # letters of these are derived from the same letters of the parent script
+        letter_scripts = (set(self._get_indic_letter_dict(cursor, False)) | set(self._get_semitic_letter_dict())) - set(self._EXCLUDED_GEN_CODES)
+        # a script variant (eg. Simplified Han) is written with the code points of its canonical script
+        main_scripts = kept_scripts | set(x[0] for x in cursor.execute(f"""
+            SELECT canonical_script_code FROM script WHERE code IN {self._get_sql_in_str_list(kept_scripts)} AND canonical_script_code IS NOT NULL""").fetchall())
+        scripts = {self.COMMON_SCRIPT, self.INHERITED_SCRIPT, self.UNKNOWN_SCRIPT} | main_scripts
+        def add_letter_parent_scripts(script_code):
+            while script_code in letter_scripts:
+                script_code = cursor.execute("SELECT main_parent_code FROM script WHERE code = ?", (script_code,)).fetchone()[0]
+                if script_code:
+                    scripts.add(script_code)
+        for script_code in main_scripts:
+            add_letter_parent_scripts(script_code)
+
+        script_ranges = []  # sorted (range, script code)
+        script_codes = dict(cursor.execute("SELECT u_alias, code FROM script WHERE u_alias IS NOT NULL").fetchall())
+        with open(os.path.join(self._unicode_path, 'Scripts.txt'), 'r') as file:
+            for row in self._parse_data_file(file, ';'):
+                script_ranges.append((self._unicode_range(row[0]), script_codes[row[1].split('#')[0].strip()]))
+        script_ranges.sort(key=lambda x: x[0].start)
+        range_starts = [x[0].start for x in script_ranges]
+        manual_child_scripts = {}  # private use characters aren't in the Unicode scripts file
+
+        references = {}  # code point id -> ids of the code points its lineage (or a reference column) needs
+        def add_references(id, referenced_ids):
+            references.setdefault(id, set()).update(referenced_ids)
+
+        with open(os.path.join(self._unicode_path, 'UnicodeData.txt'), 'r') as file:
+            for row in self._parse_data_file(file, ';'):
+                add_references(int(row[0], 16), [int(x, 16) for x in row[5].split(' ') + row[12:14] if x and not x.startswith('<')])
+        for script_code, rows in self._read_manual_derivation_rows().items():
+            for row in rows:
+                child_id = ord(row['Child'].strip())
+                add_references(child_id, [ord(x) if x else ord(self.NO_PARENT_CHARACTER) for x in row['Parent'].strip().split('/')])
+                manual_child_scripts[child_id] = script_code
+        with open(os.path.join(self._resource_path, 'position_distinction.csv')) as csvfile:
+            for row in csv.DictReader(csvfile):
+                add_references(ord(row['Char']), [ord(row['Equiv'])])
+        with open(os.path.join(self._unicode_path, 'Unihan_Variants.txt'), 'r') as file:
+            for row in self._parse_data_file(file, '\t'):
+                if row[1] == 'kZVariant':
+                    add_references(int(row[0][2:], 16), [int(x[2:].split('<')[0], 16) for x in row[2].strip().split(' ')])
+        with open(os.path.join(self._unicode_path, 'Unikemet.txt'), 'r') as file:
+            for row in self._parse_data_file(file, '\t'):
+                if row[1] == 'kEH_AltSeq':
+                    add_references(int(row[0][2:], 16), [int(x, 16) for x in row[2].strip().split(' ') if x and not x.isspace()])
+        derivations = self._get_awkward_manual_derivations() + self._get_simplified_chinese_derivations(cursor) + self._get_hieroglyph_derivations(cursor, False)
+        for derivation in derivations:
+            if derivation[1] is not None:
+                add_references(derivation[0], [derivation[1]])
+
+        def get_script_code(id):
+            i = bisect.bisect_right(range_starts, id) - 1
+            return script_ranges[i][1] if i >= 0 and id in script_ranges[i][0] else manual_child_scripts.get(id)
+
+        # The lineage of the loaded scripts, repeated until no more scripts are loaded: a script it reaches (eg. Hebrew by ש, a parent of
+        # Cyrillic Ш) may have its letters derived by the letter generators from the same letters of its parent scripts, which are loaded in full
+        lineage_code_points = set()
+        while True:
+            num_scripts = len(scripts)
+            unvisited = [ord(self.NO_PARENT_CHARACTER)] + [id for code_points, script_code in script_ranges if script_code in scripts for id in code_points]
+            unvisited.extend(id for id, script_code in manual_child_scripts.items() if script_code in scripts)
+            lineage_code_points.update(unvisited)
+            while unvisited:
+                for id in references.get(unvisited.pop(), ()):
+                    if id not in lineage_code_points:
+                        lineage_code_points.add(id)
+                        unvisited.append(id)
+            for script_code in set(get_script_code(id) for id in lineage_code_points):
+                add_letter_parent_scripts(script_code)
+            if len(scripts) == num_scripts:
+                break
+
+        subset = self._ScriptSubset()
+        subset.kept_scripts = kept_scripts
+        subset.scripts = scripts
+        subset.lineage_code_points = lineage_code_points
+        return subset
+
+
+    def _is_kept_script(self, script_code):
+        return self._script_subset is None or script_code in self._script_subset.kept_scripts
+
+
+    def _is_loaded_code_point(self, id):
+        return self._script_subset is None or id in self._script_subset.code_points
+
+
+    # With compressed ranges code_point is a view (see _create_code_point_view) over code_point_individual, which the loaders write to, and code_point_range.
+    # The layout is switched by renaming the table, which also updates the FKs referencing it, with FKs off. Switching back to the table leaves the ranges'
+    # code points without a row until they're loaded again
+    def _set_code_point_layout(self, cursor, compress_ranges):
+        is_compressed = cursor.execute("SELECT * FROM sqlite_schema WHERE name = 'code_point_individual'").fetchone() is not None
+        if is_compressed and not compress_ranges:
+            self._drop_code_point_view(cursor)
+            cursor.execute("DROP INDEX IF EXISTS idx_seq_text")  # not there with compact storage alone (see _compact_storage)
+            cursor.execute("ALTER TABLE code_point_individual RENAME TO code_point")
+            table_sql = cursor.execute("SELECT sql FROM sqlite_schema WHERE name = 'code_point'").fetchone()[0]
+            self._rebuild_table(cursor, 'code_point', re.sub(r'\b(text TEXT) (GENERATED .*) VIRTUAL', r'\1 UNIQUE \2 STORED', table_sql))
+        elif compress_ranges and not is_compressed:
+            # the text is searched with idx_seq_text instead, for the code points of both tables
+            table_sql = cursor.execute("SELECT sql FROM sqlite_schema WHERE name = 'code_point'").fetchone()[0]
+            self._rebuild_table(cursor, 'code_point', re.sub(r'\b(text TEXT) UNIQUE (GENERATED .*) STORED', r'\1 \2 VIRTUAL', table_sql))
+            cursor.execute("ALTER TABLE code_point RENAME TO code_point_individual")
+            cursor.execute(f"CREATE INDEX idx_seq_text ON sequence({self._get_code_point_text_expression('id')}) WHERE id <= {self.UNICODE_MAX}")
+            self._create_code_point_view(cursor)
+        self._code_point_table = 'code_point_individual' if compress_ranges else 'code_point'
+
+
+    # code_point.text computed from the id, so that the view over compressed ranges can search it with an index (idx_seq_text). It's NULL for
+    # Cn and Cs code points, of which the database only has the no parent character
+    def _get_code_point_text_expression(self, id_column):
+        return f"CASE WHEN {id_column} = {ord(self.NO_PARENT_CHARACTER)} THEN NULL ELSE CHAR({id_column}) END"
+
+
+    # The view lists the base sequences of the code points, which the ranges' code points keep (they're what the rest of the schema references),
+    # so searching it by id or text, or joining on id, are index searches as with the table. A LEFT JOIN rather than a UNION ALL, as SQLite can
+    # flatten it into the joins of the outer query. With compact storage (see _compact_storage) the view is over code_point_individual alone if
+    # ranges aren't compressed, and decodes the code columns stored as ids by joining their lookup tables
+    def _create_code_point_view(self, cursor):
+        columns = cursor.execute("PRAGMA table_xinfo(code_point_individual)").fetchall()
+        column_names = [x[1] for x in columns]
+        has_ranges = cursor.execute("SELECT * FROM sqlite_schema WHERE name = 'code_point_range'").fetchone() is not None
+        range_columns = [x[1] for x in cursor.execute("PRAGMA table_xinfo(code_point_range)").fetchall()] if has_ranges else []
+        code_columns = {v[0]: (c, v[1], v[2]) for c, v in self._COMPACT_CODE_COLUMNS.items() if v[0] in column_names}  # by id column
+
+        def get_value(column, column_type):
+            # cast to the column type, so that comparisons convert values as with the table (eg. word_count = 3, word_count being TEXT)
+            if column in range_columns:
+                return f"CAST(CASE WHEN i.id IS NULL THEN r.{column} ELSE i.{column} END AS {column_type})"
+            return f"i.{column}"  # always NULL for a range
+
+        view_columns = []
+        lookup_joins = []
+        for _, column, column_type, *_ in columns:
+            if not has_ranges:
+                view_columns.append(f"i.{column} AS {column}")
+            elif column == 'id':
+                view_columns.append("s.id AS id")
+            elif column == 'text':
+                view_columns.append(f"{self._get_code_point_text_expression('s.id')} AS text")
+            elif column == 'name':
+                view_columns.append(f"CAST(CASE WHEN i.id IS NULL THEN CONCAT(r.name_prefix, printf('%X', s.id)) ELSE i.name END AS {column_type}) AS name")
+            elif column == 'word_count':
+                view_columns.append(f"""CAST(CASE WHEN i.id IS NULL THEN LENGTH(r.name_prefix) - LENGTH(REPLACE(r.name_prefix, ' ', '')) + 1
+                                              ELSE i.word_count END AS {column_type}) AS word_count""")
+            else:
+                view_columns.append(f"{get_value(column, column_type)} AS {column}")
+            if column in code_columns:
+                code_column, lookup_table, lookup_id = code_columns[column]
+                view_columns.append(f"{lookup_table}.code AS {code_column}")
+                lookup_joins.append(f"INNER JOIN {lookup_table} ON {lookup_table}.{lookup_id} = {get_value(column, column_type)}")
+
+        view_column_str = ',\n                '.join(view_columns)
+        lookup_join_str = ''.join(f"\n                {join}" for join in lookup_joins)
+        if has_ranges:
+            cursor.execute(f"""
+                CREATE VIEW code_point AS
+                SELECT
+                    {view_column_str}
+                FROM
+                    sequence s
+                    LEFT JOIN code_point_individual i ON i.id = s.id
+                    LEFT JOIN code_point_range r ON i.id IS NULL AND s.id BETWEEN r.start_id AND r.end_id{lookup_join_str}
+                WHERE s.id <= {self.UNICODE_MAX} AND (i.id IS NOT NULL OR r.start_id IS NOT NULL)""")
+        else:
+            cursor.execute(f"""
+                CREATE VIEW code_point AS
+                SELECT
+                    {view_column_str}
+                FROM
+                    code_point_individual i{lookup_join_str}""")
+
+        # updates go to code_point_individual, a range's code point getting a row of its own, as it does when referenced by the loaded tables
+        stored_columns = [x[1] for x in columns if x[6] == 0]  # not generated
+        cursor.execute(f"""
+            CREATE TRIGGER trg_cp_update INSTEAD OF UPDATE ON code_point BEGIN
+                INSERT INTO code_point_individual ({', '.join(stored_columns)}) VALUES ({', '.join('NEW.' + c for c in stored_columns)})
+                ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in stored_columns if c != 'id')};
+            END""")
+        if not has_ranges:
+            return
+        copied_column_str = ', '.join(c for c in stored_columns if c in range_columns)
+        for table_name, id_columns in self._RANGE_REFERENCES.items():
+            if cursor.execute("SELECT * FROM sqlite_schema WHERE name = ?", (table_name,)).fetchone():  # may have been dropped by other load options
+                inserts = ''.join(f"""
+                    INSERT INTO code_point_individual (id, {copied_column_str})
+                    SELECT NEW.{id_column}, {copied_column_str} FROM code_point_range WHERE NEW.{id_column} BETWEEN start_id AND end_id
+                    ON CONFLICT DO NOTHING;""" for id_column in id_columns)
+                cursor.execute(f"CREATE TRIGGER trg_{table_name}_range BEFORE INSERT ON {table_name} BEGIN {inserts} END")
+
+
+    def _drop_code_point_view(self, cursor):
+        cursor.execute("DROP VIEW code_point")  # and its trigger
+        for table_name in self._RANGE_REFERENCES:
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table_name}_range")
+
+
+    # as well as from code_point_range, with compressed ranges the view being recreated without them
+    def _drop_code_point_columns(self, cursor, columns):
+        is_view = self._code_point_table != 'code_point'
+        if is_view:
+            self._drop_code_point_view(cursor)
+        range_columns = [x[1] for x in cursor.execute("PRAGMA table_xinfo(code_point_range)").fetchall()]
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {self._code_point_table} DROP COLUMN {column}")
+            if column in range_columns:
+                cursor.execute(f"ALTER TABLE code_point_range DROP COLUMN {column}")
+        if is_view:
+            self._create_code_point_view(cursor)
 
 
-    def _load_letter_derivation_data(self, cursor, letter_dict, letter_order, process_type_id, verify):
+    @staticmethod
+    def _get_code_id_sql(sql, column, id_column, ids_by_code):
+        # the code column's comparisons to literals (eg. general_category_code IN ('Cn', 'Cs') in the generated columns, or the partial index
+        # conditions) as comparisons of its id, -1 standing in for a code without an id (so that eg. <> still holds), and an index on the column
+        # as one on the id. Other uses of the code (eg. LIKE, or in an expression) have no id equivalent, so the schema can't be compacted
+        def encode(match):
+            return id_column + match.group(1) + re.sub(r"'([^']*)'", lambda code: str(ids_by_code.get(code.group(1), -1)), match.group(2))
+        sql = re.sub(rf"\b{column}(\s*(?:=|<>|!=|IN)\s*)(\([^)]*\)|'[^']*')", encode, sql)
+        sql = re.sub(rf'(\bON\s+"?\w+"?\s*\(\s*){column}(\s*\))', rf'\g<1>{id_column}\2', sql)
+        if re.search(rf'\b{column}\b', sql):
+            raise ValueError(f"Schema use of {column} not supported by compact storage: {sql}")
+        return sql
+
+
+    def _rebuild_table(self, cursor, table_name, create_sql, column_exprs=None):
+        # the usual create-copy-drop-rename, with FKs off. Indexes and triggers are recreated as is, views referencing the table must be dropped beforehand
+        index_sqls = [x[0] for x in cursor.execute("SELECT sql FROM sqlite_schema WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+                                                   (table_name,)).fetchall()]
+        cursor.execute(re.sub(r'^CREATE TABLE "?\w+"?', f'CREATE TABLE {table_name}_new', create_sql))
+        columns = [x[1] for x in cursor.execute(f"PRAGMA table_xinfo({table_name}_new)").fetchall() if x[6] == 0]  # not generated
+        exprs = [column_exprs[c] if column_exprs and c in column_exprs else c for c in columns]
+        cursor.execute(f"INSERT INTO {table_name}_new ({', '.join(columns)}) SELECT {', '.join(exprs)} FROM {table_name}")
+        cursor.execute(f"DROP TABLE {table_name}")
+        cursor.execute(f"ALTER TABLE {table_name}_new RENAME TO {table_name}")
+        for index_sql in index_sqls:
+            cursor.execute(index_sql)
+
+
+    def _compact_storage(self, cursor):
+        is_compressed = self._code_point_table != 'code_point'
+        if is_compressed:
+            self._drop_code_point_view(cursor)
+        views = cursor.execute("SELECT name, sql FROM sqlite_schema WHERE type = 'view'").fetchall()
+        for view in views:
+            cursor.execute(f"DROP VIEW {view[0]}")
+
+        for table_name in self._COMPACT_LINK_TABLES:
+            table_sql = cursor.execute("SELECT sql FROM sqlite_schema WHERE type = 'table' AND name = ?", (table_name,)).fetchone()
+            if table_sql:  # may have been dropped by other load options
+                self._rebuild_table(cursor, table_name, re.sub(r'\)\s*STRICT\s*$', ') STRICT, WITHOUT ROWID', table_sql[0]))
+
+        cp_columns = [x[1] for x in cursor.execute(f"PRAGMA table_xinfo({self._code_point_table})").fetchall()]
+        code_columns = {c: v for c, v in self._COMPACT_CODE_COLUMNS.items() if c in cp_columns}
+        ids_by_code = {}
+        for column, (id_column, lookup_table, lookup_id) in code_columns.items():
+            if lookup_table != 'script':  # no existing lookup, ids assigned by code order
+                cursor.execute(f"INSERT INTO {lookup_table} (code) SELECT DISTINCT {column} FROM {self._code_point_table} ORDER BY {column}")
+            ids_by_code[column] = dict(cursor.execute(f"SELECT code, {lookup_id} FROM {lookup_table}").fetchall())
+        for lookup_table in ('general_category', 'bidi_class'):
+            if lookup_table not in [v[1] for v in code_columns.values()]:
+                cursor.execute(f"DROP TABLE {lookup_table}")
+
+        # the code columns are stored as the id instead, which the code point view decodes (so existing queries on them keep working),
+        # and the generated columns and indexes using them use the id
+        for table_name in (self._code_point_table, 'code_point_range'):
+            table_sql = cursor.execute("SELECT sql FROM sqlite_schema WHERE type = 'table' AND name = ?", (table_name,)).fetchone()
+            if not table_sql:
+                continue
+            table_sql = table_sql[0]
+            index_sqls = cursor.execute("SELECT name, sql FROM sqlite_schema WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                                        (table_name,)).fetchall()
+            index_sqls = [x for x in index_sqls if any(re.search(rf'\b{c}\b', x[1]) for c in code_columns)]
+            for index_name, _ in index_sqls:
+                cursor.execute(f"DROP INDEX {index_name}")
+            copy_exprs = {}
+            for column, (id_column, lookup_table, lookup_id) in code_columns.items():
+                table_sql = re.sub(rf'\b{column} TEXT[^,\n]*', f"{id_column} INTEGER NOT NULL REFERENCES {lookup_table} ({lookup_id})", table_sql, count=1)
+                table_sql = self._get_code_id_sql(table_sql, column, id_column, ids_by_code[column])
+                copy_exprs[id_column] = f"(SELECT {lookup_id} FROM {lookup_table} WHERE code = {column})"
+            self._rebuild_table(cursor, table_name, table_sql, copy_exprs)
+            for _, index_sql in index_sqls:
+                for column, (id_column, _, _) in code_columns.items():
+                    index_sql = self._get_code_id_sql(index_sql, column, id_column, ids_by_code[column])
+                cursor.execute(index_sql)
+
+        if not is_compressed:
+            cursor.execute("ALTER TABLE code_point RENAME TO code_point_individual")
+            self._code_point_table = 'code_point_individual'
+        self._create_code_point_view(cursor)
+        for view in views:
+            cursor.execute(view[1])
+
+
+    def _get_storage_report(self, cursor):
+        # size of the used pages (so only comparable to another report after a VACUUM), and latencies of some typical queries
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        used_pages = cursor.execute("PRAGMA page_count").fetchone()[0] - cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        queries = [('Code point by id', "SELECT * FROM code_point WHERE id = ?", (ord('a'),)),
+                   ('Code point by text', "SELECT * FROM code_point WHERE text = ?", ('a',)),
+                   ('Derivation children', "SELECT * FROM code_point_derivation WHERE parent_id = ?", (ord('A'),)),
+                   ('Sequence items', "SELECT * FROM sequence_item WHERE sequence_id = (SELECT MAX(sequence_id) FROM alphabet)", ()),
+                   ('Script code points', "SELECT COUNT(*) FROM code_point WHERE script_code = ?", ('Latn',)),
+                   ('Character ancestors', None, 'Get Character Ancestors'),
+                   ('Script coverage', None, 'Script coverage')]
+        latencies = {}
+        for name, query, parameters in queries:
+            if not query:
+                with open(self._get_unique_saved_query(parameters)) as file:
+                    query = file.read()
+                parameters = ('a',) if '?' in query else ()
+            start = time.perf_counter()
+            for _ in range(5):
+                cursor.execute(query, parameters).fetchall()
+            latencies[name] = (time.perf_counter() - start) / 5 * 1000
+        return used_pages * page_size / 1000000, latencies
+
+
+    def _get_letter_derivations(self, cursor, letter_dict, letter_order):
+        derivations = []
         for script_code in letter_dict:
             if script_code not in ScriptDatabase._EXCLUDED_GEN_CODES:
                 parent_code = cursor.execute("SELECT main_parent_code FROM script WHERE code = ?", (script_code,)).fetchone()[0]
@@ -1625,10 +2597,11 @@ class ScriptDatabase:
                         if len(parent_letters) == 1:
                             letters = letter_dict[script_code][letter_class]
                             if len(letters) == 1:  # previously allowed multiple, but this is too inaccurate
-                                self._load_single_derivation(cursor, ord(letters[0]), ord(parent_letters[0]), DerivationType.DEFAULT, Certainty.VARIED, process_type_id)
+                                derivations.append((ord(letters[0]), ord(parent_letters[0]), DerivationType.DEFAULT.value, Certainty.VARIED.value, 1))
+        return derivations
 
 
-    def _verify_script_coverage(self, cursor):
+    def _verify_script_coverage(self, cursor, kept_scripts=None):
         results = [('Script', 'Missing characters')]
 
         def verify_seq(seq_id):
@@ -1643,6 +2616,8 @@ class ScriptDatabase:
         scripts = cursor.execute("SELECT name, code FROM script WHERE code NOT IN (?, ?) AND (u_alias IS NOT NULL OR code like 'Q%') ORDER BY name",
                                  (self.COMMON_SCRIPT, self.INHERITED_SCRIPT)).fetchall()
         for script in scripts:
+            if kept_scripts is not None and script[1] not in kept_scripts:
+                continue  # pruned by a script subset load, only ancestor characters (if any) remain
             sequence_id = self._get_exemplar_sequence_id_with_fallback(cursor, script[1])
             if sequence_id:
                 script_result = verify_seq(sequence_id)
@@ -1655,12 +2630,45 @@ class ScriptDatabase:
         self.print_table(results)
 
 
+    def _verify_query_plans(self, cursor):
+        # a regression check: a full scan of a table (rather than of a CTE) means an index is missing or no longer used
+        queries = {}
+        for query_name, parameters in self._INDEXED_SAVED_QUERIES.items():
+            with open(self._get_unique_saved_query(query_name)) as file:
+                queries[query_name] = (file.read(), parameters)
+        for query_name, (query, parameters) in self._INDEXED_QUERIES.items():
+            queries[query_name] = (query.format(named_table=self._get_named_code_point_table()), parameters)
+
+        full_scans = []
+        for query_name, (query, parameters) in queries.items():
+            cte_names = set(re.findall(r'(\w+)\s*(?:\([\w\s,]*\))?\s+AS\s*\(', query))
+            cte_names |= set(alias for cte in cte_names for alias in re.findall(rf'\b{cte}\s+(?:AS\s+)?(\w+)', query))
+            loop_parents = set()
+            for _, parent_id, _, detail in cursor.execute(f"EXPLAIN QUERY PLAN {query}", parameters).fetchall():
+                loop = re.match(r'(SCAN|SEARCH) (\w+)(?: .*\((.*)\))?$', detail)
+                if not loop:
+                    continue
+                is_outer_loop = parent_id not in loop_parents  # the plan lists the loops of a (sub)query from the outermost
+                loop_parents.add(parent_id)
+                if loop.group(2) in cte_names or 'CONSTANT ROW' in detail:
+                    continue
+                # a search by a single bound is a scan of most of the table as the outer loop, eg. of the sequences up to UNICODE_MAX
+                # for the code point view over compressed ranges (see _create_code_point_view), rather than searching them by id
+                is_open_range = is_outer_loop and loop.group(3) and re.fullmatch(r'\w+[<>]=?\?', loop.group(3))
+                if loop.group(1) == 'SCAN' or is_open_range or 'AUTOMATIC' in detail:  # an automatic index is built with a full scan
+                    full_scans.append(f"{query_name}: {detail}")
+        if full_scans:
+            raise ValueError("Full scan in query plan of indexed queries:\n" + "\n".join(full_scans))
+
+
     def _parse_cldr_exemplar_set(self, cursor, cldr_str, parse_data, verify):
         def add_char(p_data, char, in_multi_code_point, verify):
             # First, get info from DB about char if needed
             if verify or p_data.script_code is None or p_data.letter_case is None:
                 cp_data = cursor.execute("SELECT general_category_code, script_code FROM code_point WHERE id = ?", (ord(char),)).fetchone()
-                if verify:
+                if cp_data is None:  # outside the script subset, so is the alphabet
+                    cp_data = (None, None)
+                if verify and cp_data[1]:
                     if (cp_data[1] not in (self.COMMON_SCRIPT, self.INHERITED_SCRIPT)
                             and p_data.script_code is not None
                             and p_data.script_code not in (cp_data[1], 'Hans', 'Hant')):
@@ -1768,7 +2776,10 @@ class ScriptDatabase:
                 katakana.append(c)
                 hiragana.append(c)
             elif c != ' ':
-                ja_script_code = cursor.execute("SELECT script_code FROM code_point WHERE text = ?", (c,)).fetchone()[0]
+                row = cursor.execute("SELECT script_code FROM code_point WHERE text = ?", (c,)).fetchone()
+                if row is None:
+                    continue  # outside the script subset, as is its alphabet
+                ja_script_code = row[0]
                 if ja_script_code == 'Kana':
                     katakana.append(c)
                 elif ja_script_code == 'Hira':
@@ -1783,24 +2794,27 @@ class ScriptDatabase:
         parse_data = self._CLDRParseData()
         source = SourceInfo('CLDR', 'main exemplar set')
 
-        parse_data.script_code = 'Kana'
         parse_data.letter_case = 'Lo'
-        parse_data.letters = katakana
-        self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
+        if self._is_kept_script('Kana'):
+            parse_data.script_code = 'Kana'
+            parse_data.letters = katakana
+            self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
 
-        parse_data.letters = hiragana
-        parse_data.script_code = 'Hira'
-        self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
+        if self._is_kept_script('Hira'):
+            parse_data.letters = hiragana
+            parse_data.script_code = 'Hira'
+            self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
 
-        parse_data.letters = kanji
-        parse_data.script_code = 'Hani'
-        self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
+        if self._is_kept_script('Hani'):
+            parse_data.letters = kanji
+            parse_data.script_code = 'Hani'
+            self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.EXTENDED, source)
 
-        parse_data.letters = kanji[0:len(kanji) // 2]
-        self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.FULL, source, notes='reduced set')
+            parse_data.letters = kanji[0:len(kanji) // 2]
+            self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.FULL, source, notes='reduced set')
 
-        parse_data.letters = kanji[0:len(kanji) // 4]
-        self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.BASIC, source, notes='reduced set')
+            parse_data.letters = kanji[0:len(kanji) // 4]
+            self._load_alphabet(cursor, 'ja', parse_data, AlphabetType.BASIC, source, notes='reduced set')
 
     # return as follows:
     # sequences of type letter and base return as a string
@@ -1908,35 +2922,67 @@ class ScriptDatabase:
 
         with open(os.path.join(self._resource_path, 'standard_alphabets.csv')) as csvfile:
             for row in csv.DictReader(csvfile):
-                parse_data = self._CLDRParseData()
-                parse_data.script_code = row['Script']
-                parse_data.letter_case = row['Case'][0:2]
-                lang_codes = row['Language']
-                alphabet_types = row['Alphabet Type'] if row['Alphabet Type'] else str(AlphabetType.BASIC.value)
-                alph_notes = row['Notes'] if row['Notes'] else None
-
-                self._parse_cldr_exemplar_set(cursor, row['Alphabet'], parse_data, verify)
-                if lang_codes:
-                    for lang_code in lang_codes.split('/'):
-                        for alphabet_type in alphabet_types.split('/'):
-                            exemplar_id = self._load_alphabet(cursor,
-                                                              lang_code,
-                                                              parse_data,
-                                                              AlphabetType(int(alphabet_type)),
-                                                              self._parse_raw_source(cursor, row['Source']),
-                                                              load_case_pair = '!' not in row['Case'],
-                                                              notes=alph_notes)
-                else:  # script-only exemplar
-                    exemplar_id = self._check_load_letter_sequence(cursor, parse_data.letters)
-
-                if str(AlphabetType.BASIC.value) in alphabet_types:  # TODO - a bit hacky, will fail if alphabet type ever gets to double digits
-                    cursor.execute("UPDATE script SET exemplar_sequence_id = ? WHERE code = ?", (exemplar_id, parse_data.script_code))
-
-                added_scripts.add(parse_data.script_code)
+                if self._is_kept_script(row['Script']):
+                    added_scripts.add(self._load_manual_alphabet(cursor, row, verify))
 
         return added_scripts
 
 
+    def _parse_manual_alphabet(self, cursor, row, verify):
+        parse_data = self._CLDRParseData()
+        parse_data.script_code = row['Script']
+        parse_data.letter_case = row['Case'][0:2]
+        self._parse_cldr_exemplar_set(cursor, row['Alphabet'], parse_data, verify)
+        return parse_data
+
+
+    # a row of standard_alphabets.csv, returns its script
+    def _load_manual_alphabet(self, cursor, row, verify):
+        parse_data = self._parse_manual_alphabet(cursor, row, verify)
+        lang_codes = row['Language']
+        alphabet_types = row['Alphabet Type'] if row['Alphabet Type'] else str(AlphabetType.BASIC.value)
+        alph_notes = row['Notes'] if row['Notes'] else None
+
+        if lang_codes:
+            for lang_code in lang_codes.split('/'):
+                for alphabet_type in alphabet_types.split('/'):
+                    exemplar_id = self._load_alphabet(cursor,
+                                                      lang_code,
+                                                      parse_data,
+                                                      AlphabetType(int(alphabet_type)),
+                                                      self._parse_raw_source(cursor, row['Source']),
+                                                      load_case_pair = '!' not in row['Case'],
+                                                      notes=alph_notes)
+        else:  # script-only exemplar
+            exemplar_id = self._check_load_letter_sequence(cursor, parse_data.letters)
+
+        if str(AlphabetType.BASIC.value) in alphabet_types:  # TODO - a bit hacky, will fail if alphabet type ever gets to double digits
+            cursor.execute("UPDATE script SET exemplar_sequence_id = ? WHERE code = ?", (exemplar_id, parse_data.script_code))
+
+        return parse_data.script_code
+
+
+    # undoes _load_manual_alphabet for a row of standard_alphabets.csv (its letter sequences are left)
+    def _delete_manual_alphabet(self, cursor, row):
+        parse_data = self._parse_manual_alphabet(cursor, row, False)
+        sequence_ids = [self._get_existing_letter_sequence_id(cursor, parse_data.letters)]
+        if '!' not in row['Case'] and parse_data.letter_case in ('Ll', 'Lu'):
+            sequence_ids.append(self._get_existing_letter_sequence_id(cursor, parse_data.alternate_letters))
+        alphabet_types = row['Alphabet Type'] if row['Alphabet Type'] else str(AlphabetType.BASIC.value)
+
+        for lang_code in row['Language'].split('/') if row['Language'] else []:
+            for sequence_id in sequence_ids:
+                cursor.executemany("DELETE FROM alphabet_source WHERE sequence_id = ? AND lang_code = ? AND alphabet_type_id = ?",
+                                   [(sequence_id, lang_code, int(alphabet_type)) for alphabet_type in alphabet_types.split('/')])
+                cursor.execute("""
+                    DELETE FROM alphabet
+                    WHERE sequence_id = ? AND lang_code = ?
+                        AND NOT EXISTS (SELECT * FROM alphabet_source s WHERE s.sequence_id = alphabet.sequence_id AND s.lang_code = alphabet.lang_code)""",
+                               (sequence_id, lang_code))
+        cursor.execute(f"UPDATE script SET exemplar_sequence_id = NULL WHERE code = ? AND exemplar_sequence_id IN ({','.join('?' * len(sequence_ids))})",
+                       (parse_data.script_code, *sequence_ids))
+
+
     def _load_cldr_alphabet_data(self, cursor, verify):
         def get_script_type_and_needed_alphabets(lang_code, script_code):
             # note this glosses over case: manually specified should always ensure both cases will be handled!
@@ -1985,6 +3031,8 @@ class ScriptDatabase:
             # No need to read CLDR if we already have manually specified data
             if not need_extended and not need_basic:
                 continue
+            if script_code_check and file_name != 'ja.xml' and not self._is_kept_script(script_code_check):
+                continue
 
             with (open(os.path.join(self._unicode_path, 'cldr', file_name), 'r') as file):
                 line_number = 0  # purely for debug
@@ -2032,6 +3080,8 @@ class ScriptDatabase:
 
                             if not script_code_check:  # we will now have inferred script
                                 script_code_check = parse_data.script_code
+                                if not self._is_kept_script(script_code_check):
+                                    break
                                 script_type, need_extended, need_basic = get_script_type_and_needed_alphabets(lang_code, script_code_check)
                                 if not need_basic and not need_extended:
                                     break
@@ -2105,7 +3155,7 @@ class ScriptDatabase:
                 parse_data.script_code = row['Script']
 
                 # generated data is a last-resort
-                if not parse_data.script_code in existing_scripts:
+                if not parse_data.script_code in existing_scripts and self._is_kept_script(parse_data.script_code):
                     self._parse_cldr_exemplar_set(cursor, row['Alphabet'], parse_data, verify)
 
                     # For generated stuff try to tag a language for a script if we can
@@ -2126,11 +3176,371 @@ class ScriptDatabase:
         self._load_generated_alphabet_data(cursor, added_scripts, verify)
 
 
+    # characters can be a sequence id (eg. an alphabet), a string or an iterable of characters (nested, like get_sequence output)
+    def _get_code_points(self, characters):
+        def add_code_points(item):
+            if isinstance(item, str):
+                code_points.update(ord(c) for c in item)
+            else:
+                for sub_item in item:
+                    add_code_points(sub_item)
+
+        if isinstance(characters, int):
+            characters = self.get_sequence(characters)
+        code_points = set()
+        add_code_points(characters)
+        return code_points
+
+
+    # All lineages are found in one traversal, with ancestors shared between code points computed once
+    # Returns the ancestor ids of each code point, and the parent ids of each code point in the lineages
+    def _get_ancestor_closure(self, cursor, code_points):
+        # Tarjan's algorithm, as the data may have cycles: ancestors are accumulated per strongly connected component
+        def visit(node):
+            index[node] = low[node] = len(index)
+            stack.append(node)
+            on_stack.add(node)
+            for parent in parents.get(node, ()):
+                if parent not in index:
+                    visit(parent)
+                    low[node] = min(low[node], low[parent])
+                elif parent in on_stack:
+                    low[node] = min(low[node], index[parent])
+            if low[node] == index[node]:  # root of a component, whose ancestors are all already computed
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.add(member)
+                    if member == node:
+                        break
+                component_ancestors = component.copy() if len(component) > 1 else set()
+                for member in component:
+                    for parent in parents.get(member, ()):
+                        if parent not in component:
+                            component_ancestors |= reached[parent] | {parent}
+                for member in component:
+                    reached[member] = component_ancestors
+
+        if not code_points:
+            return {}, {}
+
+        seed_str = ', '.join(str(cp) for cp in code_points)  # not VALUES, which is limited in the number of rows in a compound select
+        edges = cursor.execute(f"""
+            WITH RECURSIVE lineage(id) AS (
+                SELECT id FROM sequence WHERE id IN ({seed_str})
+                UNION
+                SELECT deriv.parent_id FROM lineage l INNER JOIN code_point_derivation deriv ON deriv.child_id = l.id
+            )
+            SELECT deriv.child_id, deriv.parent_id FROM lineage l INNER JOIN code_point_derivation deriv ON deriv.child_id = l.id""").fetchall()
+
+        parents = {}
+        for child_id, parent_id in edges:
+            parents.setdefault(child_id, set()).add(parent_id)
+
+        index, low, stack, on_stack, reached = {}, {}, [], set(), {}
+        for code_point in code_points:
+            if code_point not in index:
+                visit(code_point)
+
+        return {cp: reached[cp] - {cp} for cp in code_points}, parents
+
+
+    # characters as for _get_code_points
+    def get_lineages(self, characters):
+        cursor = self._cxn.cursor()
+        ancestors, parents = self._get_ancestor_closure(cursor, self._get_code_points(characters))
+        cursor.close()
+        return Lineage({chr(cp): set(chr(a) for a in cp_ancestors) for cp, cp_ancestors in ancestors.items()},
+                       {chr(child): set(chr(p) for p in cp_parents) for child, cp_parents in parents.items()})
+
+
+    def _get_ancestor_index(self):
+        if self._ancestor_index is None:
+            index = self._AncestorIndex()
+            for code_point_id, ancestor_num, packed in self._cxn.execute("SELECT code_point_id, ancestor_num, ancestor_nums FROM code_point_ancestry"):
+                bits = 0
+                for num in struct.iter_unpack('<H', packed):
+                    bits |= 1 << num[0]
+                index.bitsets[code_point_id] = bits
+                if ancestor_num is not None:
+                    index.code_points[ancestor_num] = code_point_id
+                    index.bits[code_point_id] = 1 << ancestor_num
+            index.no_parent_bit = index.bits.get(ord(self.NO_PARENT_CHARACTER), 0)
+            for child_id, parent_id in self._cxn.execute("SELECT child_id, parent_id FROM code_point_derivation"):
+                index.parents.setdefault(child_id, []).append(parent_id)
+            self._ancestor_index = index
+        return self._ancestor_index
+
+
+    # The ancestors of all the characters combined (characters as for _get_code_points), as a bitset usable with the following functions
+    def get_ancestor_bits(self, characters):
+        bitsets = self._get_ancestor_index().bitsets
+        bits = 0
+        for code_point in self._get_code_points(characters):
+            bits |= bitsets.get(code_point, 0)
+        return bits
+
+
+    def get_ancestors_from_bits(self, bits):
+        code_points = self._get_ancestor_index().code_points
+        retval = set()
+        while bits:
+            lowest_bit = bits & -bits
+            retval.add(chr(code_points[lowest_bit.bit_length() - 1]))
+            bits ^= lowest_bit
+        return retval
+
+
+    def get_shared_ancestors(self, characters_a, characters_b):
+        return self.get_ancestors_from_bits(self.get_ancestor_bits(characters_a) & self.get_ancestor_bits(characters_b))
+
+
+    def get_combined_ancestors(self, characters_a, characters_b):
+        return self.get_ancestors_from_bits(self.get_ancestor_bits(characters_a) | self.get_ancestor_bits(characters_b))
+
+
+    # Jaccard index of the ancestor sets: 0 for nothing in common, 1 for identical
+    def get_ancestry_similarity(self, characters_a, characters_b):
+        no_parent_bit = self._get_ancestor_index().no_parent_bit
+        bits_a = self.get_ancestor_bits(characters_a) & ~no_parent_bit
+        bits_b = self.get_ancestor_bits(characters_b) & ~no_parent_bit
+        union_count = (bits_a | bits_b).bit_count()
+        return (bits_a & bits_b).bit_count() / union_count if union_count else 0.0
+
+
+    def get_characters_sharing_ancestors(self, characters):
+        bits = self.get_ancestor_bits(characters)
+        return set(chr(cp) for cp, cp_bits in self._get_ancestor_index().bitsets.items() if cp_bits & bits)
+
+
+    # all pairs of alphabets (at least the given similarity), most similar first
+    def get_alphabet_ancestry_similarities(self, min_similarity=0.5):
+        alphabet_code_points = {}
+        for sequence_id, lang_code, script_code, letter_case, code_point in self._cxn.execute("""
+                WITH RECURSIVE alphabet_item (alphabet_sequence_id, item_id) AS (
+                    SELECT sequence_id, sequence_id FROM alphabet
+                    UNION
+                    SELECT ai.alphabet_sequence_id, si.item_id FROM alphabet_item ai INNER JOIN sequence_item si ON si.sequence_id = ai.item_id
+                )
+                SELECT a.sequence_id, a.lang_code, a.script_code, a.letter_case, ai.item_id
+                FROM alphabet a INNER JOIN alphabet_item ai ON ai.alphabet_sequence_id = a.sequence_id
+                WHERE ai.item_id <= ?""", (self.UNICODE_MAX,)):
+            alphabet_code_points.setdefault((sequence_id, lang_code, script_code, letter_case), []).append(code_point)
+
+        index = self._get_ancestor_index()
+        alphabets = []
+        for alphabet, code_points in alphabet_code_points.items():
+            bits = 0
+            for code_point in code_points:
+                bits |= index.bitsets.get(code_point, 0)
+            bits &= ~index.no_parent_bit
+            if bits:
+                alphabets.append((alphabet, bits, bits.bit_count()))
+
+        results = []
+        for i, (alphabet_a, bits_a, count_a) in enumerate(alphabets):
+            for alphabet_b, bits_b, count_b in alphabets[i + 1:]:
+                intersection_count = (bits_a & bits_b).bit_count()
+                similarity = intersection_count / (count_a + count_b - intersection_count)
+                if similarity >= min_similarity:
+                    results.append(alphabet_a[1:] + alphabet_b[1:] + (similarity,))
+
+        results.sort(key=lambda r: r[6], reverse=True)
+        return [('Language', 'Script', 'Case', 'Other Language', 'Other Script', 'Other Case', 'Similarity')] + [r[:6] + (f"{r[6]:.2f}",) for r in results]
+
+
+    # _get_code_points, except that a sequence id (such as a script's exemplar) contributes only its letters, as canonical ids. Letters are
+    # stored decomposed, so the marks of eg. Ё and Ä would otherwise make the diaeresis a common ancestor of Cyrillic and Latin
+    def _get_common_ancestor_code_points(self, characters):
+        code_points = self._get_code_points(characters)
+        if not isinstance(characters, int):
+            return code_points
+        code_points = set(ord(c) for c in self.canonicalize(chr(cp) for cp in code_points))
+        return set(row[0] for row in self._cxn.execute(f"""
+            SELECT id FROM code_point WHERE is_alphabetic AND equivalent_sequence_id IS NULL AND id IN ({','.join('?' * len(code_points))})""",
+            tuple(code_points)))
+
+
+    # characters as for _get_code_points, where a character counts as its own ancestor (so for 'a' and 'A', 'A' is a common ancestor)
+    # The no parent signal character isn't counted. With lowest_only, excludes those which are an ancestor of another common ancestor outside their cycle
+    def _get_common_ancestor_bits(self, code_points_a, code_points_b, lowest_only):
+        index = self._get_ancestor_index()
+        bits_a = bits_b = 0
+        for code_point in code_points_a:
+            bits_a |= index.bitsets.get(code_point, 0) | index.bits.get(code_point, 0)
+        for code_point in code_points_b:
+            bits_b |= index.bitsets.get(code_point, 0) | index.bits.get(code_point, 0)
+        common_bits = bits_a & bits_b & ~index.no_parent_bit
+
+        if lowest_only:
+            # Members of a cycle are each other's ancestors, so each cycle (strongly connected component) is collapsed to one member first.
+            # Those which aren't an ancestor of another component are the lowest, all members of their component being equally low
+            components = {}  # representative bit -> bits of its component
+            remaining_bits = common_bits
+            while remaining_bits:
+                lowest_bit = remaining_bits & -remaining_bits
+                component_bits = lowest_bit
+                ancestor_bits = index.bitsets[index.code_points[lowest_bit.bit_length() - 1]]
+                while ancestor_bits:  # the ancestors having it as an ancestor too
+                    ancestor_bit = ancestor_bits & -ancestor_bits
+                    if index.bitsets.get(index.code_points[ancestor_bit.bit_length() - 1], 0) & lowest_bit:
+                        component_bits |= ancestor_bit
+                    ancestor_bits ^= ancestor_bit
+                components[lowest_bit] = component_bits
+                remaining_bits &= ~component_bits
+
+            representative_bits = sum(components)
+            for bit, component_bits in components.items():
+                representative_bits &= ~(index.bitsets[index.code_points[bit.bit_length() - 1]] & ~component_bits)
+            common_bits = 0
+            for bit, component_bits in components.items():
+                if representative_bits & bit:
+                    common_bits |= component_bits
+        return common_bits
+
+
+    def get_common_ancestors(self, characters_a, characters_b, lowest_only=False):
+        return self.get_ancestors_from_bits(self._get_common_ancestor_bits(self._get_common_ancestor_code_points(characters_a),
+                                                                           self._get_common_ancestor_code_points(characters_b), lowest_only))
+
+
+    # Of the lowest common ancestors, the one with the fewest derivation steps to a and b combined. Ties go to the more derived (having
+    # more ancestors of its own), then the lower code point. None if there is no common ancestor
+    def get_closest_common_ancestor(self, characters_a, characters_b):
+        def get_distances(code_points):  # breadth first over parents
+            distances = {code_point: 0 for code_point in code_points}
+            frontier = list(code_points)
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    for parent in index.parents.get(node, ()):
+                        if parent not in distances:
+                            distances[parent] = distances[node] + 1
+                            next_frontier.append(parent)
+                frontier = next_frontier
+            return distances
+
+        index = self._get_ancestor_index()
+        code_points_a = self._get_common_ancestor_code_points(characters_a)
+        code_points_b = self._get_common_ancestor_code_points(characters_b)
+        lowest_bits = self._get_common_ancestor_bits(code_points_a, code_points_b, True)
+        if not lowest_bits:
+            return None
+
+        candidates = []
+        while lowest_bits:
+            lowest_bit = lowest_bits & -lowest_bits
+            candidates.append(index.code_points[lowest_bit.bit_length() - 1])
+            lowest_bits ^= lowest_bit
+        distances_a = get_distances(code_points_a)
+        distances_b = get_distances(code_points_b)
+        return chr(min(candidates, key=lambda c: (distances_a[c] + distances_b[c], -index.bitsets.get(c, 0).bit_count(), c)))
+
+
+    # The most credible derivation paths from descendant up to ancestor (characters), best first, at most max_paths of them
+    # Paths are found best first over the part of the derivation graph which can reach the ancestor, so only max_paths complete paths are built
+    # certainty_costs (certainty type id -> cost) overrides the default costs of just the certainties it has
+    def get_derivation_paths(self, descendant, ancestor, max_paths=3, certainty_costs=None):
+        certainty_costs = {**self._CERTAINTY_PATH_COSTS, **(certainty_costs or {})}
+        index = self._get_ancestor_index()
+        start, target = ord(descendant), ord(ancestor)
+        target_bit = index.bits.get(target, 0)
+        if not target_bit & index.bitsets.get(start, 0):
+            return []
+
+        cursor = self._cxn.cursor()
+        edges = {}  # child id -> [(parent id, cost)], restricted to parents which are or can reach the ancestor
+        found = []
+        queue = [(0, (start,))]
+        while queue and len(found) < max_paths:
+            cost, path = heapq.heappop(queue)
+            child_id = path[-1]
+            if child_id == target:
+                found.append((cost, path))
+                continue
+            if child_id not in edges:
+                edges[child_id] = [(parent_id, certainty_costs[certainty_type_id]) for parent_id, certainty_type_id in cursor.execute(
+                                       "SELECT parent_id, certainty_type_id FROM code_point_derivation WHERE child_id = ?", (child_id,))
+                                   if parent_id == target or target_bit & index.bitsets.get(parent_id, 0)]
+            for parent_id, edge_cost in edges[child_id]:
+                if parent_id not in path:  # the data has cycles
+                    heapq.heappush(queue, (cost + edge_cost, path + (parent_id,)))
+
+        retval = [DerivationPath([chr(c) for c in path], cost, [self._get_derivation_step(cursor, path[i], path[i + 1]) for i in range(len(path) - 1)])
+                  for cost, path in found]
+        cursor.close()
+        return retval
+
+
+    def _get_derivation_step(self, cursor, child_id, parent_id):
+        certainty_type_id, process_type_id, process_name, multiplicity, notes = cursor.execute("""
+            SELECT cpd.certainty_type_id, cpd.process_type_id, pt.name, cpd.multiplicity, cpd.notes
+            FROM code_point_derivation cpd INNER JOIN process_type pt ON pt.id = cpd.process_type_id
+            WHERE cpd.child_id = ? AND cpd.parent_id = ?""", (child_id, parent_id)).fetchone()
+
+        # manual sources are specific to the derivation, process sources are for the process in general
+        sources = [SourceInfo(*row) for row in cursor.execute("""
+            SELECT s.citation_key, mds.section, mds.access_date
+            FROM manual_derivation_source mds INNER JOIN source s ON s.id = mds.source_id
+            WHERE mds.child_id = ? AND mds.parent_id = ?
+            UNION ALL
+            SELECT s.citation_key, ps.section, ps.access_date
+            FROM process_source ps INNER JOIN source s ON s.id = ps.source_id
+            WHERE ps.process_type_id = ?""", (child_id, parent_id, process_type_id))]
+
+        return {'child': chr(child_id), 'parent': chr(parent_id), 'certainty': Certainty(certainty_type_id), 'process': process_name,
+                'multiplicity': multiplicity, 'notes': notes, 'sources': sources}
+
+
+    # The name index is on the code point rows (see idx_cp_name), which are in code_point_individual when ranges are compressed
+    def _get_named_code_point_table(self):
+        if self._cxn.execute("SELECT * FROM sqlite_schema WHERE name = 'code_point_individual'").fetchone():
+            return 'code_point_individual'
+        return 'code_point'
+
+
+    # Exact (Unicode or alternate) name lookup, as the characters with that name
+    def get_code_points_by_name(self, name):
+        name = name.upper()
+        id_match = re.fullmatch(r'.*[- ]([0-9A-F]{4,6})', name)  # possibly a name derived from the id, see code_point.name
+        if id_match and self._cxn.execute("SELECT * FROM code_point WHERE id = ? AND name = ?", (int(id_match[1], 16), name)).fetchone():
+            return [chr(int(id_match[1], 16))]
+        return [chr(x[0]) for x in self._cxn.execute(f"""
+            SELECT id FROM {self._get_named_code_point_table()} WHERE name = ? AND (raw_name IS NOT NULL OR alt_name IS NOT NULL)""", (name,))]
+
+
+    # Names starting with the given prefix, as (character, name) in name order. Names derived from the code point id
+    # (eg. CJK UNIFIED IDEOGRAPH-4E00) aren't stored, so aren't found by prefix
+    def get_code_points_by_name_prefix(self, prefix, limit=None):
+        prefix = prefix.upper()
+        if not prefix:
+            raise ValueError("Empty name prefix")
+        limit_str = f" LIMIT {int(limit)}" if limit else ''
+        return [(chr(x[0]), x[1]) for x in self._cxn.execute(f"""
+            SELECT id, name FROM {self._get_named_code_point_table()}
+            WHERE name >= ? AND name < ? AND (raw_name IS NOT NULL OR alt_name IS NOT NULL)
+            ORDER BY name{limit_str}""", (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))]
+
+
+    # characters with each code point replaced by its canonical equivalent
+    def canonicalize(self, characters):
+        if self._canonical_ids is None:
+            self._canonical_ids = dict(self._cxn.execute("SELECT id, canonical_id FROM code_point WHERE canonical_id IS NOT NULL").fetchall())
+        return ''.join(chr(self._canonical_ids.get(ord(c), ord(c))) for c in characters)
+
+
+    # for passing a script's letters to the lineage functions
+    def get_exemplar_sequence_id(self, script_code):
+        return self._get_exemplar_sequence_id_with_fallback(self._cxn.cursor(), script_code)
+
+
     def get_code_point_script_parents(self, id, scripts_to_skip=None):
         return self._get_code_point_script_parents(self._cxn.cursor(), id, option, 1)
 
 
-    def _get_code_point_script_parents(self, cursor, id, scripts_to_skip=None, weight=1):
+    # path: the code points passed through so far, a derivation back onto it (a cycle in the data) counting as missing data
+    def _get_code_point_script_parents(self, cursor, id, scripts_to_skip=None, weight=1, path=()):
         retval = {}
         temp = cursor.execute("SELECT script_code FROM code_point WHERE id = ? AND is_independently_graphical", (id,)).fetchall()
         if not temp:
@@ -2151,7 +3561,10 @@ class ScriptDatabase:
                 if scripts_to_skip and parent[1] in scripts_to_skip:
                     if parent[0] in (22888, 22892):
                         raise ValueError("Currently a cycle in the data")  # TODO
-                    grand_parents = self._get_code_point_script_parents(cursor, parent[0], scripts_to_skip, weight / num_parents)
+                    if parent[0] == id or parent[0] in path:
+                        self._add_or_increment_dict_entry(retval, '', weight / num_parents)
+                        continue
+                    grand_parents = self._get_code_point_script_parents(cursor, parent[0], scripts_to_skip, weight / num_parents, path + (id,))
                     for grand_parent in grand_parents:
                         self._add_or_increment_dict_entry(retval, grand_parent, grand_parents[grand_parent])
                 else: # different parent script
@@ -2234,6 +3647,16 @@ class ScriptDatabase:
 
         return retval
 
+    def _get_parent_script_name(self, cursor, script_code):
+        if script_code == self.COMMON_SCRIPT:
+            return '(symbol)' # probably
+        if script_code == 'Zzzz':  # only the signal U+FFFF character
+            return '(original/unknown)'
+        if script_code == '':
+            return '(missing data)'
+        return cursor.execute("SELECT name FROM script WHERE code = ?", (script_code,)).fetchone()[0]
+
+
     # Script skipping has two main uses: Can avoid self-derivation, and avoid a parent script you think isn't that distinct
     def get_script_parents(self, script_code, scripts_to_skip=None):
         real_skips = set()
@@ -2259,16 +3682,9 @@ class ScriptDatabase:
         missing_data = 0
         for script, value in sorted(raw_results.items(), key=lambda item: item[1], reverse=True):
             total += value
-            if script == self.COMMON_SCRIPT:
-                script_name = '(symbol)' # probably
-            elif script == 'Zzzz':  # only the signal U+FFFF character
-                script_name = '(original/unknown)'
-            elif script == '':
-                script_name = '(missing data)'
+            if script == '':
                 missing_data = value
-            else:
-                script_name = cursor.execute("SELECT name FROM script WHERE code = ?", (script,)).fetchone()[0]
-            results.append((script_name, f"{value:.2f}"))
+            results.append((self._get_parent_script_name(cursor, script), f"{value:.2f}"))
 
         results.append((" -- Total:", round(total))) # rounding for floating point imprecision
         if missing_data:
@@ -2276,108 +3692,1116 @@ class ScriptDatabase:
         return results
 
 
+    # Counts the characters of a UTF-8 file between two byte offsets, each moved forward to the start of a character so that adjacent
+    # ranges count every character exactly once
+    @staticmethod
+    def _count_file_characters(path, start, end, chunk_size):
+        def get_character_start(offset):
+            file.seek(offset)
+            while (byte := file.read(1)) and byte[0] & 0xC0 == 0x80:  # UTF-8 continuation byte
+                offset += 1
+            return offset
+
+        counts = Counter()
+        decoder = codecs.getincrementaldecoder('utf-8-sig' if start == 0 else 'utf-8')(errors='replace')
+        with open(path, 'rb') as file:
+            start, end = get_character_start(start), get_character_start(end)
+            file.seek(start)
+            while start < end:
+                chunk = file.read(min(chunk_size, end - start))
+                start += len(chunk)
+                counts.update(decoder.decode(chunk, start >= end))
+        return counts
+
+
+    # Script profile of a UTF-8 text: the scripts of its characters, and their parent scripts as for get_script_parents (each character's own
+    # script skipped), weighted by character count. Characters are first collapsed to their canonical equivalents. The text (a path, or a
+    # text file object such as sys.stdin) is read in chunks, so memory use depends on the number of distinct characters rather than the
+    # size of the text, and each distinct character is looked up once. A path can be split between processes
+    def get_text_script_profile(self, file, processes=1, chunk_size=1 << 22):
+        if isinstance(file, str):
+            size = os.path.getsize(file)
+            processes = max(1, min(processes, size // chunk_size))
+            bounds = [size * i // processes for i in range(processes + 1)]
+            ranges = [(file, bounds[i], bounds[i + 1], chunk_size) for i in range(processes)]
+            if processes > 1:
+                with multiprocessing.Pool(processes) as pool:
+                    counts = sum(pool.starmap(self._count_file_characters, ranges), Counter())
+            else:
+                counts = self._count_file_characters(*ranges[0])
+        else:
+            counts = Counter()
+            while chunk := file.read(chunk_size):
+                counts.update(chunk)
+
+        canonical_counts = Counter()
+        for character, count in counts.items():
+            canonical_counts[self.canonicalize(character)] += count
+
+        cursor = self._cxn.cursor()
+        script_counts = Counter()
+        parent_weights = Counter()
+        for character, count in canonical_counts.items():
+            code_point = cursor.execute("SELECT script_code, is_independently_graphical FROM code_point WHERE id = ?", (ord(character),)).fetchone()
+            if not code_point:  # not in this database (eg. a script subset build)
+                script_counts[''] += count
+                continue
+            script_counts[code_point[0]] += count
+            if code_point[1]:
+                try:
+                    parents = self._get_code_point_script_parents(cursor, ord(character), {code_point[0], self.INHERITED_SCRIPT})
+                except ValueError:  # known data issues
+                    parents = {'': 1}
+                for script, weight in parents.items():
+                    parent_weights[script] += weight * count
+
+        results = [('Script', 'Characters', 'As Parent Script')]
+        for script in sorted(script_counts.keys() | parent_weights.keys(), key=lambda x: (script_counts[x], parent_weights[x]), reverse=True):
+            if script == '':
+                script_name = '(missing data)'
+            elif script in script_counts:
+                script_name = cursor.execute("SELECT name FROM script WHERE code = ?", (script,)).fetchone()[0]
+            else:
+                script_name = self._get_parent_script_name(cursor, script)
+            results.append((script_name, script_counts[script], f"{parent_weights[script]:.2f}"))
+        results.append((" -- Total:", counts.total(), round(parent_weights.total())))
+        cursor.close()
+        return results
+
+
+    # Changes of this database from another build (eg. a copy of the previous one) in code point properties, equivalences, derivations
+    # and alphabets, as (section, change, script code, process, item, old values, new values) rows. The change is added, removed or
+    # modified (with only the differing values), and rows are in order of section, script and process (derivations only), so can be
+    # reported as they come. Sequence ids differ between builds, so sequences are compared by their items, and builds with different
+    # load options on the columns they have in common
+    def get_database_diff(self, other_path):
+        if not os.path.isfile(other_path):
+            raise ValueError("No database to compare to at " + other_path)
+
+        def format_code_point(id):
+            return f"{chr(id)} (U+{id:04X})" if chr(id).isprintable() else f"U+{id:04X}"
+
+        def get_columns(schema, table):
+            return [row[1] for row in cursor.execute(f"PRAGMA {schema}.table_xinfo({table})")]
+
+        def get_common_columns(table, excluded_columns=()):
+            other_columns = get_columns('diff_other', table)
+            return [c for c in get_columns('main', table) if c in other_columns and c not in excluded_columns]
+
+        # a sequence's items as text, letters (sequences of code points) in a sequence separated by spaces
+        sequence_text = """(
+            SELECT group_concat(CASE WHEN si.item_id <= {max} THEN char(si.item_id)
+                                     ELSE (SELECT group_concat(char(li.item_id), '' ORDER BY li.order_num) FROM {s}.sequence_item li
+                                           WHERE li.sequence_id = si.item_id) END, ' ' ORDER BY si.order_num)
+            FROM {s}.sequence_item si WHERE si.sequence_id = {sequence_id})"""
+
+        cursor = self._cxn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS diff_other", (other_path,))
+        try:
+            cp_columns = get_common_columns('code_point', ('text', 'raw_name', 'alt_name', 'word_count', 'equivalent_sequence_id', 'canonical_id'))
+            derivation_type = 'd.derivation_type_id, ' if 'derivation_type_id' in get_common_columns('code_point_derivation') else ''
+            child_script = "(SELECT script_code FROM {s}.code_point WHERE id = {id})"
+            # section, key columns, query (for both databases, {s} being the schema), script and process of a changed row (n new, o old)
+            sections = [
+                ('Code point', ['id'], f"SELECT {', '.join(cp_columns)} FROM {{s}}.code_point",
+                 "coalesce(n.script_code, o.script_code)", "NULL"),
+                ('Equivalence', ['id'], f"""
+                    SELECT cp.id, cp.script_code, st.name AS sequence_type, {sequence_text.format(max=self.UNICODE_MAX, s='{s}', sequence_id='seq.id')} AS items
+                    FROM {{s}}.code_point cp
+                        INNER JOIN {{s}}.sequence seq ON seq.id = cp.equivalent_sequence_id
+                        INNER JOIN {{s}}.sequence_type st ON st.id = seq.type_id""",
+                 "coalesce(n.script_code, o.script_code)", "NULL"),
+                ('Derivation', ['child_id', 'parent_id'], f"""
+                    SELECT d.child_id, d.parent_id, {derivation_type}d.certainty_type_id, p.name AS process, d.multiplicity, d.notes
+                    FROM {{s}}.code_point_derivation d INNER JOIN {{s}}.process_type p ON p.id = d.process_type_id""",
+                 f"coalesce({child_script.format(s='main', id='n.child_id')}, {child_script.format(s='diff_other', id='o.child_id')})",
+                 "coalesce(n.process, o.process)"),
+                ('Alphabet', ['lang_code', 'script_code', 'letter_case', 'alphabet_types'], f"""
+                    SELECT a.lang_code, a.script_code, a.letter_case,
+                        (SELECT group_concat(t.name, '/' ORDER BY t.id) FROM {{s}}.alphabet_source src INNER JOIN {{s}}.alphabet_type t ON t.id = src.alphabet_type_id
+                         WHERE src.sequence_id = a.sequence_id AND src.lang_code = a.lang_code) AS alphabet_types,
+                        {sequence_text.format(max=self.UNICODE_MAX, s='{s}', sequence_id='a.sequence_id')} AS letters, a.notes
+                    FROM {{s}}.alphabet a""",
+                 "coalesce(n.script_code, o.script_code)", "NULL"),
+            ]
+
+            for section, keys, query, script, process in sections:
+                new_query, other_query = query.format(s='main'), query.format(s='diff_other')
+                cursor.execute(f"CREATE TEMP TABLE diff_added AS {new_query} EXCEPT {other_query}")
+                cursor.execute(f"CREATE TEMP TABLE diff_removed AS {other_query} EXCEPT {new_query}")
+                cursor.execute(f"CREATE INDEX temp.idx_diff_removed ON diff_removed({', '.join(keys)})")
+                columns = [d[0] for d in cursor.execute("SELECT * FROM diff_added LIMIT 0").description]
+
+                key_match = ' AND '.join(f"n.{k} IS o.{k}" for k in keys)
+                key_order = ', '.join(f"coalesce(n.{k}, o.{k})" for k in keys)
+                report_cursor = self._cxn.cursor()
+                try:
+                    report_cursor.execute(f"""
+                        SELECT {script}, {process}, n.*, o.* FROM diff_added n FULL OUTER JOIN diff_removed o ON {key_match}
+                        ORDER BY 1, 2, {key_order}""")
+                    for row in report_cursor:
+                        new, old = row[2:2 + len(columns)], row[2 + len(columns):]
+                        if old[0] is None:
+                            change, key, old, new = 'added', new[:len(keys)], None, dict(zip(columns[len(keys):], new[len(keys):]))
+                        elif new[0] is None:
+                            change, key, old, new = 'removed', old[:len(keys)], dict(zip(columns[len(keys):], old[len(keys):])), None
+                        else:
+                            changed_columns = [i for i in range(len(keys), len(columns)) if new[i] != old[i]]
+                            change, key = 'modified', new[:len(keys)]
+                            old, new = {columns[i]: old[i] for i in changed_columns}, {columns[i]: new[i] for i in changed_columns}
+
+                        if section == 'Derivation':
+                            item = f"{format_code_point(key[0])} <- {format_code_point(key[1])}"
+                        elif section == 'Alphabet':
+                            item = ' '.join(str(k) for k in key)
+                        else:
+                            item = format_code_point(key[0])
+                        yield section, change, row[0], row[1], item, old, new
+                finally:
+                    report_cursor.close()
+                    cursor.execute("DROP TABLE diff_added")
+                    cursor.execute("DROP TABLE diff_removed")
+        finally:
+            cursor.execute("DETACH DATABASE diff_other")
+            cursor.close()
+
+
+    # Applies edits of the derivation resource files (including derivation_defaults.csv) and standard_alphabets.csv to the database as they're
+    # saved, printing the coverage of the changed scripts, so that they can be checked without a rebuild. Needs a database built with
+    # LoadOptions.keep_overridden_derivations (and without drop_derivation_type). Other resource files still need a rebuild. Runs until interrupted
+    def watch_resources(self, poll_interval=0.5):
+        alphabets_path = os.path.join(self._resource_path, 'standard_alphabets.csv')
+
+        def read_rows(path):
+            with open(path, 'r') as file:
+                return list(csv.DictReader(file))
+
+        def get_modified_times():
+            paths = [os.path.join(self._resource_path, 'derivation_defaults.csv'), alphabets_path]
+            paths.extend(os.path.join(self._derivations_path, s) for s in os.listdir(self._derivations_path))
+            return {path: os.stat(path).st_mtime_ns for path in paths if os.path.isfile(path)}
+
+        cursor = self._cxn.cursor()
+        if 'derivation_type_id' not in [row[1] for row in cursor.execute("PRAGMA table_info(overridden_derivation)")]:
+            raise ValueError("Watching the resource files needs a database built with keep_overridden_derivations (and without drop_derivation_type)")
+        cursor.execute("PRAGMA foreign_keys = ON")  # an edit with an unknown character is rejected (and deleting derivations deletes their sources)
+
+        modified_times = get_modified_times()
+        derivation_files, defaults, alphabet_rows = self._read_manual_derivation_rows(), self._get_derivation_defaults(), read_rows(alphabets_path)
+        print(f"Watching {self._resource_path} for changes (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(poll_interval)
+                new_modified_times = get_modified_times()
+                if new_modified_times == modified_times:
+                    continue
+                modified_times = new_modified_times
+                start_time = time.time()
+                try:
+                    new_derivation_files, new_defaults, new_alphabet_rows = self._read_manual_derivation_rows(), self._get_derivation_defaults(), read_rows(alphabets_path)
+                    cursor.execute("BEGIN")
+                    derivation_scripts, changed_children = self._apply_derivation_file_changes(cursor, derivation_files, new_derivation_files, defaults, new_defaults)
+                    changed_scripts = derivation_scripts | self._apply_alphabet_changes(cursor, alphabet_rows, new_alphabet_rows)
+                    if changed_scripts:
+                        self.print_table([('Script', 'Letters', 'Derived', 'Manual')] + cursor.execute(f"""
+                            SELECT script_code, num_letters, num_letters_derived, num_letters_manual FROM script_coverage
+                            WHERE script_code IN {self._get_sql_in_str_list(changed_scripts)} ORDER BY script_code""").fetchall())
+                        self._verify_script_coverage(cursor, changed_scripts)
+                    if derivation_scripts:
+                        # the derived tables for the changed children only. A script's letters pass through combining marks (see
+                        # _load_script_derivations), so a changed mark changes the scripts of its descendants
+                        descendants = self._update_code_point_ancestry(cursor, changed_children)
+                        child_scripts = set(x[0] for x in cursor.execute(
+                            f"SELECT DISTINCT script_code FROM code_point WHERE id IN ({', '.join(str(x) for x in changed_children)})"))
+                        if self.INHERITED_SCRIPT in child_scripts:
+                            child_scripts = set(x[0] for x in cursor.execute(
+                                f"SELECT DISTINCT script_code FROM code_point WHERE id IN ({', '.join(str(x) for x in descendants)})"))
+                        self._load_script_derivations(cursor, child_scripts)
+                        self._ancestor_index = None
+                    self._cxn.commit()
+                except (ValueError, KeyError, TypeError, csv.Error, sqlite3.Error) as e:
+                    self._cxn.rollback()
+                    print(f"Changes not applied, fix and save again: {e!r}")
+                    continue
+
+                derivation_files, defaults, alphabet_rows = new_derivation_files, new_defaults, new_alphabet_rows
+                if changed_scripts:
+                    print(f"Applied changes to {', '.join(sorted(changed_scripts))} in {time.time() - start_time:.2f} s")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            cursor.close()
+
+
+    # the changes between the old and new rows (by script) of the derivation resource files, returns the scripts changed and the children
+    # whose derivations (may have) changed
+    def _apply_derivation_file_changes(self, cursor, old_files, new_files, old_defaults, new_defaults):
+        def get_pairs(rows):
+            return [(ord(row['Child'].strip()), ord(parent) if parent else ord(self.NO_PARENT_CHARACTER))
+                    for row in rows for parent in row['Parent'].strip().split('/')]
+
+        columns = "child_id, parent_id, derivation_type_id, certainty_type_id, process_type_id, multiplicity"
+        changed_scripts = set(s for s in old_files.keys() | new_files.keys()
+                              if old_files.get(s) != new_files.get(s) or old_defaults.get(s) != new_defaults.get(s))
+        changed_children = set()
+        for script in sorted(changed_scripts):
+            old_pairs = get_pairs(old_files.get(script, []))
+            old_children = set(child for child, _ in old_pairs)
+            new_children = set(ord(row['Child'].strip()) for row in new_files.get(script, []))
+            cursor.executemany(f"DELETE FROM code_point_derivation WHERE child_id = ? AND parent_id = ? AND process_type_id = {self.MANUAL_PROCESS_ID}",
+                               old_pairs)
+
+            # as in the build, manually derived children have none of their generated derivations
+            restored = [(child,) for child in old_children - new_children]
+            cursor.executemany(f"INSERT INTO code_point_derivation ({columns}) SELECT {columns} FROM overridden_derivation WHERE child_id = ? ON CONFLICT DO NOTHING",
+                               restored)
+            cursor.executemany("DELETE FROM overridden_derivation WHERE child_id = ?", restored)
+            overridden = [(child,) for child in new_children - old_children]
+            cursor.executemany(f"""
+                INSERT INTO overridden_derivation ({columns}) SELECT {columns} FROM code_point_derivation
+                WHERE child_id = ? AND process_type_id <> {self.MANUAL_PROCESS_ID} ON CONFLICT DO NOTHING""", overridden)
+            cursor.executemany(f"DELETE FROM code_point_derivation WHERE child_id = ? AND process_type_id <> {self.MANUAL_PROCESS_ID}", overridden)
+
+            self._load_manual_derivation_rows(cursor, script, new_files.get(script, []), new_defaults, True)
+            if old_defaults.get(script) != new_defaults.get(script):
+                changed_children |= old_children | new_children
+            else:  # those of the rows which changed, the others being reloaded as they were
+                old_keys = set(tuple(row.items()) for row in old_files.get(script, []))
+                new_keys = set(tuple(row.items()) for row in new_files.get(script, []))
+                changed_children.update(ord(dict(key)['Child'].strip()) for key in old_keys ^ new_keys)
+        return changed_scripts, changed_children
+
+
+    # the changes between the old and new rows of standard_alphabets.csv, returns the scripts changed. A CLDR (or generated) alphabet
+    # which wasn't loaded because of a removed row isn't added back, that needs a rebuild
+    def _apply_alphabet_changes(self, cursor, old_rows, new_rows):
+        old_keys = set(tuple(row.items()) for row in old_rows)
+        new_keys = set(tuple(row.items()) for row in new_rows)
+        removed_rows = [row for row in old_rows if tuple(row.items()) not in new_keys]
+        added_rows = [row for row in new_rows if tuple(row.items()) not in old_keys]
+        for row in removed_rows:
+            self._delete_manual_alphabet(cursor, row)
+        for row in added_rows:
+            self._load_manual_alphabet(cursor, row, True)
+        return set(row['Script'] for row in removed_rows + added_rows)
+
+
+    # Checks the curated resource files (derivation files and defaults, standard alphabets, position distinctions) without a database build,
+    # in about a second, eg. before a commit. Only the scripts and general categories of the code points and sources.csv are loaded, so
+    # 2-cycles are only found between manually specified derivations. Returns every error as (file, line, message)
+    def validate_resource_files(self):
+        errors = []
+
+        def read_rows(file_name):  # (line, row), multi-line rows by their last line
+            with open(os.path.join(self._resource_path, file_name), 'r') as file:
+                reader = csv.DictReader(file)
+                return [(reader.line_num, row) for row in reader]
+
+        script_codes, alias_codes = set(), {}
+        for _, row in read_rows('scripts.csv'):
+            script_codes.add(row['Code'])
+            if row['Unicode Alias']:
+                alias_codes[row['Unicode Alias']] = row['Code']
+
+        # code point properties as sorted (start, end, value) ranges, private use scripts from the code points assigned to them
+        script_ranges = []
+        with open(os.path.join(self._unicode_path, 'Scripts.txt'), 'r') as file:
+            for row in self._parse_data_file(file, ';'):
+                code_points = self._unicode_range(row[0])
+                script_ranges.append((code_points.start, code_points.stop - 1, alias_codes[row[1].split('#')[0].strip()]))
+        private_use_starts = sorted((start, code) for code, start in self._CODE_POINT_STARTS.items() if self.is_private_use(start))
+        for (start, code), (next_start, _) in zip(private_use_starts, private_use_starts[1:] + [(0xF900, None)]):
+            script_ranges.append((start, next_start - 1, code))
+        script_ranges.sort()
+        category_ranges = []
+        with open(os.path.join(self._unicode_path, 'UnicodeData.txt'), 'r') as file:
+            for row in self._parse_data_file(file, ';'):
+                if row[1].endswith(', First>'):
+                    range_start = int(row[0], 16)
+                else:
+                    category_ranges.append((range_start if row[1].endswith(', Last>') else int(row[0], 16), int(row[0], 16), row[2]))
+        script_starts, category_starts = [r[0] for r in script_ranges], [r[0] for r in category_ranges]
+
+        def get_property(ranges, starts, id):
+            i = bisect.bisect_right(starts, id) - 1
+            return ranges[i][2] if i >= 0 and id <= ranges[i][1] else None
+
+        def get_code_point(char):  # (script code, general category), None if not a code point of the database
+            if char == self.NO_PARENT_CHARACTER:
+                return 'Zzzz', 'Cn'
+            script_code = get_property(script_ranges, script_starts, ord(char)) if len(char) == 1 else None
+            return (script_code, get_property(category_ranges, category_starts, ord(char)) or 'Cn') if script_code else None
+
+        def get_character_errors(description, chars):
+            return [f"{description} {char!r} is not a single code point of the database" for char in chars if not get_code_point(char)]
+
+        cxn = sqlite3.connect(':memory:')
+        with open(self._get_unique_saved_query('Setup schema')) as file:
+            cxn.executescript(file.read())
+        source_rows = read_rows('sources.csv')
+        for line, row in source_rows:
+            if cxn.execute("SELECT * FROM source WHERE citation_key = ?", (row['Citation Key'],)).fetchone():
+                errors.append(('sources.csv', line, f"Duplicate citation key {row['Citation Key']}"))
+            else:
+                self._load_source(cxn.cursor(), row['Citation Key'], None, row['Title'], None)
+        for line, row in source_rows:
+            if row['Parent'] and not cxn.execute("SELECT * FROM source WHERE citation_key = ?", (row['Parent'],)).fetchone():
+                errors.append(('sources.csv', line, f"No source found for parent citation key {row['Parent']}"))
+        snapshot = cxn.serialize()
+        cxn.close()
+        try:
+            defaults = self._get_derivation_defaults()
+        except AttributeError:  # a row missing columns, reported below
+            defaults = {}
+
+        def get_source_errors(cursor, raw_sources):
+            messages = []
+            for raw_source in raw_sources.split('/'):
+                try:
+                    citation_key = self._parse_raw_source(cursor, raw_source).citation_key
+                    if not citation_key.startswith('Wikipedia: '):  # created as needed by the load
+                        self._get_or_create_source_id(cursor, citation_key)
+                except ValueError as e:
+                    messages.append(str(e))
+                except TypeError:  # JULIANDAY of something not a date
+                    messages.append(f"Malformed access date in source {raw_source.strip()}")
+            return messages
+
+        def get_enum_errors(enum_type, values):
+            messages = []
+            for value in values:
+                try:
+                    enum_type(int(value))
+                except ValueError:
+                    messages.append(f"{value} is not a valid {enum_type.__name__}")
+            return messages
+
+        # row validators, returning (messages, manually specified derivations as (child, parent))
+        def validate_derivation(cursor, row, script):
+            messages = get_source_errors(cursor, row['Source']) if row.get('Source') and not row['Source'].isspace() else []
+            child = row['Child'].strip()
+            parents = [parent if parent else self.NO_PARENT_CHARACTER for parent in row['Parent'].strip().split('/')]  # as resolved below
+            messages.extend(get_character_errors('Child', [child]) + get_character_errors('Parent', parents))
+            if get_code_point(child) and get_code_point(child)[0] != script:
+                messages.append(f"Child {child} is of script {get_code_point(child)[0]}, not {script}")
+            if child in parents:
+                messages.append(f"Self-derivation of {child}")
+
+            try:  # the types and multiplicity, with the script's defaults
+                multiplicity = self._resolve_manual_derivation(cursor, script, row, defaults)[6]
+                if multiplicity < 1:
+                    messages.append(f"Multiplicity {multiplicity} is less than 1")
+            except ValueError as e:
+                messages.append(str(e))
+            except TypeError:  # a malformed source date, found above or in derivation_defaults.csv
+                pass
+            return messages, [(child, parent) for parent in parents if parent != child]
+
+        def validate_derivation_default(cursor, row):
+            messages = [] if row['Script'].strip() in script_codes else [f"Unknown script {row['Script']}"]
+            messages.extend(get_enum_errors(DerivationType, [row['Derivation Type']] if row['Derivation Type'] else []))
+            messages.extend(get_enum_errors(Certainty, [row['Certainty Type']] if row['Certainty Type'] else []))
+            if row['Source']:
+                messages.extend(get_source_errors(cursor, row['Source']))
+            return messages, []
+
+        def validate_alphabet(cursor, row):
+            messages = [] if row['Script'] in script_codes else [f"Unknown script {row['Script']}"]
+            messages.extend(get_enum_errors(AlphabetType, (row['Alphabet Type'] if row['Alphabet Type'] else str(AlphabetType.BASIC.value)).split('/')))
+            if row['Language']:
+                messages.extend(get_source_errors(cursor, row['Source']))
+
+            # as verified by _parse_cldr_exemplar_set
+            parse_data = self._parse_manual_alphabet(cursor, row, False)
+            chars = list(dict.fromkeys(''.join(parse_data.letters)))
+            messages.extend(get_character_errors('Character', chars))
+            chars = [(char, get_code_point(char)) for char in chars if get_code_point(char)]
+            other_script = [char for char, (script_code, _) in chars
+                            if script_code not in (self.COMMON_SCRIPT, self.INHERITED_SCRIPT, parse_data.script_code, 'Hans', 'Hant')
+                            and parse_data.script_code not in ('Hans', 'Hant')]
+            other_case = [char for char, (_, category) in chars
+                          if parse_data.letter_case in ('Ll', 'Lu') and category in ('Ll', 'Lu') and category != parse_data.letter_case]
+            if other_script:
+                messages.append(f"Characters not of script {parse_data.script_code}: {' '.join(other_script)}")
+            if other_case:
+                messages.append(f"Characters not of case {parse_data.letter_case}: {' '.join(other_case)}")
+            return messages, []
+
+        def validate_position_distinction(cursor, row):
+            messages = get_character_errors('Character', [row['Char'], row['Equiv']])
+            if row['Char'] == row['Equiv']:
+                messages.append(f"Self-derivation of {row['Char']}")
+            return messages, [] if messages else [(row['Char'], row['Equiv'])]
+
+        def validate_file(cursor, file):
+            file_name, required_columns, validate_row, *args = file
+            file_errors, derivations = [], []
+            try:
+                for line, row in read_rows(file_name):
+                    missing_columns = [column for column in required_columns if row.get(column) is None]
+                    if missing_columns:
+                        file_errors.append((file_name, line, f"Missing {', '.join(missing_columns)}"))
+                        continue
+                    messages, row_derivations = validate_row(cursor, row, *args)
+                    file_errors.extend((file_name, line, message) for message in messages)
+                    derivations.extend((file_name, line, child, parent) for child, parent in row_derivations)
+            except (KeyError, csv.Error) as e:  # not a readable resource file
+                file_errors.append((file_name, None, f"Unreadable file: {e!r}"))
+            return file_errors, derivations
+
+        files = [('position_distinction.csv', ['Char', 'Equiv'], validate_position_distinction),
+                 ('derivation_defaults.csv', ['Script', 'Derivation Type', 'Certainty Type'], validate_derivation_default),
+                 ('standard_alphabets.csv', ['Script', 'Case', 'Language', 'Alphabet Type', 'Source', 'Alphabet'], validate_alphabet)]
+        for s in sorted(os.listdir(self._derivations_path)):
+            if s.split('.')[0] not in script_codes:
+                errors.append((os.path.join('derivations', s), None, f"Unknown script {s.split('.')[0]}"))
+            files.append((os.path.join('derivations', s), ['Child', 'Parent'], validate_derivation, s.split('.')[0]))
+        results = self._run_on_snapshot_threads(snapshot, validate_file, files)
+
+        # in load order, each derivation checked against the earlier ones, as in the build
+        earlier_derivations = {}
+        for file_errors, derivations in results:
+            errors.extend(file_errors)
+            for file_name, line, child, parent in derivations:
+                if (child, parent) in earlier_derivations:
+                    errors.append((file_name, line, f"Duplicate derivation of {child} from {parent}, also at {earlier_derivations[(child, parent)]}"))
+                elif (parent, child) in earlier_derivations:
+                    errors.append((file_name, line, f"2-cycle with {parent} derived from {child} at {earlier_derivations[(parent, child)]}"))
+                earlier_derivations[(child, parent)] = f"{file_name}:{line}"
+        return sorted(errors, key=lambda error: (error[0], error[1] or 0))
+
+
     def load_database(self, load_options=None):
         def output_info(message, start_time, lap_time, lap_mb):
             current_time = time.time()
-            current_mb = os.path.getsize(os.path.join(self._db_path, self._db_name)) / 1000000
+            current_mb = os.path.getsize(os.path.join(self._db_path, self._db_file_name)) / 1000000
             print(f"{message} Elapsed: {current_time - start_time:.2f} s (+{current_time - lap_time:.2f} s). Size: {current_mb:.1f} MB (+{current_mb - lap_mb:.1f} MB)")
             return current_time, current_mb
 
+        def end_stage(stage_name, message):
+            nonlocal lap_time, lap_mb
+            if message is None:
+                return
+            if profiler:
+                profiler.end_stage(stage_name)
+            if output:
+                lap_time, lap_mb = output_info(message, start_time, lap_time, lap_mb)
+
+        # a stage's changes and its checkpoint are committed in one transaction (rolled back if the stage fails), so a failed build is left
+        # at its last completed stage
+        @contextlib.contextmanager
+        def resumable_stage(stage_name, message):
+            nonlocal running_stage
+            running_stage = stage_name
+            if not self._cxn.in_transaction:
+                cur.execute("BEGIN")  # otherwise a schema change before the stage's first data change would be committed on its own
+            try:
+                yield
+                cur.execute("INSERT OR REPLACE INTO build_checkpoint (stage_name, input_hash) VALUES (?, ?)",
+                            (stage_name, self._get_stage_input_hash(stage_name, options)))
+                self._cxn.commit()
+            except BaseException:
+                self._cxn.rollback()
+                raise
+            end_stage(stage_name, message)
+
         options = load_options if load_options else LoadOptions()
         output = options.output_debug_info
-
-        if options.force_overwrite:
-            if os.path.isfile(os.path.join(self._db_path, self._db_name)):
-                os.remove(os.path.join(self._db_path, self._db_name))
-            if os.path.isfile(os.path.join(self._db_path, self._db_name + '-journal')):
-                os.remove(os.path.join(self._db_path, self._db_name + '-journal'))
-            self._set_connection()
-            self._next_sequence_id = ScriptDatabase.UNICODE_MAX
         if options.resource_path:
             self._set_resource_paths(options.resource_path)
         if options.saved_query_path:
             self._query_path = options.saved_query_path
-
-        path = os.path.join(self._resource_path, 'cr-exclusion')
-        if self._try_unzip_sources(os.path.join(self._resource_path, 'cr-exclusion')):
-            if output: print(f'Source files unzipped to {self._resource_path}')
-        elif output: print(f'At least one zip file not present in {path}, relying on existing files in {self._resource_path}')
-
-        cur = self._cxn.cursor()
-        start_time = time.time()
-        lap_time = start_time
-        lap_mb = 0
-        if output: print('Setting up schema (starting timer)...')
-
-        cur.execute("PRAGMA foreign_keys = OFF")
-        self._setup_schema(cur)
-        if options.verify_data_sources:
-            cur.execute("PRAGMA foreign_keys = ON")
-
-        self._load_sources(cur)
-        self._cxn.commit()
-        self._load_lookups(cur)
-        self._cxn.commit()
-        self._load_processes(cur)
-        deferred = self._load_scripts(cur)
-        self._cxn.commit()
-        self._load_languages(cur)
-        self._cxn.commit()
-        self._load_deferred_script_fields(cur, deferred)
-        self._cxn.commit()
-        if output: lap_time, lap_mb = output_info("Done basics: loading lookups, languages, scripts and sources.", start_time, lap_time, lap_mb)
-
-        # updates generally expected on these table, just clear (and before loading code points so cleared space can be used)
-        cur.execute("DELETE FROM manual_derivation_source")
-        cur.execute("DELETE FROM code_point_derivation")
-        self._load_code_point_data(cur)
-        self._cxn.commit()
-        if output: lap_time, lap_mb = output_info("Done loading code point data.", start_time, lap_time, lap_mb)
-
-        indic_letter_data = self._get_indic_letter_dict(cur, options.verify_data_sources)
-        self._load_private_use_data(cur, indic_letter_data)
-        semitic_letter_data = self._get_semitic_letter_dict()
-        indic_supp_data = self._get_indic_supplement_dict(cur, indic_letter_data)
-        self._generate_std_alphabets(semitic_letter_data, indic_letter_data, indic_supp_data)
-        if options.drop_bidi_class_column:  # TODO: is it possible to not even load this column to start?
-            cur.execute("ALTER TABLE code_point DROP COLUMN bidi_class_code")
-        self._cxn.commit()
-        if output: lap_time, lap_mb = output_info("Done generating letter data and loading private use data.", start_time, lap_time, lap_mb)
-
-        cur.execute("PRAGMA foreign_keys = ON") # there's a bit of a tricky query in load_derivations that currently relies on ON DELETE CASCADE
-        self._load_derivations(cur, indic_supp_data, indic_letter_data, semitic_letter_data, options)
-        if not options.verify_data_sources:
-            cur.execute("PRAGMA foreign_keys = OFF")
-        self._cxn.commit()
-        if output: lap_time, lap_mb = output_info("Done loading derivation data.", start_time, lap_time, lap_mb)
-
-        self._load_alphabet_data(cur, options.verify_data_sources)
-        self._cxn.commit()
-        if output: lap_time, lap_mb = output_info("Done loading alphabet data.", start_time, lap_time, lap_mb)
-
-        if options.drop_unused_languages:
-            self._drop_unused_languages(cur)
+        if self._reader:
+            raise ValueError("A reader can't load the database")
+        db_file_name = self._db_name
+        if options.versioned:
+            # the version after the published one, so a failed build of it can be resumed
+            manifest = self._read_manifest()
+            self._db_version = manifest['version'] + 1 if manifest else 1
+            db_file_name = self._get_version_file_name(self._db_version)
+        if db_file_name != self._db_file_name:  # connected to on first use
+            if self._connection is not None:
+                self._connection.close()
+            self._db_file_name, self._connection = db_file_name, None
+
+        completed_stages = self._get_completed_stages(options) if options.resume else []
+        if not completed_stages:
+            if options.force_overwrite:
+                if os.path.isfile(os.path.join(self._db_path, self._db_file_name)):
+                    os.remove(os.path.join(self._db_path, self._db_file_name))
+                if os.path.isfile(os.path.join(self._db_path, self._db_file_name + '-journal')):
+                    os.remove(os.path.join(self._db_path, self._db_file_name + '-journal'))
+                self._set_connection()
+                self._next_sequence_id = ScriptDatabase.UNICODE_MAX
+        else:
+            self._set_next_sequence_id()
+        if options.sql_trace_path:
+            self.set_sql_tracing(options.sql_trace_path, options.slow_statement_time)
+        profiler = None
+        running_stage = 'basics'  # for the profile of a failed stage
+        try:
+            self._ancestor_index = None
+            self._canonical_ids = None
+            self._script_subset = None
+
+            path = os.path.join(self._resource_path, 'cr-exclusion')
+            if self._try_unzip_sources(os.path.join(self._resource_path, 'cr-exclusion')):
+                if output: print(f'Source files unzipped to {self._resource_path}')
+            elif output: print(f'At least one zip file not present in {path}, relying on existing files in {self._resource_path}')
+
+            cur = self._cxn.cursor()
+            start_time = time.time()
+            lap_time = start_time
+            lap_mb = 0
+            if options.profile_path:
+                profiler = self._StageProfiler(options.profile_path)
+
+            if not completed_stages:
+                if output: print('Setting up schema (starting timer)...')
+                cur.execute("PRAGMA foreign_keys = OFF")
+                # recreated once loaded (script coverage being regenerated by then), and in the way of the code point layout changes
+                for trigger in cur.execute("SELECT name FROM sqlite_schema WHERE type = 'trigger' AND name LIKE 'trg_cpd_%_coverage'").fetchall():
+                    cur.execute(f"DROP TRIGGER {trigger[0]}")
+                self._setup_schema(cur, options.compress_code_point_ranges)
+                if options.verify_data_sources:
+                    cur.execute("PRAGMA foreign_keys = ON")
+
+                with resumable_stage('basics', "Done basics: loading lookups, languages, scripts and sources."):
+                    self._load_sources(cur)
+                    self._load_lookups(cur)
+                    self._load_processes(cur)
+                    deferred = self._load_scripts(cur)
+                    self._load_languages(cur, options.load_all_languages)
+                    self._load_deferred_script_fields(cur, deferred)
+            else:
+                if output: print(f"Resuming the build after the {completed_stages[-1]} stage (starting timer)...")
+                # as the foreign key setting would be at this point of a full build
+                if options.verify_data_sources or 'derivations' in completed_stages:
+                    cur.execute("PRAGMA foreign_keys = ON")
+                self._set_code_point_layout(cur, options.compress_code_point_ranges)  # as set up by the build
+
+            kept_scripts = self._get_kept_scripts(cur, options.include_scripts, options.exclude_scripts)
+            if kept_scripts is not None:
+                running_stage = 'script_subset'
+                self._script_subset = self._get_script_subset(cur, kept_scripts)
+                self._script_subset.code_points.update(x[0] for x in cur.execute("SELECT id FROM code_point").fetchall())  # if resumed
+                end_stage('script_subset', f"Done resolving the subset of {len(kept_scripts)} scripts and their ancestors.")
+
+            if 'code_points' not in completed_stages:
+                with resumable_stage('code_points', "Done loading code point data."):
+                    # updates generally expected on these table, just clear (and before loading code points so cleared space can be used)
+                    cur.execute("DELETE FROM manual_derivation_source")
+                    cur.execute("DELETE FROM code_point_derivation")
+                    self._load_code_point_data(cur)
+
+            if 'letters_private_use' not in completed_stages:
+                with resumable_stage('letters_private_use', "Done generating letter data and loading private use data."):
+                    indic_letter_data = self._get_indic_letter_dict(cur, options.verify_data_sources)
+                    self._load_private_use_data(cur, indic_letter_data)
+                    semitic_letter_data = self._get_semitic_letter_dict()
+                    indic_supp_data = self._get_indic_supplement_dict(cur, indic_letter_data)
+                    self._generate_std_alphabets(semitic_letter_data, indic_letter_data, indic_supp_data)
+                    if options.drop_bidi_class_column:  # TODO: is it possible to not even load this column to start?
+                        self._drop_code_point_columns(cur, ['bidi_class_code'])
+            elif 'derivations' not in completed_stages:  # letter data (as merged by generating the alphabets file) for the derivations
+                running_stage = 'derivations'
+                indic_letter_data = self._get_indic_letter_dict(cur, options.verify_data_sources)
+                semitic_letter_data = self._get_semitic_letter_dict()
+                indic_supp_data = self._get_indic_supplement_dict(cur, indic_letter_data)
+                self._generate_std_alphabets(semitic_letter_data, indic_letter_data, indic_supp_data)
+
+            if 'derivations' not in completed_stages:
+                cur.execute("PRAGMA foreign_keys = ON") # checks the code points of the generated derivations as they're merged
+                with resumable_stage('derivations', "Done loading derivation data."):
+                    self._load_derivations(cur, indic_supp_data, indic_letter_data, semitic_letter_data, options)
+                    if not options.verify_data_sources:
+                        cur.execute("PRAGMA foreign_keys = OFF")
+
+            if 'alphabets' not in completed_stages:
+                with resumable_stage('alphabets', "Done loading alphabet data."):
+                    self._load_alphabet_data(cur, options.verify_data_sources)
+
+            if 'derived_tables' not in completed_stages:
+                with resumable_stage('derived_tables', "Done generating derived tables (script derivations, ancestry, statistics)."):
+                    self._load_script_derivations(cur)
+                    self._load_code_point_ancestry(cur)
+                    self._load_canonical_ids(cur)
+                    self._load_script_coverage(cur)
+
+            running_stage = 'storage'
+            cur.execute("DROP TABLE build_checkpoint")  # the remaining changes can't be redone on a partially changed database
+            if not options.compress_code_point_ranges:
+                cur.execute("DROP TABLE code_point_range")
             self._cxn.commit()
-        if options.vacuum_db:
-            cur.execute("VACUUM")
-
-        if output:
-            print("=" * 80)
-            print(f'Database loaded. Total time: {time.time() - start_time:.2f} s. Total size: {os.path.getsize(os.path.join(self._db_path, self._db_name)) / 1000000:.1f} MB')
-            priv_use_counts = cur.execute("""
-                SELECT is_alphabetic, COUNT(*) FROM code_point 
-                WHERE script_code LIKE 'Q%' OR script_code IN ('Psin', 'Egyd')
-                GROUP BY is_alphabetic
-                ORDER BY is_alphabetic""").fetchall()
-            print(f"Number of private use letters: {priv_use_counts[1][1]} (+{priv_use_counts[0][1]} non-letter characters)")
-            self.print_table(self.execute_saved_query('Total derivation statistics'))
-        if options.verify_data_sources:
-            self._verify_script_coverage(cur)
+            if options.drop_unused_languages:
+                self._drop_unused_languages(cur)
+                self._cxn.commit()
+            if options.compact_storage:
+                if output:
+                    cur.execute("VACUUM")  # for a fair size comparison
+                    before_mb, before_latencies = self._get_storage_report(cur)
+                cur.execute("PRAGMA foreign_keys = OFF")  # tables are rebuilt
+                self._compact_storage(cur)
+                self._cxn.commit()
+                if options.verify_data_sources:
+                    if cur.execute("PRAGMA foreign_key_check").fetchall():
+                        raise ValueError("Foreign key violations after compacting storage")
+                    cur.execute("PRAGMA foreign_keys = ON")
+                if output:
+                    cur.execute("VACUUM")
+                    after_mb, after_latencies = self._get_storage_report(cur)
+                    report = [('Compact storage', 'Before', 'After'), ('Size (MB)', f"{before_mb:.1f}", f"{after_mb:.1f}")]
+                    report.extend((f"{name} (ms)", f"{before_latencies[name]:.2f}", f"{after_latencies[name]:.2f}") for name in before_latencies)
+                    self.print_table(report)
+            else:
+                cur.execute("DROP TABLE general_category")
+                cur.execute("DROP TABLE bidi_class")
+            self._create_script_coverage_triggers(cur)
+            if options.compress_code_point_ranges:
+                # without table statistics the planner can scan the view's sequences before the other tables of a query (eg. for an
+                # id NOT IN condition), rather than search them by id as it does for the code_point table
+                cur.execute("ANALYZE")
+            self._cxn.commit()
+            if options.vacuum_db:
+                cur.execute("VACUUM")
+            end_stage('storage', "Done optimizing storage.")
+            running_stage = 'output_verify'
+
+            if output:
+                print("=" * 80)
+                print(f'Database loaded. Total time: {time.time() - start_time:.2f} s. Total size: {os.path.getsize(os.path.join(self._db_path, self._db_file_name)) / 1000000:.1f} MB')
+                priv_use_counts = cur.execute("""
+                    SELECT is_alphabetic, COUNT(*) FROM code_point 
+                    WHERE script_code LIKE 'Q%' OR script_code IN ('Psin', 'Egyd')
+                    GROUP BY is_alphabetic
+                    ORDER BY is_alphabetic""").fetchall()
+                print(f"Number of private use letters: {priv_use_counts[1][1]} (+{priv_use_counts[0][1]} non-letter characters)")
+                self.print_table(self.execute_saved_query('Total derivation statistics'))
+            if kept_scripts is not None:  # what was left out isn't obvious from the options, so always reported
+                subset_counts = cur.execute(f"""
+                    SELECT COUNT(*), COUNT(DISTINCT script_code), SUM(CASE WHEN script_code IN {self._get_sql_in_str_list(kept_scripts)} THEN 1 ELSE 0 END)
+                    FROM code_point""").fetchone()
+                print(f"Script subset: {subset_counts[0]} code points from {subset_counts[1]} scripts ({subset_counts[2]} in the included scripts, the rest ancestors)")
+            self._verify_query_plans(cur)  # as the layout load options change them
+            if options.verify_data_sources:
+                self._verify_script_coverage(cur, kept_scripts)
+            if profiler:
+                profiler.end_stage('output_verify')
+        except BaseException:
+            if profiler:
+                profiler.end_stage(f"{running_stage}_failed")
+            raise
+        finally:
+            # the sampling timer and the tracer are left running otherwise
+            if profiler:
+                profiler.close()
+            if options.sql_trace_path:
+                self.set_sql_tracing(None)
+        if options.versioned:
+            self._publish_version(options.kept_versions)
+            if output: print(f"Published version {self._db_version} ({self._db_file_name})")
 
         cur.execute("PRAGMA foreign_keys = ON")
         return cur
 
 
+    def _get_manifest_path(self):
+        return os.path.join(self._db_path, os.path.splitext(self._db_name)[0] + '.manifest.json')
+
+
+    def _get_version_file_name(self, version):
+        stem, extension = os.path.splitext(self._db_name)
+        return f"{stem}.v{version}{extension}"
+
+
+    # format: {'version': number, 'file': version file name, 'published': local time}, None if no version is published
+    def _read_manifest(self):
+        if not os.path.isfile(self._get_manifest_path()):
+            return None
+        with open(self._get_manifest_path(), 'r') as file:
+            return json.load(file)
+
+
+    # The manifest is replaced in one step, so readers see either the previous or the new version. A reader still on a removed version
+    # keeps reading it until it swaps (on Windows, the removal fails and is retried after the next build)
+    def _publish_version(self, kept_versions):
+        manifest_path = self._get_manifest_path()
+        with open(manifest_path + '.tmp', 'w') as file:
+            json.dump({'version': self._db_version, 'file': self._db_file_name, 'published': time.strftime('%Y-%m-%dT%H:%M:%S')}, file)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        stem, extension = os.path.splitext(self._db_name)
+        version_pattern = re.compile(re.escape(stem) + r'\.v(\d+)' + re.escape(extension) + '(-journal)?')
+        for file_name in os.listdir(self._db_path):
+            match = version_pattern.fullmatch(file_name)
+            if match and int(match.group(1)) < self._db_version - kept_versions:
+                try:
+                    os.remove(os.path.join(self._db_path, file_name))
+                except OSError:
+                    pass
+
+
+    # reader mode: swaps to the published version if it changed (the manifest is only read when its modified time changes). The previous
+    # connection isn't closed, so a cursor still being read (eg. of get_database_diff) finishes on it
+    def _check_published_version(self):
+        try:
+            manifest_modified_time = os.stat(self._get_manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            manifest_modified_time = None
+        if self._connection is not None and manifest_modified_time == self._manifest_modified_time:
+            return
+        self._manifest_modified_time = manifest_modified_time
+        manifest = self._read_manifest()
+        file_name = manifest['file'] if manifest else self._db_name
+        if self._connection is None or file_name != self._db_file_name:
+            self._db_file_name = file_name
+            self._set_connection()
+            self._ancestor_index = None
+            self._canonical_ids = None
+
+
+    # reader mode: query methods (execute_*, get_*) check for a newly published version first. Only the outermost call checks,
+    # so all the queries of a method are on the same version
+    def _follow_published_versions(self):
+        def wrap(method):
+            @functools.wraps(method)
+            def following(*args, **kwargs):
+                if not self._reader_call_depth:
+                    self._check_published_version()
+                self._reader_call_depth += 1
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self._reader_call_depth -= 1
+            return following
+
+        for method_name in dir(type(self)):
+            if method_name.startswith(('execute_', 'get_')) and callable(getattr(type(self), method_name)):
+                setattr(self, method_name, wrap(getattr(self, method_name)))
+
+
+    # the stages of an unfinished build which are done and can be skipped, see LoadOptions.resume
+    def _get_completed_stages(self, options):
+        if not self._cxn.execute("SELECT * FROM sqlite_schema WHERE name = 'build_checkpoint'").fetchone():
+            return []
+        input_hashes = dict(self._cxn.execute("SELECT stage_name, input_hash FROM build_checkpoint").fetchall())
+        completed_stages = []
+        for stage_name in self._STAGE_INPUTS:
+            if stage_name not in input_hashes:
+                break
+            if input_hashes[stage_name] != self._get_stage_input_hash(stage_name, options):
+                if options.output_debug_info: print(f"Input of the {stage_name} stage changed, not resuming the build")
+                return []  # the database can't be taken back to before that stage
+            completed_stages.append(stage_name)
+        return completed_stages
+
+
+    def _get_stage_input_hash(self, stage_name, options):
+        def get_files(relative_path):
+            path = os.path.join(self._resource_path, relative_path)
+            if os.path.isfile(path):
+                return [path]
+            return sorted(os.path.join(dir_path, x) for dir_path, _, file_names in os.walk(path) for x in file_names)
+
+        input_hash = hashlib.sha256()
+        if stage_name == 'basics':  # the options could change any stage
+            input_hash.update(repr([(x, sorted(y) if isinstance(y, set) else y) for x, y in sorted(vars(options).items())
+                                    if x not in self._OUTPUT_OPTIONS]).encode())
+        for relative_path in self._STAGE_LISTED_INPUTS.get(stage_name, []):
+            input_hash.update(repr([os.path.relpath(x, self._resource_path) for x in get_files(relative_path)]).encode())
+        relative_paths = self._STAGE_INPUTS[stage_name]
+        if stage_name == 'code_points' and (options.include_scripts is not None or options.exclude_scripts is not None):
+            relative_paths = relative_paths + self._STAGE_INPUTS['derivations']  # which the script subset loaded is also resolved from
+        for relative_path in relative_paths:
+            for file_path in get_files(relative_path):
+                input_hash.update(os.path.relpath(file_path, self._resource_path).encode())
+                with open(file_path, 'rb') as file:
+                    input_hash.update(hashlib.sha256(file.read()).digest())
+        return input_hash.hexdigest()
+
+
+    # Profiles each call of the public query methods (execute_*, get_*) until turned off with path None. One .pstats file per method
+    # under path, rewritten after each call. Calls made by another profiled method (or during a profiled load) are part of that profile
+    def set_query_profiling(self, path):
+        def wrap(method_name, method):
+            @functools.wraps(method)
+            def profiled(*args, **kwargs):
+                if self._query_profile_depth or sys.monitoring.get_tool(sys.monitoring.PROFILER_ID):  # only one profiler can be active
+                    return method(*args, **kwargs)
+                profile = cProfile.Profile()
+                self._query_profile_depth += 1
+                try:
+                    return profile.runcall(method, *args, **kwargs)
+                finally:
+                    self._query_profile_depth -= 1
+                    if method_name in self._query_profiles:
+                        self._query_profiles[method_name].add(profile)
+                    else:
+                        self._query_profiles[method_name] = pstats.Stats(profile)
+                    self._query_profiles[method_name].dump_stats(os.path.join(path, f"{method_name}.pstats"))
+            return profiled
+
+        for method_name in [x for x in vars(self) if x.startswith(('execute_', 'get_'))]:
+            delattr(self, method_name)  # previously wrapped
+        self._query_profiles = {}
+        self._query_profile_depth = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for method_name in dir(type(self)):
+                if method_name.startswith(('execute_', 'get_')) and callable(getattr(type(self), method_name)):
+                    setattr(self, method_name, wrap(method_name, getattr(self, method_name)))
+        if self._reader:
+            self._follow_published_versions()  # removed above
+
+
+    # Traces the SQL statements run until turned off with path None, which writes under path:
+    #  - sql_statements.tsv: number of runs and time by calling method and statement, with literals and IN lists normalized away
+    #  - sql_callers.tsv: the same by calling method only
+    # Statements taking at least slow_statement_time seconds are logged as they happen to slow_statements.log, with their query plan.
+    # Time includes fetching the statement's rows. Statements started by triggers count as another run of the triggering statement
+    def set_sql_tracing(self, path, slow_statement_time=0.1):
+        if self._sql_tracer:
+            self._sql_tracer.write_statistics()
+            self._cxn.set_trace_callback(None)
+            self._cxn.tracer = None
+            self._sql_tracer = None
+        if path:
+            self._sql_tracer = self._SqlTracer(path, slow_statement_time)
+            self._cxn.tracer = self._sql_tracer
+            self._cxn.set_trace_callback(self._sql_tracer.trace)
+
+
+    # see LoadOptions.profile_path. Stages are numbered in load order. The sampler is a timer signal on the main thread (a sampling thread
+    # would confuse cProfile, which sees all threads since Python 3.12). A signal waits for a running SQLite statement to return, so
+    # samples are weighted by time since the previous one (in microseconds), which puts SQLite time on the function executing the statement.
+    # No sampling where there's no setitimer (Windows)
+    class _StageProfiler:
+        def __init__(self, path, sample_interval=0.001):
+            os.makedirs(path, exist_ok=True)
+            self.path = path
+            self.stage_num = 0
+            self.samples = Counter()  # collapsed stack -> microseconds
+            self.sampling = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+            if self.sampling:
+                self.last_sample_time = time.perf_counter()
+                signal.signal(signal.SIGALRM, self._sample)
+                signal.setitimer(signal.ITIMER_REAL, sample_interval, sample_interval)
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+
+        def _sample(self, signum, frame):
+            sample_time = time.perf_counter()
+            stack = []
+            while frame:
+                stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += round((sample_time - self.last_sample_time) * 1000000)
+            self.last_sample_time = sample_time
+
+
+        def end_stage(self, stage_name):
+            self.profile.disable()
+            self.stage_num += 1
+            file_path = os.path.join(self.path, f"{self.stage_num:02d}_{stage_name}")
+            if self.sampling:
+                with open(file_path + '.collapsed', 'w') as file:
+                    file.writelines(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+            self.profile.dump_stats(file_path + '.pstats')
+            self.samples = Counter()
+            self.last_sample_time = time.perf_counter()  # not counting the above
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+
+        def close(self):
+            self.profile.disable()
+            if self.sampling:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+
+    # see set_sql_tracing. Statements are timed from the start of a cursor call (or trace of a statement during that call, eg. in a script)
+    # to the next, attributed to the method calling the cursor
+    class _SqlTracer:
+        _STRING_PATTERN = re.compile(r"(?:\b[xX])?'(?:[^']|'')*'")
+        _NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+        _LIST_PATTERN = re.compile(r"\?(?:\s*,\s*\?)+")
+
+        def __init__(self, path, slow_statement_time):
+            os.makedirs(path, exist_ok=True)
+            self.path = path
+            self.slow_statement_time = slow_statement_time
+            self.statements = {}  # (calling method, normalized statement) -> [runs, seconds]
+            self.key = None  # statement being timed
+            self.sql = None  # its text with parameter values, for the slow statement log
+            self.mark_time = None  # set during a cursor call
+            self.slow_statements = []  # (seconds, calling method, sql), logged after the cursor call
+            self.explaining = False
+
+
+        def _normalize(self, sql):
+            sql = self._STRING_PATTERN.sub('?', sql)
+            sql = self._NUMBER_PATTERN.sub('?', sql)
+            sql = self._LIST_PATTERN.sub('?, ...', sql)
+            return ' '.join(sql.split())
+
+
+        # trace callback, also called for each statement of a script or each parameter set of an executemany
+        def trace(self, sql):
+            if self.explaining:
+                return
+            frame = sys._getframe(1)
+            while frame and (not frame.f_code.co_qualname.startswith('ScriptDatabase.') or
+                             frame.f_code.co_qualname.startswith(('ScriptDatabase._SqlTracer.', 'ScriptDatabase._Connection.', 'ScriptDatabase._TracedCursor.'))):
+                frame = frame.f_back
+            key = (frame.f_code.co_qualname if frame else '', self._normalize(sql))
+            self._lap()
+            self.statements.setdefault(key, [0, 0.0])[0] += 1
+            self.key, self.sql = key, sql
+
+
+        def _lap(self):
+            if self.mark_time is None:
+                return
+            current_time = time.perf_counter()
+            if self.key:
+                elapsed = current_time - self.mark_time
+                self.statements[self.key][1] += elapsed
+                if elapsed >= self.slow_statement_time:
+                    self.slow_statements.append((elapsed, self.key[0], self.sql))
+            self.mark_time = current_time
+
+
+        def call(self, cursor, function, args, is_fetch=False):
+            if self.mark_time is not None:
+                return function(*args)
+            self.key, self.sql = cursor.statement if is_fetch else (None, None)
+            self.mark_time = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self._lap()
+                self.mark_time = None
+                if not is_fetch:
+                    cursor.statement = (self.key, self.sql)
+                if self.slow_statements:
+                    self._log_slow_statements(cursor.connection)
+
+
+        def _log_slow_statements(self, connection):
+            self.explaining = True
+            try:
+                with open(os.path.join(self.path, 'slow_statements.log'), 'a') as file:
+                    for elapsed, caller, sql in self.slow_statements:
+                        file.write(f"{elapsed:.3f} s in {caller}:\n{sql.strip()}\n")
+                        try:
+                            depths = {0: 0}
+                            for id, parent, _, detail in sqlite3.Connection.execute(connection, "EXPLAIN QUERY PLAN " + sql):
+                                depths[id] = depths.get(parent, 0) + 1
+                                file.write(f"{'  ' * depths[id]}{detail}\n")
+                        except sqlite3.Error as e:
+                            file.write(f"  (no query plan: {e})\n")
+                        file.write("\n")
+            finally:
+                self.slow_statements = []
+                self.explaining = False
+
+
+        def write_statistics(self):
+            callers = {}
+            for (caller, _), (runs, seconds) in self.statements.items():
+                caller_stats = callers.setdefault(caller, [0, 0.0])
+                caller_stats[0] += runs
+                caller_stats[1] += seconds
+
+            with open(os.path.join(self.path, 'sql_statements.tsv'), 'w', newline='') as file:
+                writer = csv.writer(file, delimiter='\t')
+                writer.writerow(['Seconds', 'Runs', 'Calling Method', 'Statement'])
+                for (caller, statement), (runs, seconds) in sorted(self.statements.items(), key=lambda x: -x[1][1]):
+                    writer.writerow([f"{seconds:.4f}", runs, caller, statement])
+            with open(os.path.join(self.path, 'sql_callers.tsv'), 'w', newline='') as file:
+                writer = csv.writer(file, delimiter='\t')
+                writer.writerow(['Seconds', 'Runs', 'Calling Method'])
+                for caller, (runs, seconds) in sorted(callers.items(), key=lambda x: -x[1][1]):
+                    writer.writerow([f"{seconds:.4f}", runs, caller])
+
+
+    # hands out timed cursors while SQL is traced
+    class _Connection(sqlite3.Connection):
+        tracer = None
+
+        def cursor(self, factory=None):
+            if factory is None:
+                factory = ScriptDatabase._TracedCursor if self.tracer else sqlite3.Cursor
+            return super().cursor(factory)
+
+
+        def execute(self, *args):
+            return self.cursor().execute(*args) if self.tracer else super().execute(*args)
+
+
+        def executemany(self, *args):
+            return self.cursor().executemany(*args) if self.tracer else super().executemany(*args)
+
+
+        def executescript(self, *args):
+            return self.cursor().executescript(*args) if self.tracer else super().executescript(*args)
+
+
+    class _TracedCursor(sqlite3.Cursor):
+        statement = (None, None)  # see _SqlTracer
+
+        def _call(self, function, args, is_fetch=False):
+            return self.connection.tracer.call(self, function, args, is_fetch) if self.connection.tracer else function(*args)
+
+
+        def execute(self, *args):
+            return self._call(super().execute, args)
+
+
+        def executemany(self, *args):
+            return self._call(super().executemany, args)
+
+
+        def executescript(self, *args):
+            return self._call(super().executescript, args)
+
+
+        def fetchone(self):
+            return self._call(super().fetchone, (), True)
+
+
+        def fetchmany(self, *args):
+            return self._call(super().fetchmany, args, True)
+
+
+        def fetchall(self):
+            return self._call(super().fetchall, (), True)
+
+
+        def __next__(self):
+            return self._call(super().__next__, (), True)
+
+
+    # in-memory form of code_point_ancestry, see _get_ancestor_index
+    class _AncestorIndex:
+        def __init__(self):
+            self.bitsets = {}  # code point id -> bitset (as an int) of its ancestors
+            self.code_points = {}  # ancestor_num -> code point id
+            self.bits = {}  # code point id -> its own bit, for those which are an ancestor of something
+            self.parents = {}  # code point id -> parent ids
+            self.no_parent_bit = 0  # the no parent character is a signal value rather than a real ancestor, so not counted for similarity
+
+
+    class _ScriptSubset:
+        def __init__(self):
+            self.kept_scripts = None  # those chosen by the load options, which alphabets are loaded for
+            self.scripts = None  # loaded in full: the kept scripts, ancestors of theirs and the common, inherited and unknown scripts
+            self.lineage_code_points = None  # of all the loaded scripts, and those in their declared lineage (see _get_script_subset)
+            self.code_points = set()  # as loaded
+
+
     class _CLDRParseData:
         def __init__(self):
             self.letters = []
@@ -2387,6 +4811,28 @@ class ScriptDatabase:
             self.letter_case = None
 
 
+# The built-in derivation processes. Few derivations are generated by more than one, eg. about 10 Z-variant equivalencies are also
+# Traditional/Simplified Chinese (kept as the latter)
+ScriptDatabase.register_derivation_generator("Ge'ez Unicode name", ScriptDatabase._get_geez_derivations, 150)
+ScriptDatabase.register_derivation_generator('Sogdian Unicode name', ScriptDatabase._get_sogdian_derivations, 140)
+ScriptDatabase.register_derivation_generator('Latin Unicode name', ScriptDatabase._get_latin_derivations, 130)
+ScriptDatabase.register_derivation_generator('Arabic Unicode name', ScriptDatabase._get_arabic_derivations, 120, inputs=('verify',))
+ScriptDatabase.register_derivation_generator('Cuneiform Unicode name', ScriptDatabase._get_cuneiform_derivations, 110)
+ScriptDatabase.register_derivation_generator('Case derivation', ScriptDatabase._get_case_derivations, 100)
+ScriptDatabase.register_derivation_generator('Simplified Chinese', ScriptDatabase._get_simplified_chinese_derivations, 90)
+ScriptDatabase.register_derivation_generator('Compound Egyptian Hieroglyphs', ScriptDatabase._get_hieroglyph_derivations, 80, inputs=('verify',))
+ScriptDatabase.register_derivation_generator('Unicode decomposition', ScriptDatabase._get_decomposition_derivations, 70)
+ScriptDatabase.register_derivation_generator('Equivalencies from name', ScriptDatabase._get_position_equivalency_derivations, 60)
+ScriptDatabase.register_derivation_generator('Supplementary Indic', functools.partial(ScriptDatabase._get_letter_derivations,
+                                             letter_order=ScriptDatabase._INDIC_SUPPLEMENT), 50, inputs=('indic_supp_data',))
+ScriptDatabase.register_derivation_generator('Indic letters', functools.partial(ScriptDatabase._get_letter_derivations,
+                                             letter_order=ScriptDatabase._INDIC_ORDER), 40, inputs=('indic_letter_data',))
+ScriptDatabase.register_derivation_generator('Semitic letters', functools.partial(ScriptDatabase._get_letter_derivations,
+                                             letter_order=ScriptDatabase._SEMITIC_ORDER), 30, inputs=('semitic_letter_data',))
+ScriptDatabase.register_derivation_generator('Tangut radicals', ScriptDatabase._get_tangut_derivations, 20)
+ScriptDatabase.register_derivation_generator('Independent scripts - general', ScriptDatabase._get_independent_derivations, 10, fallback=True)
+
+
 class Certainty(Enum):
     UNSPECIFIED = -1
     NEAR_CERTAIN = 1
@@ -2465,7 +4911,37 @@ class DerivationType(Enum):
 if __name__ == '__main__':
     db = ScriptDatabase()
 
-    cursor = db.load_database(ScriptDatabase.OPTIMIZED_DEBUG_LOAD)  # replace with DEBUG_LOAD for development run
+    # python scriptdb.py profile [FILE]: script profile of a UTF-8 text file (or stdin) against the existing database
+    if len(sys.argv) > 1 and sys.argv[1] == 'profile':
+        db.print_table(db.get_text_script_profile(sys.argv[2], os.cpu_count()) if len(sys.argv) > 2 else db.get_text_script_profile(sys.stdin))
+        sys.exit()
+
+    # python scriptdb.py diff OTHER_DB: changes of the existing database from another build of it (eg. a copy of the previous one)
+    if len(sys.argv) > 2 and sys.argv[1] == 'diff':
+        group = None
+        for section, change, script_code, process, item, old, new in db.get_database_diff(sys.argv[2]):
+            if (section, script_code, process) != group:
+                group = (section, script_code, process)
+                print(f"{section} - {script_code}" + (f" - {process}" if process else "") + ":")
+            values = {'added': new, 'removed': old}.get(change) or {column: f"{old[column]} -> {new[column]}" for column in new}
+            print(f"  {change} {item}: " + ", ".join(f"{column} {value}" for column, value in values.items()))
+        sys.exit()
+
+    # python scriptdb.py validate: check the curated resource files without a build, listing every error (exit code 1 if any)
+    if len(sys.argv) > 1 and sys.argv[1] == 'validate':
+        validation_errors = db.validate_resource_files()
+        for file_name, line, message in validation_errors:
+            print(f"{file_name}:{line}: {message}" if line else f"{file_name}: {message}")
+        sys.exit(1 if validation_errors else 0)
+
+    # python scriptdb.py watch: apply edits of the derivation and standard alphabet resource files to the existing database as they're saved
+    if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+        db.watch_resources()
+        sys.exit()
+
+    options = copy.copy(ScriptDatabase.OPTIMIZED_DEBUG_LOAD)  # replace with DEBUG_LOAD for development run
+    options.resume = len(sys.argv) > 1 and sys.argv[1] == 'resume'  # python scriptdb.py resume: continue a failed build
+    cursor = db.load_database(options)
 
     # do stuff here if you want, for example:
     # results = db.execute_saved_query('Get Character Ancestors', parameters=('a',))
@@ -0,0 +1,273 @@
+import os
+import struct
+import tempfile
+import unittest
+from scriptdb import Certainty, DerivationGenerator, DerivationType, LoadOptions, ScriptDatabase, SequenceType
+
+
+# Lineage queries on a small derivation graph, without a database build. Run from this directory: python -m unittest
+class CommonAncestorTest(unittest.TestCase):
+    # child: parents. x and y are derived from a, which is in a 3-cycle with b and c, which is derived from r
+    DERIVATIONS = {'x': 'a', 'y': 'a', 'z': 'b', 'a': 'b', 'b': 'c', 'c': 'ar'}
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.db = ScriptDatabase(self._temp_dir.name)
+        self.db._query_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries')
+        cursor = self.db._cxn.cursor()
+        self.db._setup_schema(cursor)
+        characters = set(self.DERIVATIONS) | set(''.join(self.DERIVATIONS.values()))
+        cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?)", [(ord(c), SequenceType.BASE.value) for c in characters])
+        cursor.executemany("INSERT INTO code_point (id, script_code, general_category_code, is_alphabetic) VALUES (?, 'Latn', 'Ll', 1)", [(ord(c),) for c in characters])
+        cursor.executemany("INSERT INTO code_point_derivation (child_id, parent_id, process_type_id) VALUES (?, ?, ?)",
+                           [(ord(child), ord(parent), ScriptDatabase.MANUAL_PROCESS_ID) for child, parents in self.DERIVATIONS.items() for parent in parents])
+        self.db._load_code_point_ancestry(cursor)
+        self.db._cxn.commit()
+        cursor.close()
+
+
+    def tearDown(self):
+        self.db._cxn.close()
+        self._temp_dir.cleanup()
+
+
+    def test_common_ancestors(self):
+        self.assertEqual(self.db.get_common_ancestors('x', 'y'), set('abcr'))
+        self.assertEqual(self.db.get_common_ancestors('x', 'r'), set('r'))
+
+
+    def test_lowest_common_ancestors_in_cycle(self):
+        self.assertEqual(self.db.get_common_ancestors('x', 'y', lowest_only=True), set('abc'))
+        self.assertEqual(self.db.get_common_ancestors('x', 'z', lowest_only=True), set('abc'))
+        self.assertEqual(self.db.get_common_ancestors('x', 'r', lowest_only=True), set('r'))
+
+
+    def test_closest_common_ancestor_in_cycle(self):
+        self.assertEqual(self.db.get_closest_common_ancestor('x', 'y'), 'a')
+        self.assertEqual(self.db.get_closest_common_ancestor('y', 'z'), 'b')
+        self.assertEqual(self.db.get_closest_common_ancestor('x', 'r'), 'r')
+
+
+    def test_closest_common_ancestor_of_alphabets(self):
+        # alphabets of y and z with a diaeresis, which as the parent of the spacing diaeresis is an ancestor too, but not a letter
+        cursor = self.db._cxn.cursor()
+        cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?)", [(0x308, SequenceType.BASE.value), (0xA8, SequenceType.BASE.value)])
+        cursor.executemany("INSERT INTO code_point (id, script_code, general_category_code) VALUES (?, ?, ?)", [(0x308, 'Zinh', 'Mn'), (0xA8, 'Zyyy', 'Sk')])
+        cursor.execute("INSERT INTO code_point_derivation (child_id, parent_id, process_type_id) VALUES (?, ?, ?)", (0xA8, 0x308, ScriptDatabase.MANUAL_PROCESS_ID))
+        self.db._load_code_point_ancestry(cursor)
+        alphabet_ids = []
+        for i, letter in enumerate('yz'):
+            letter_id, alphabet_id = ScriptDatabase.UNICODE_MAX + 2 * i + 1, ScriptDatabase.UNICODE_MAX + 2 * i + 2
+            cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?)",
+                               [(letter_id, SequenceType.LETTER.value), (alphabet_id, SequenceType.SIMPLE_ALPHABET.value)])
+            cursor.executemany("INSERT INTO sequence_item (sequence_id, order_num, item_id) VALUES (?, ?, ?)",
+                               [(letter_id, 1, ord(letter)), (letter_id, 2, 0x308), (alphabet_id, 1, letter_id), (alphabet_id, 2, ord('r'))])
+            alphabet_ids.append(alphabet_id)
+        cursor.close()
+
+        self.assertEqual(self.db.get_closest_common_ancestor('y\u0308', 'z\u0308'), '\u0308')
+        self.assertEqual(self.db.get_closest_common_ancestor(*alphabet_ids), 'b')
+        self.assertEqual(self.db.get_common_ancestors(*alphabet_ids, lowest_only=True), set('abc'))
+
+
+    def test_derivation_path_costs(self):
+        # only the cost of near certain derivations overridden, of the three steps from z to r
+        cursor = self.db._cxn.cursor()
+        cursor.execute("INSERT INTO process_type (id, name) VALUES (?, 'Manual')", (ScriptDatabase.MANUAL_PROCESS_ID,))
+        cursor.execute("UPDATE code_point_derivation SET certainty_type_id = ? WHERE child_id = ? AND parent_id = ?", (Certainty.NEAR_CERTAIN.value, ord('c'), ord('r')))
+        cursor.close()
+        paths = self.db.get_derivation_paths('z', 'r', certainty_costs={Certainty.NEAR_CERTAIN.value: 10})
+        self.assertEqual([(p.characters, p.cost) for p in paths], [(list('zbcr'), 2 * ScriptDatabase._CERTAINTY_PATH_COSTS[Certainty.UNSPECIFIED.value] + 10)])
+
+
+    def test_updated_ancestry(self):
+        def get_tables():  # ancestor numbers as code points, which an update numbers differently
+            ids = dict(cursor.execute("SELECT ancestor_num, code_point_id FROM code_point_ancestry WHERE ancestor_num IS NOT NULL"))
+            return ({(cp, num is not None, frozenset(ids[n[0]] for n in struct.iter_unpack('<H', packed)))
+                     for cp, num, packed in cursor.execute("SELECT * FROM code_point_ancestry")},
+                    set(cursor.execute("SELECT * FROM code_point_lineage_stats")))
+
+        # x moved from a to r (a no longer its ancestor), r derived from the new code point n and from z (a cycle through b and c)
+        cursor = self.db._cxn.cursor()
+        cursor.execute("INSERT INTO sequence (id, type_id) VALUES (?, ?)", (ord('n'), SequenceType.BASE.value))
+        cursor.execute("INSERT INTO code_point (id, script_code, general_category_code) VALUES (?, 'Grek', 'Ll')", (ord('n'),))
+        cursor.execute("DELETE FROM code_point_derivation WHERE child_id = ? AND parent_id = ?", (ord('x'), ord('a')))
+        cursor.executemany("INSERT INTO code_point_derivation (child_id, parent_id, process_type_id) VALUES (?, ?, ?)",
+                           [(ord(child), ord(parent), ScriptDatabase.MANUAL_PROCESS_ID) for child, parent in ('xr', 'rn', 'rz')])
+        self.db._update_code_point_ancestry(cursor, {ord('x'), ord('r')})
+        updated = get_tables()
+        self.db._load_code_point_ancestry(cursor)
+        self.assertEqual(updated, get_tables())
+
+
+# The merge rules of the generated derivations (see _load_generated_derivations), with generators returning fixed derivations
+class DerivationMergeTest(unittest.TestCase):
+    PROCESSES = {'Manual': 1, 'High': 2, 'Low': 3, 'Fallback': 4}
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.db = ScriptDatabase(self._temp_dir.name)
+        self.db._query_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries')
+        self.cursor = self.db._cxn.cursor()
+        self.db._setup_schema(self.cursor)
+        self.cursor.executemany("INSERT INTO process_type (id, name) VALUES (?, ?)", [(id, name) for name, id in self.PROCESSES.items()])
+        characters = 'cfmpqrx'
+        self.cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?)", [(ord(c), SequenceType.BASE.value) for c in characters])
+        self.cursor.executemany("INSERT INTO code_point (id, script_code, general_category_code) VALUES (?, 'Latn', 'Ll')", [(ord(c),) for c in characters])
+
+        def get_generator(derivations, priority, fallback=False):  # derivations as (child, parent or None, certainty)
+            rows = [(ord(child), ord(parent) if parent else None, DerivationType.DEFAULT.value if parent else None, certainty, 1 if parent else None)
+                    for child, parent, certainty in derivations]
+            return DerivationGenerator(lambda database, cursor: rows, priority, fallback=fallback)
+
+        # c from p by both High and Low, m manually derived, x with an unresolved parent by High, f only by the fallback
+        self.db._DERIVATION_GENERATORS = {
+            'High': get_generator([('c', 'p', Certainty.NEAR_CERTAIN.value), ('m', 'p', Certainty.NEAR_CERTAIN.value), ('x', None, None)], 20),
+            'Low': get_generator([('c', 'p', Certainty.UNCERTAIN.value), ('c', 'q', Certainty.UNCERTAIN.value)], 10),
+            'Fallback': get_generator([('f', 'p', Certainty.UNCERTAIN.value), ('c', 'r', Certainty.UNCERTAIN.value),
+                                       ('x', 'r', Certainty.UNCERTAIN.value)], 30, fallback=True)}
+        self.db._load_generated_derivations(self.cursor, {}, True, {ord('m')})
+
+
+    def tearDown(self):
+        self.db._cxn.close()
+        self._temp_dir.cleanup()
+
+
+    def get_derivations(self, table_name):
+        return set((chr(x[0]), chr(x[1]), x[2], x[3]) for x in self.cursor.execute(f"""
+            SELECT child_id, parent_id, certainty_type_id, p.name FROM {table_name} d INNER JOIN process_type p ON p.id = d.process_type_id"""))
+
+
+    def test_merge_rules(self):
+        # the higher priority of the same child and parent kept, the fallback only deriving children no other generator derives
+        self.assertEqual(self.get_derivations('code_point_derivation'), {('c', 'p', Certainty.NEAR_CERTAIN.value, 'High'),
+                                                                          ('c', 'q', Certainty.UNCERTAIN.value, 'Low'),
+                                                                          ('f', 'p', Certainty.UNCERTAIN.value, 'Fallback')})
+
+
+    def test_manual_children_overridden(self):
+        self.assertEqual(self.get_derivations('overridden_derivation'), {('m', 'p', Certainty.NEAR_CERTAIN.value, 'High')})
+
+
+# The least certain derivation of script_derivation (see _load_script_derivations), which isn't the highest certainty type id
+class ScriptDerivationTest(unittest.TestCase):
+    # child: (parent, certainty)
+    DERIVATIONS = {'a': ('α', Certainty.VARIED), 'b': ('β', Certainty.WEAK_ASSUMPTION),
+                   'в': ('β', Certainty.UNSPECIFIED), 'г': ('γ', Certainty.UNCERTAIN)}
+
+    def test_least_certain(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = ScriptDatabase(temp_dir)
+            db._query_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries')
+            cursor = db._cxn.cursor()
+            db._setup_schema(cursor)
+            scripts = {'a': 'Latn', 'b': 'Latn', 'в': 'Cyrl', 'г': 'Cyrl', 'α': 'Grek', 'β': 'Grek', 'γ': 'Grek'}
+            cursor.executemany("INSERT INTO sequence (id, type_id) VALUES (?, ?)", [(ord(c), SequenceType.BASE.value) for c in scripts])
+            cursor.executemany("INSERT INTO code_point (id, script_code, general_category_code, is_alphabetic) VALUES (?, ?, 'Ll', 1)",
+                               [(ord(c), script_code) for c, script_code in scripts.items()])
+            cursor.executemany("INSERT INTO code_point_derivation (child_id, parent_id, certainty_type_id, process_type_id) VALUES (?, ?, ?, ?)",
+                               [(ord(child), ord(parent), certainty.value, ScriptDatabase.MANUAL_PROCESS_ID)
+                                for child, (parent, certainty) in self.DERIVATIONS.items()])
+            db._load_script_derivations(cursor)
+            self.assertEqual(dict((x[0], x[1]) for x in cursor.execute("SELECT child_script_code, min_certainty_type_id FROM script_derivation")),
+                             {'Latn': Certainty.WEAK_ASSUMPTION.value, 'Cyrl': Certainty.UNCERTAIN.value})
+            # in the order of the derivation path costs
+            costs = [db._CERTAINTY_PATH_COSTS[x] for x in db._CERTAINTY_ORDER]
+            self.assertEqual(costs, sorted(costs))
+            db._cxn.close()
+
+
+# The query plan check of a load, for each code point layout of the load options (compressed ranges and compact storage). The planner has
+# no table statistics for an empty database, as for a build before its final ANALYZE, so the plans are those of the layouts' worst case
+class QueryPlanTest(unittest.TestCase):
+
+    def test_indexed_query_plans(self):
+        for compress_code_point_ranges in (False, True):
+            for compact_storage in (False, True):
+                with self.subTest(compress_code_point_ranges=compress_code_point_ranges, compact_storage=compact_storage), \
+                        tempfile.TemporaryDirectory() as temp_dir:
+                    db = ScriptDatabase(temp_dir)
+                    db._query_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries')
+                    cursor = db._cxn.cursor()
+                    db._setup_schema(cursor, compress_code_point_ranges)
+                    if not compress_code_point_ranges:
+                        cursor.execute("DROP TABLE code_point_range")  # as at the end of a load
+                    if compact_storage:
+                        db._compact_storage(cursor)
+                    db._verify_query_plans(cursor)
+                    db._cxn.close()
+
+
+# The rewrite of a code column's uses in the schema as uses of its id, for the compact_storage load option
+class CodeIdSqlTest(unittest.TestCase):
+    IDS = {'Cn': 1, 'Cs': 2, 'Lo': 3}
+
+    def get_sql(self, sql):
+        return ScriptDatabase._get_code_id_sql(sql, 'general_category_code', 'general_category_id', self.IDS)
+
+
+    def test_rewritten(self):
+        self.assertEqual(self.get_sql("CASE WHEN general_category_code IN ('Cn', 'Cs', 'Zz') THEN NULL ELSE CHAR(id) END"),
+                         "CASE WHEN general_category_id IN (1, 2, -1) THEN NULL ELSE CHAR(id) END")
+        self.assertEqual(self.get_sql("CREATE INDEX idx ON \"code_point\"(general_category_code) WHERE general_category_code <> 'Lo'"),
+                         "CREATE INDEX idx ON \"code_point\"(general_category_id) WHERE general_category_id <> 3")
+
+
+    def test_unsupported(self):
+        for sql in ("CASE WHEN general_category_code LIKE 'C_' THEN NULL END", "CASE WHEN general_category_code BETWEEN 'Ll' AND 'Lu' THEN 1 END",
+                    "CREATE INDEX idx ON code_point(script_code, general_category_code)", "general_category_code || 'x'"):
+            with self.subTest(sql=sql):
+                self.assertRaises(ValueError, self.get_sql, sql)
+
+
+# The lineage of a script subset build (see ScriptDatabase._get_script_subset) against that of a full build, on the resource files. Derivation
+# files which don't read (as one being written) are left out of both
+class ScriptSubsetTest(unittest.TestCase):
+    SCRIPTS = {'Latn', 'Cyrl', 'Grek'}
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource')
+        self.resource_path = os.path.join(self._temp_dir.name, 'resource')
+        derivations_path = os.path.join(self.resource_path, 'derivations')
+        os.makedirs(derivations_path)
+        for name in os.listdir(source_path):
+            if name not in ('derivations', ScriptDatabase._GENERATED_DIR_NAME):
+                os.symlink(os.path.join(source_path, name), os.path.join(self.resource_path, name))
+        os.makedirs(os.path.join(self.resource_path, ScriptDatabase._GENERATED_DIR_NAME))
+        db = ScriptDatabase(self._temp_dir.name)
+        for name in os.listdir(os.path.join(source_path, 'derivations')):
+            os.symlink(os.path.join(source_path, 'derivations', name), os.path.join(derivations_path, name))
+            try:
+                db._read_manual_derivation_rows()
+            except ValueError:
+                os.remove(os.path.join(derivations_path, name))
+
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+
+    def get_ancestors(self, name, include_scripts):
+        db = ScriptDatabase(self._temp_dir.name, name)
+        options = LoadOptions()
+        options.resource_path = self.resource_path
+        options.saved_query_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries')
+        options.include_scripts = include_scripts
+        cursor = db.load_database(options)
+        code_points = [chr(x[0]) for x in cursor.execute(f"SELECT id FROM code_point WHERE script_code IN ({','.join('?' * len(self.SCRIPTS))})",
+                                                         tuple(self.SCRIPTS))]
+        cursor.close()
+        ancestors = db.get_lineages(code_points).ancestors
+        db._cxn.close()
+        return ancestors
+
+
+    def test_subset_lineage(self):
+        # including the Hebrew letters reached by Cyrillic Ш, whose Aramaic and Phoenician parents are generated from the letter data
+        self.assertEqual(self.get_ancestors('subset.db', self.SCRIPTS), self.get_ancestors('full.db', None))
+
+
+if __name__ == '__main__':
+    unittest.main()